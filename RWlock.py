@@ -1,5 +1,8 @@
 import threading
+import time
 from threading import RLock
+from typing import Any, Callable, Iterable, List
+from stats import LOCK_WAITS
 
 class ReadWriteLock:
     def __init__(self):
@@ -10,10 +13,17 @@ class ReadWriteLock:
     
     def acquire_read(self):
         self._read_ready.acquire()
-        while self._writers > 0 or self._write_waiters > 0:
-            self._read_ready.wait()
+        waited = None
+        if self._writers > 0 or self._write_waiters > 0:
+            # Only contended acquires are timed, so the uncontended path stays as cheap as before.
+            start = time.perf_counter()
+            while self._writers > 0 or self._write_waiters > 0:
+                self._read_ready.wait()
+            waited = time.perf_counter() - start
         self._readers += 1
         self._read_ready.release()
+        if waited is not None:
+            LOCK_WAITS.record('read', waited)
     
     def release_read(self):
         self._read_ready.acquire()
@@ -25,14 +35,59 @@ class ReadWriteLock:
     def acquire_write(self):
         self._read_ready.acquire()
         self._write_waiters += 1
-        while self._readers > 0 or self._writers > 0:
-            self._read_ready.wait()
+        waited = None
+        if self._readers > 0 or self._writers > 0:
+            start = time.perf_counter()
+            while self._readers > 0 or self._writers > 0:
+                self._read_ready.wait()
+            waited = time.perf_counter() - start
         self._write_waiters -= 1
         self._writers += 1
         self._read_ready.release()
+        if waited is not None:
+            LOCK_WAITS.record('write', waited)
     
     def release_write(self):
         self._read_ready.acquire()
         self._writers -= 1
         self._read_ready.notify_all()
-        self._read_ready.release()
\ No newline at end of file
+        self._read_ready.release()
+
+class StripeLock(ReadWriteLock):
+    def __init__(self):
+        super().__init__()
+        self.sequence = 0
+    
+    def acquire_write(self):
+        super().acquire_write()
+        self.sequence += 1
+    
+    def release_write(self):
+        self.sequence += 1
+        super().release_write()
+    
+    def read_optimistic(self, reader: Callable[[], Any], retries: int = 4) -> Any:
+        for _ in range(retries):
+            start = self.sequence
+            if not start & 1:
+                result = reader()
+                if self.sequence == start:
+                    return result
+            time.sleep(0)
+        self.acquire_read()
+        try:
+            return reader()
+        finally:
+            self.release_read()
+
+class LockStripes:
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self._stripes = [StripeLock() for _ in range(size)]
+    
+    def for_key(self, key: str) -> StripeLock:
+        return self._stripes[hash(key) % self.size]
+    
+    def for_keys(self, keys: Iterable[str]) -> List[StripeLock]:
+        indexes = sorted({hash(key) % self.size for key in keys})
+        return [self._stripes[index] for index in indexes]
@@ -0,0 +1,110 @@
+import asyncio
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from codec import decode_payload, payload_codec
+from protocol import HEADER, MAX_MESSAGE_SIZE, encode_message, negotiate
+
+class AsyncServer:
+    def __init__(self, host: str, port: int, handler: Callable[[dict], dict], is_running: Callable[[], bool],
+                 backlog: int = 1024, max_concurrency: int = 256, executor_workers: int = 32, max_in_flight: int = 128,
+                 name: str = 'server', stats=None):
+        self.host = host
+        self.port = port
+        self.handler = handler
+        self.is_running = is_running
+        self.backlog = backlog
+        self.max_concurrency = max_concurrency
+        self.executor_workers = executor_workers
+        self.max_in_flight = max_in_flight
+        self.name = name
+        self.stats = stats
+        self.active_connections = 0
+        self._executor = None
+        self._semaphore = None
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix=f"{self.name}-worker")
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port,
+            backlog=self.backlog, reuse_address=True
+        )
+        try:
+            while self.is_running():
+                await asyncio.sleep(0.5)
+        finally:
+            server.close()
+            await server.wait_closed()
+            self._executor.shutdown(wait=False)
+
+    async def _read_message(self, reader: asyncio.StreamReader):
+        try:
+            header = await reader.readexactly(HEADER.size)
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None
+            raise
+        (length,) = HEADER.unpack(header)
+        if length > MAX_MESSAGE_SIZE:
+            raise ValueError(f"Message of {length} bytes exceeds limit of {MAX_MESSAGE_SIZE}")
+        return await reader.readexactly(length)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        addr = writer.get_extra_info('peername')
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.active_connections += 1
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+        try:
+            while self.is_running():
+                payload = await self._read_message(reader)
+                if payload is None or not self.is_running():
+                    break
+                codec = payload_codec(payload)
+                request = decode_payload(payload)
+                if request.get('operation') == 'HELLO':
+                    response = negotiate(request)
+                    if 'request_id' in request:
+                        response['request_id'] = request['request_id']
+                    writer.write(encode_message(response, codec))
+                    await writer.drain()
+                elif 'request_id' in request:
+                    await in_flight.acquire()
+                    task = asyncio.create_task(self._respond(writer, request, codec, in_flight, HEADER.size + len(payload)))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                else:
+                    await self._respond(writer, request, codec, received=HEADER.size + len(payload))
+        except Exception as e:
+            print(f"Error handling client {addr}: {e}")
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self.active_connections -= 1
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, request: dict, codec: str = 'json', in_flight: asyncio.Semaphore = None,
+                       received: int = 0):
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._semaphore:
+                try:
+                    response = await loop.run_in_executor(self._executor, self.handler, request)
+                except Exception as e:
+                    response = {'success': False, 'error': str(e)}
+            if 'request_id' in request:
+                response['request_id'] = request['request_id']
+            data = encode_message(response, codec)
+            writer.write(data)
+            if self.stats is not None:
+                self.stats.record_bytes(request.get('operation'), received, len(data))
+            await writer.drain()
+        finally:
+            if in_flight is not None:
+                in_flight.release()
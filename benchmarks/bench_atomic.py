@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client import KVClient
+from ycsb import Cluster
+
+def cas_increment(client: KVClient, key: str, retries: list) -> None:
+    while True:
+        value, version = client.get_versioned(key)
+        if client.cas(key, (value or 0) + 1, version):
+            return
+        retries.append(1)
+
+def run(port: int, mode: str, threads: int, increments: int) -> dict:
+    key = f"counter:{mode}"
+    retries = []
+    clients = [KVClient('localhost', port) for _ in range(threads)]
+
+    def work(client: KVClient):
+        for _ in range(increments):
+            if mode == 'incr':
+                client.incr(key)
+            else:
+                cas_increment(client, key, retries)
+
+    workers = [threading.Thread(target=work, args=(client,)) for client in clients]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    final = clients[0].get(key)
+    for client in clients:
+        client.close()
+    return {
+        'ops_per_sec': round(threads * increments / elapsed),
+        'retries': len(retries),
+        'final': final,
+        'expected': threads * increments
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Contended counter: client-side GET+CAS loop versus server-side INCR")
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--increments', type=int, default=500)
+    parser.add_argument('--nodes', type=int, default=2)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    cluster = Cluster(args.nodes, replicas=False, verbose=args.verbose)
+    cluster.start()
+    try:
+        results = {mode: run(cluster.coordinator_port, mode, args.threads, args.increments) for mode in ('cas_loop', 'incr')}
+    finally:
+        cluster.stop()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
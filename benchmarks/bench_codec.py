@@ -0,0 +1,54 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codec import CODECS, encode_payload, decode_payload
+
+def messages(value_size: int) -> dict:
+    value = {'name': 'x' * value_size, 'tags': ['a', 'b', 'c'], 'count': 42}
+    return {
+        'set_request': {'operation': 'SET', 'key': 'user:12345', 'value': value, 'request_id': 1234},
+        'get_request': {'operation': 'GET', 'key': 'user:12345', 'value': None, 'request_id': 1234},
+        'get_response': {'success': True, 'value': value, 'request_id': 1234},
+    }
+
+def timed(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return time.perf_counter() - start
+
+def bench(codec: str, message: dict, iterations: int) -> dict:
+    payload = encode_payload(message, codec)
+    encode_seconds = timed(lambda: encode_payload(message, codec), iterations)
+    decode_seconds = timed(lambda: decode_payload(payload), iterations)
+    # A coordinator hop decodes the client's frame and re-encodes it for the node.
+    relay_seconds = timed(lambda: encode_payload(decode_payload(payload), codec), iterations)
+    return {
+        'bytes': len(payload),
+        'encode_us': round(encode_seconds / iterations * 1e6, 2),
+        'decode_us': round(decode_seconds / iterations * 1e6, 2),
+        'relay_us': round(relay_seconds / iterations * 1e6, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and binary wire codecs")
+    parser.add_argument('--iterations', type=int, default=100000)
+    parser.add_argument('--value-sizes', type=int, nargs='+', default=[16, 1024, 65536])
+    args = parser.parse_args()
+
+    results = {}
+    for value_size in args.value_sizes:
+        iterations = max(100, args.iterations * 16 // max(value_size, 16))
+        results[value_size] = {
+            name: {codec: bench(codec, message, iterations) for codec in CODECS}
+            for name, message in messages(value_size).items()
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from RWlock import ReadWriteLock
+
+class PerKeyLockNode(KVStoreNode):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.key_locks = {}
+
+    def get_lock(self, key: str) -> ReadWriteLock:
+        if key not in self.key_locks:
+            self.key_locks[key] = ReadWriteLock()
+        return self.key_locks[key]
+
+    def get(self, key: str):
+        lock = self.get_lock(key)
+        lock.acquire_read()
+        try:
+            if key in self.data:
+                return self.data[key]['value']
+            return None
+        finally:
+            lock.release_read()
+
+def run_workload(node: KVStoreNode, threads: int, duration: float, read_ratio: float, keyspace: int) -> float:
+    counts = [0] * threads
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        rng = random.Random(index)
+        ops = 0
+        while time.perf_counter() < deadline:
+            for _ in range(100):
+                key = f"key:{rng.randrange(keyspace)}"
+                if rng.random() < read_ratio:
+                    node.get(key)
+                else:
+                    node.set(key, ops, sync_replicas=False)
+                ops += 1
+        counts[index] = ops
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(counts) / duration
+
+def lock_memory(node_class, keyspace: int) -> int:
+    tracemalloc.start()
+    node = node_class('bench', 'localhost', 0)
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i in range(keyspace):
+        node.get_lock(f"key:{i}")
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return used
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-key locks against striped locks with optimistic reads")
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=3)
+    parser.add_argument('--keyspace', type=int, default=100000)
+    args = parser.parse_args()
+
+    results = {}
+    for name, node_class in (('per_key', PerKeyLockNode), ('striped', KVStoreNode)):
+        results[name] = {'lock_memory_bytes': lock_memory(node_class, args.keyspace)}
+        for workload, read_ratio in (('read_heavy', 0.95), ('mixed', 0.5)):
+            node = node_class('bench', 'localhost', 0)
+            for i in range(args.keyspace):
+                node.set(f"key:{i}", i, sync_replicas=False)
+            ops = run_workload(node, args.threads, args.duration, read_ratio, args.keyspace)
+            results[name][f"{workload}_ops_per_sec"] = round(ops, 1)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client import KVClient
+from ycsb import Cluster
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run(port: int, quorum: dict, threads: int, operations: int, keys: int) -> dict:
+    clients = [KVClient('localhost', port) for _ in range(threads)]
+    latencies = {'set': [], 'get': []}
+    failures = []
+    write_sizes = {name: quorum[name] for name in ('n', 'w') if name in quorum}
+    read_sizes = {name: quorum[name] for name in ('n', 'r') if name in quorum}
+
+    def work(index: int, client: KVClient):
+        for i in range(operations):
+            key = f"quorum:{(index * operations + i) % keys}"
+            start = time.perf_counter()
+            if not client.set(key, {'field': i}, **write_sizes):
+                failures.append(key)
+            latencies['set'].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            client.get(key, **read_sizes)
+            latencies['get'].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=work, args=(index, client)) for index, client in enumerate(clients)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        client.close()
+    return {
+        'ops_per_sec': round(2 * threads * operations / elapsed),
+        'failures': len(failures),
+        **{
+            f"{operation}_{name}_ms": round(value * 1000, 3)
+            for operation, samples in latencies.items()
+            for name, value in (('p50', percentile(samples, 0.5)), ('p99', percentile(samples, 0.99)))
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="SET/GET latency for primary-only routing versus N=3 quorums of different sizes")
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--operations', type=int, default=1000)
+    parser.add_argument('--keys', type=int, default=1000)
+    parser.add_argument('--nodes', type=int, default=3)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    configurations = {
+        'primary': {},
+        'n3_r1_w1': {'n': 3, 'r': 1, 'w': 1},
+        'n3_r2_w2': {'n': 3, 'r': 2, 'w': 2},
+        'n3_r3_w3': {'n': 3, 'r': 3, 'w': 3}
+    }
+    cluster = Cluster(args.nodes, replicas=False, verbose=args.verbose)
+    cluster.start()
+    try:
+        results = {
+            name: run(cluster.coordinator_port, quorum, args.threads, args.operations, args.keys)
+            for name, quorum in configurations.items()
+        }
+    finally:
+        cluster.stop()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from ycsb import Zipfian, fnv64, record_key
+
+def workload(operations: int, records: int, write_ratio: float, scan_ratio: float, seed: int) -> list:
+    rng = random.Random(seed)
+    zipfian = Zipfian(records)
+    requests = []
+    scanned = records
+    for i in range(operations):
+        roll = rng.random()
+        if roll < scan_ratio:
+            # Cold one-off reads, like a batch job walking the keyspace, which pollute a plain LRU.
+            requests.append(('GET', f"cold{scanned}"))
+            scanned += 1
+        elif roll < scan_ratio + write_ratio:
+            requests.append(('SET', record_key(fnv64(zipfian.next(rng)) % records)))
+        else:
+            requests.append(('GET', record_key(fnv64(zipfian.next(rng)) % records)))
+    return requests
+
+def run(coordinator: Coordinator, requests: list) -> float:
+    start = time.perf_counter()
+    for i, (operation, key) in enumerate(requests):
+        if operation == 'SET':
+            coordinator.route_request(key, 'SET', i)
+        else:
+            coordinator.route_request(key, 'GET')
+    return len(requests) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare coordinator read cache policies on a skewed workload")
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--operations', type=int, default=50000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--cache-bytes', type=int, default=200000)
+    parser.add_argument('--write-ratio', type=float, default=0.05)
+    parser.add_argument('--scan-ratio', type=float, default=0.3)
+    parser.add_argument('--port', type=int, default=7410)
+    args = parser.parse_args()
+
+    node = KVStoreNode('cache_bench', 'localhost', args.port)
+    threading.Thread(target=node.start_server, daemon=True).start()
+    time.sleep(0.5)
+    value = 'x' * args.value_size
+    for i in range(args.records):
+        node.set(record_key(i), value, sync_replicas=False)
+
+    requests = workload(args.operations, args.records, args.write_ratio, args.scan_ratio, seed=1)
+    results = {}
+    for policy in ('none', 'lru', 'tinylfu'):
+        coordinator = Coordinator('localhost', 0, failure_detection=False, collect_stats=False,
+                                  read_cache_bytes=0 if policy == 'none' else args.cache_bytes,
+                                  read_cache_policy='lru' if policy == 'none' else policy)
+        coordinator.register_node(node.node_id, node.host, node.port)
+        throughput = run(coordinator, requests)
+        result = {'ops_per_sec': round(throughput)}
+        if coordinator.read_cache is not None:
+            status = coordinator.read_cache.status()
+            result.update({name: status[name] for name in ('hit_ratio', 'entries', 'used_bytes', 'evictions', 'rejections', 'invalidations')})
+        results[policy] = result
+        coordinator.running = False
+
+    node.running = False
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import List, Dict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consistent_hashing import ConsistentHash
+
+class LegacyConsistentHash:
+    def __init__(self, nodes: List[str] = None, virtual_nodes: int = 150):
+        self.virtual_nodes = virtual_nodes
+        self.ring: Dict[int, str] = {}
+        self.sorted_keys: List[int] = []
+        if nodes:
+            for node in nodes:
+                self.add_node(node)
+
+    def _hash(self, key: str) -> int:
+        return int(hashlib.md5(key.encode()).hexdigest(), 16)
+
+    def add_node(self, node: str):
+        for i in range(self.virtual_nodes):
+            hash_key = self._hash(f"{node}:{i}")
+            self.ring[hash_key] = node
+            self.sorted_keys.append(hash_key)
+        self.sorted_keys.sort()
+
+    def remove_node(self, node: str):
+        for i in range(self.virtual_nodes):
+            hash_key = self._hash(f"{node}:{i}")
+            if hash_key in self.ring:
+                del self.ring[hash_key]
+                self.sorted_keys.remove(hash_key)
+
+    def get_node(self, key: str) -> str:
+        if not self.ring:
+            return None
+        hash_key = self._hash(key)
+        for ring_key in self.sorted_keys:
+            if ring_key >= hash_key:
+                return self.ring[ring_key]
+        return self.ring[self.sorted_keys[0]]
+
+    def get_nodes(self, key: str, count: int = 1) -> List[str]:
+        if not self.ring:
+            return []
+        hash_key = self._hash(key)
+        start_index = 0
+        for i, ring_key in enumerate(self.sorted_keys):
+            if ring_key >= hash_key:
+                start_index = i
+                break
+        nodes = []
+        seen_nodes = set()
+        total_keys = len(self.sorted_keys)
+        for i in range(total_keys):
+            node = self.ring[self.sorted_keys[(start_index + i) % total_keys]]
+            if node not in seen_nodes:
+                nodes.append(node)
+                seen_nodes.add(node)
+            if len(nodes) == count:
+                break
+        return nodes
+
+def timed(fn, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def bench(ring_class, node_count: int, lookups: int) -> dict:
+    nodes = [f"node_{i}" for i in range(node_count)]
+    keys = [f"key:{i}" for i in range(lookups)]
+
+    ring = ring_class()
+    build = timed(lambda: [ring.add_node(node) for node in nodes])
+    ring.get_nodes(keys[0], count=2)
+
+    get_node = timed(lambda: [ring.get_node(key) for key in keys])
+    get_nodes = timed(lambda: [ring.get_nodes(key, count=2) for key in keys])
+    removal = timed(lambda: ring.remove_node(nodes[-1]))
+    return {
+        'build_ms': round(build * 1000, 2),
+        'get_node_us': round(get_node / lookups * 1e6, 3),
+        'get_nodes_us': round(get_nodes / lookups * 1e6, 3),
+        'remove_node_ms': round(removal * 1000, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ConsistentHash against the original linear-scan ring")
+    parser.add_argument('--nodes', type=int, nargs='+', default=[3, 30, 300])
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = []
+    for node_count in args.nodes:
+        legacy_lookups = max(50, args.lookups // max(1, node_count // 3))
+        results.append({
+            'nodes': node_count,
+            'legacy': bench(LegacyConsistentHash, node_count, legacy_lookups),
+            'current': bench(ConsistentHash, node_count, args.lookups),
+        })
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from node_launcher import NodeLauncher
+from ycsb import WORKLOADS, free_port, wait_for_port, run_coordinator, load, run_workload
+from protocol import request
+
+def measure(workers: int, args) -> dict:
+    context = multiprocessing.get_context('spawn')
+    coordinator_port = free_port()
+    coordinator = context.Process(target=run_coordinator, args=(coordinator_port, 'threaded', False), daemon=True)
+    coordinator.start()
+    if not wait_for_port(coordinator_port):
+        raise RuntimeError("Coordinator did not start")
+
+    launcher = NodeLauncher('localhost', args.base_port, workers, 'localhost', coordinator_port,
+                            node_id='scale', server_mode=args.server_mode, pin_cpus=True, quiet=True)
+    launcher.start()
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        with socket.create_connection(('localhost', coordinator_port)) as sock:
+            if request(sock, {'operation': 'HEALTH'}).get('node_count') == workers:
+                break
+        time.sleep(0.05)
+
+    config = {
+        'coordinator_port': coordinator_port,
+        'records': args.records,
+        'value_size': args.value_size,
+        'distribution': 'uniform',
+        'clients': args.clients,
+        'threads': args.threads,
+        'duration': args.duration,
+        'max_scan_length': 10,
+        'codec': 'binary',
+        # Clients go straight to the owning worker so the coordinator is not the bottleneck.
+        'smart': True,
+    }
+    try:
+        load(config)
+        inserted = context.Value('q', args.records)
+        result = run_workload(config, args.workload, inserted)
+    finally:
+        launcher.stop(unregister=False)
+        coordinator.terminate()
+        coordinator.join(timeout=5)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput as node worker processes are added")
+    parser.add_argument('--workers', type=int, nargs='+', default=None, help="Worker counts to try (default 1, 2, 4 ... cores)")
+    parser.add_argument('--workload', choices=list(WORKLOADS), default='B')
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--clients', type=int, default=None, help="Client processes (default twice the cores)")
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--base-port', type=int, default=7600)
+    parser.add_argument('--server-mode', choices=('threaded', 'asyncio'), default='threaded')
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = args.workers or sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+    args.clients = args.clients or 2 * cores
+
+    results = {}
+    for workers in counts:
+        results[workers] = measure(workers, args)
+    base = results[counts[0]]['ops_per_sec'] / counts[0]
+    print(json.dumps({
+        'cores': cores,
+        'workload': args.workload,
+        'scaling': {
+            workers: {
+                'ops_per_sec': result['ops_per_sec'],
+                'speedup': round(result['ops_per_sec'] / (base * counts[0]), 2) if base else None,
+                'efficiency': round(result['ops_per_sec'] / (base * workers), 2) if base else None,
+                'p99_ms': {name: op['latency_ms']['p99'] for name, op in result['operations'].items()}
+            }
+            for workers, result in results.items()
+        }
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from protocol import HEADER, encode_message
+
+async def run_client(port: int, client_id: int, deadline: float, latencies: list):
+    reader, writer = await asyncio.open_connection('localhost', port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            operation = 'SET' if i % 2 == 0 else 'GET'
+            message = {'operation': operation, 'key': f"bench:{client_id}:{i % 100}", 'value': i}
+            start = time.perf_counter()
+            writer.write(encode_message(message))
+            await writer.drain()
+            (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+            json.loads(await reader.readexactly(length))
+            latencies.append(time.perf_counter() - start)
+            i += 1
+    finally:
+        writer.close()
+
+async def run_load(port: int, connections: int, duration: float) -> list:
+    latencies = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(run_client(port, c, deadline, latencies) for c in range(connections)))
+    return latencies
+
+def percentile(samples: list, p: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare threaded and asyncio server modes of KVStoreNode")
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--threaded-port', type=int, default=7100)
+    parser.add_argument('--async-port', type=int, default=7101)
+    args = parser.parse_args()
+
+    node = KVStoreNode('bench_node', 'localhost', args.threaded_port)
+    threading.Thread(target=node.start_server, kwargs={'backlog': 1024}, daemon=True).start()
+    threading.Thread(target=node.start_async_server, kwargs={'port': args.async_port, 'register': False}, daemon=True).start()
+    time.sleep(1)
+
+    results = {}
+    for mode, port in (('threaded', args.threaded_port), ('asyncio', args.async_port)):
+        latencies = asyncio.run(run_load(port, args.connections, args.duration))
+        results[mode] = {
+            'ops_per_sec': round(len(latencies) / args.duration, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        }
+    results['connections'] = args.connections
+    print(json.dumps(results, indent=2))
+    node.running = False
+
+if __name__ == "__main__":
+    main()
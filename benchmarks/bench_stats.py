@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from protocol import request
+from stats import Stats
+
+def workload(operations: int, keyspace: int) -> list:
+    return [
+        {'operation': 'SET', 'key': f"key:{i % keyspace}", 'value': i} if i % 10 == 0 else {'operation': 'GET', 'key': f"key:{i % keyspace}"}
+        for i in range(operations)
+    ]
+
+def run_in_process(node: KVStoreNode, requests: list) -> float:
+    start = time.perf_counter()
+    for message in requests:
+        node._process_request(message)
+    return len(requests) / (time.perf_counter() - start)
+
+def run_served(node: KVStoreNode, requests: list) -> float:
+    with socket.create_connection((node.host, node.port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        start = time.perf_counter()
+        for message in requests:
+            request(sock, message)
+        return len(requests) / (time.perf_counter() - start)
+
+def record_cost(iterations: int) -> float:
+    stats = Stats()
+    start = time.perf_counter()
+    for i in range(iterations):
+        stats.record('GET', i * 1e-7)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cost of leaving request statistics on")
+    parser.add_argument('--operations', type=int, default=200000)
+    parser.add_argument('--keyspace', type=int, default=10000)
+    parser.add_argument('--served-operations', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--port', type=int, default=7400)
+    args = parser.parse_args()
+
+    nodes = {
+        'off': KVStoreNode('bench_off', 'localhost', args.port, collect_stats=False),
+        'on': KVStoreNode('bench_on', 'localhost', args.port + 1, collect_stats=True),
+    }
+    for node in nodes.values():
+        threading.Thread(target=node.start_server, daemon=True).start()
+    time.sleep(0.5)
+
+    results = {}
+    for mode, runner, operations in (('in_process', run_in_process, args.operations),
+                                     ('served', run_served, args.served_operations)):
+        requests = workload(operations, args.keyspace)
+        # Best of several rounds, alternating, so drift does not favour either side.
+        throughput = {name: 0.0 for name in nodes}
+        for _ in range(args.rounds):
+            for name, node in nodes.items():
+                throughput[name] = max(throughput[name], runner(node, requests))
+        results[mode] = {
+            'ops_per_sec': {name: round(value) for name, value in throughput.items()},
+            'overhead_pct': round((throughput['off'] / throughput['on'] - 1) * 100, 2)
+        }
+
+    results['record_ns'] = round(record_cost(args.operations))
+    results['stats'] = nodes['on'].stats_report()['operations']
+    for node in nodes.values():
+        node.running = False
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
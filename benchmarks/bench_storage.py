@@ -0,0 +1,47 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from storage import STORAGE_ENGINES
+
+def bench(engine: str, keys: int, value_size: int) -> dict:
+    node = KVStoreNode(f"bench_{engine}", 'localhost', 0, storage_engine=engine)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for i in range(keys):
+        node.set(f"key:{i}", f"{i:0{value_size}d}", sync_replicas=False)
+    set_seconds = time.perf_counter() - start
+    measured = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for i in range(keys):
+        node.get(f"key:{i}")
+    get_seconds = time.perf_counter() - start
+
+    return {
+        'traced_bytes_per_key': round(measured / keys, 1),
+        'reported': node.data.memory_report(),
+        'set_ops_per_sec': round(keys / set_seconds, 1),
+        'get_ops_per_sec': round(keys / get_seconds, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory use and speed of node storage engines")
+    parser.add_argument('--keys', type=int, default=200000)
+    parser.add_argument('--value-size', type=int, default=16)
+    args = parser.parse_args()
+
+    results = {engine: bench(engine, args.keys, args.value_size) for engine in STORAGE_ENGINES}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client import KVClient
+from ycsb import Cluster
+
+def measure(action) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(elapsed, 4), 'peak_client_mb': round(peak / 2 ** 20, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one-shot and chunked transfers of large values")
+    parser.add_argument('--sizes-mb', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--chunk-kb', type=int, default=256)
+    parser.add_argument('--nodes', type=int, default=2)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    cluster = Cluster(args.nodes, replicas=False, verbose=args.verbose)
+    cluster.start()
+    client = KVClient('localhost', cluster.coordinator_port, timeout=60)
+    results = {}
+    sink = open(os.devnull, 'wb')
+    try:
+        for size_mb in args.sizes_mb:
+            payload = os.urandom(size_mb * 2 ** 20)
+            # The whole-value path has to carry bytes as one JSON string, so it gets the same encoding.
+            whole = {
+                'put': measure(lambda: client.set(f"whole:{size_mb}", base64.b64encode(payload).decode('ascii'))),
+                'get': measure(lambda: base64.b64decode(client.get(f"whole:{size_mb}")))
+            }
+            streamed = {
+                'put': measure(lambda: client.put_file(f"stream:{size_mb}", io.BytesIO(payload), chunk_size=args.chunk_kb * 1024)),
+                'get': measure(lambda: client.get_file(f"stream:{size_mb}", sink))
+            }
+            for transfer in (whole, streamed):
+                for phase in transfer.values():
+                    phase['mb_per_sec'] = round(size_mb / phase['seconds'], 2)
+            results[f"{size_mb}MB"] = {'whole': whole, 'streamed': streamed}
+    finally:
+        sink.close()
+        client.close()
+        cluster.stop()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from client import KVClient
+from protocol import request
+from stats import Stats, OperationStats
+
+# Operation mixes from the YCSB core workloads. E's SCAN reads a run of keys in key order.
+WORKLOADS = {
+    'A': {'read': 0.5, 'update': 0.5, 'distribution': 'zipfian'},
+    'B': {'read': 0.95, 'update': 0.05, 'distribution': 'zipfian'},
+    'C': {'read': 1.0, 'distribution': 'zipfian'},
+    'D': {'read': 0.95, 'insert': 0.05, 'distribution': 'latest'},
+    'E': {'scan': 0.95, 'insert': 0.05, 'distribution': 'zipfian'},
+    'F': {'read': 0.5, 'rmw': 0.5, 'distribution': 'zipfian'},
+}
+DISTRIBUTIONS = ('uniform', 'zipfian', 'latest')
+ZIPFIAN_THETA = 0.99
+FNV_OFFSET = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+
+def fnv64(value: int) -> int:
+    result = FNV_OFFSET
+    for _ in range(8):
+        result = ((result ^ (value & 0xFF)) * FNV_PRIME) & 0xFFFFFFFFFFFFFFFF
+        value >>= 8
+    return result
+
+class Zipfian:
+    def __init__(self, items: int, theta: float = ZIPFIAN_THETA):
+        self.theta = theta
+        self.alpha = 1.0 / (1.0 - theta)
+        self.zeta2 = 1 + 0.5 ** theta
+        self.items = 0
+        self.zetan = 0.0
+        self._grow(items)
+
+    def _grow(self, items: int):
+        # zeta(n) is extended incrementally, so a growing keyspace ('latest') stays cheap.
+        self.zetan += sum(1.0 / (i ** self.theta) for i in range(self.items + 1, items + 1))
+        self.items = items
+        self.eta = (1 - (2.0 / items) ** (1 - self.theta)) / (1 - self.zeta2 / self.zetan)
+
+    def next(self, rng: random.Random, items: int = None) -> int:
+        if items is not None and items > self.items:
+            self._grow(items)
+        u = rng.random()
+        uz = u * self.zetan
+        if uz < 1:
+            return 0
+        if uz < self.zeta2:
+            return 1
+        return min(int(self.items * (self.eta * u - self.eta + 1) ** self.alpha), self.items - 1)
+
+class KeyChooser:
+    def __init__(self, distribution: str, records: int):
+        self.distribution = distribution
+        self.zipfian = Zipfian(records) if distribution != 'uniform' else None
+
+    def next(self, rng: random.Random, records: int) -> int:
+        if self.distribution == 'uniform':
+            return rng.randrange(records)
+        if self.distribution == 'latest':
+            return records - 1 - self.zipfian.next(rng, records)
+        # Scrambled so the popular records are spread over the ring rather than adjacent ids.
+        return fnv64(self.zipfian.next(rng)) % records
+
+def record_key(record_id: int) -> str:
+    return f"user{record_id}"
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 10) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('localhost', port), timeout=1) as sock:
+                return request(sock, {'operation': 'HEALTH'}).get('status') == 'healthy'
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def serve(server, mode: str, verbose: bool):
+    if not verbose:
+        # Keeps stdout clean for the JSON report.
+        sys.stdout = open(os.devnull, 'w')
+    if mode == 'asyncio':
+        server.start_async_server()
+    else:
+        server.start_server()
+
+def run_coordinator(port: int, mode: str, verbose: bool):
+    serve(Coordinator('localhost', port), mode, verbose)
+
+def run_node(node_id: str, port: int, coordinator_port: int, replica: dict, mode: str, verbose: bool):
+    node = KVStoreNode(node_id, 'localhost', port, coordinator_host='localhost', coordinator_port=coordinator_port, ordered_index=True)
+    if replica:
+        # Wired once the replica answers, like start_cluster does after boot.
+        def wire():
+            if wait_for_port(replica['port'], timeout=30):
+                node.add_replica(replica)
+        threading.Thread(target=wire, daemon=True).start()
+    serve(node, mode, verbose)
+
+class Cluster:
+    def __init__(self, nodes: int, mode: str = 'threaded', replicas: bool = True, verbose: bool = False):
+        self.context = multiprocessing.get_context('spawn')
+        self.coordinator_port = free_port()
+        self.node_ports = [free_port() for _ in range(nodes)]
+        self.mode = mode
+        self.replicas = replicas
+        self.verbose = verbose
+        self.processes = []
+
+    def start(self):
+        self._spawn(run_coordinator, self.coordinator_port, self.mode, self.verbose)
+        if not wait_for_port(self.coordinator_port):
+            raise RuntimeError("Coordinator did not start")
+        for i, port in enumerate(self.node_ports):
+            next_port = self.node_ports[(i + 1) % len(self.node_ports)]
+            replica = {'node_id': f"bench_node_{(i + 1) % len(self.node_ports)}", 'host': 'localhost', 'port': next_port}
+            self._spawn(run_node, f"bench_node_{i}", port, self.coordinator_port,
+                        replica if self.replicas and len(self.node_ports) > 1 else None, self.mode, self.verbose)
+        for port in self.node_ports:
+            if not wait_for_port(port):
+                raise RuntimeError(f"Node on port {port} did not start")
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            with socket.create_connection(('localhost', self.coordinator_port)) as sock:
+                if request(sock, {'operation': 'HEALTH'}).get('node_count') == len(self.node_ports):
+                    return
+            time.sleep(0.05)
+        raise RuntimeError("Nodes did not register with the coordinator")
+
+    def _spawn(self, target, *args):
+        process = self.context.Process(target=target, args=args, daemon=True)
+        process.start()
+        self.processes.append(process)
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout=5)
+
+def load(config: dict):
+    client = KVClient('localhost', config['coordinator_port'], codec=config['codec'])
+    value = 'x' * config['value_size']
+    try:
+        for start in range(0, config['records'], 500):
+            batch = {record_key(i): value for i in range(start, min(start + 500, config['records']))}
+            if not all(client.mset(batch).values()):
+                raise RuntimeError(f"Load failed near record {start}")
+    finally:
+        client.close()
+
+def run_thread(config: dict, spec: dict, seed: int, inserted, start_at: float, stats: Stats):
+    rng = random.Random(seed)
+    chooser = KeyChooser(config['distribution'] or spec['distribution'], config['records'])
+    client = KVClient('localhost', config['coordinator_port'], codec=config['codec'], smart=config['smart'])
+    value = 'x' * config['value_size']
+    operations = [(name, spec[name]) for name in ('read', 'update', 'insert', 'scan', 'rmw') if spec.get(name)]
+    names = [name for name, _ in operations]
+    weights = [weight for _, weight in operations]
+
+    def insert() -> bool:
+        with inserted.get_lock():
+            record_id = inserted.value
+            inserted.value += 1
+        return client.set(record_key(record_id), value)
+
+    def scan() -> bool:
+        first = chooser.next(rng, inserted.value)
+        length = rng.randint(1, config['max_scan_length'])
+        return bool(client.scan_page(start=record_key(first), limit=length)['entries'])
+
+    def rmw() -> bool:
+        key = record_key(chooser.next(rng, inserted.value))
+        client.get(key)
+        return client.set(key, value)
+
+    handlers = {
+        'read': lambda: client.get(record_key(chooser.next(rng, inserted.value))) is not None,
+        'update': lambda: client.set(record_key(chooser.next(rng, inserted.value)), value),
+        'insert': insert,
+        'scan': scan,
+        'rmw': rmw,
+    }
+
+    time.sleep(max(0, start_at - time.time()))
+    deadline = start_at + config['duration']
+    try:
+        while time.time() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = handlers[name]()
+            except Exception:
+                ok = False
+            stats.record(name.upper(), time.perf_counter() - start, not ok)
+    finally:
+        client.close()
+
+def run_worker(config: dict, workload: str, worker_id: int, inserted, start_at: float, results):
+    stats = Stats()
+    spec = WORKLOADS[workload]
+    threads = [
+        threading.Thread(target=run_thread, args=(config, spec, worker_id * 1000 + i, inserted, start_at, stats))
+        for i in range(config['threads'])
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put({
+        name: {'count': op.count, 'errors': op.errors, 'counts': op.latency.counts, 'total': op.latency.total, 'max': op.latency.max}
+        for name, op in stats.operations.items()
+    })
+
+def merge(stats: Stats, payload: dict):
+    for name, data in payload.items():
+        operation = stats.operations.setdefault(name, OperationStats())
+        operation.count += data['count']
+        operation.errors += data['errors']
+        latency = operation.latency
+        latency.counts = [a + b for a, b in zip(latency.counts, data['counts'])]
+        latency.count += data['count']
+        latency.total += data['total']
+        latency.max = max(latency.max, data['max'])
+
+def run_workload(config: dict, workload: str, inserted) -> dict:
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    # Spawned workers take a moment to import; they all start at the same wall-clock instant.
+    start_at = time.time() + 2
+    workers = [
+        context.Process(target=run_worker, args=(config, workload, i, inserted, start_at, results))
+        for i in range(config['clients'])
+    ]
+    for worker in workers:
+        worker.start()
+    stats = Stats()
+    for _ in workers:
+        merge(stats, results.get())
+    for worker in workers:
+        worker.join()
+
+    operations = stats.snapshot()['operations']
+    for operation in operations.values():
+        del operation['ops_per_sec'], operation['bytes_in'], operation['bytes_out']
+    total = sum(operation['count'] for operation in operations.values())
+    return {
+        'ops_per_sec': round(total / config['duration'], 1),
+        'operations': operations
+    }
+
+def compare(results: dict, baseline: dict) -> dict:
+    change = lambda new, old: round((new / old - 1) * 100, 2) if old else None
+    deltas = {}
+    for workload, result in results['workloads'].items():
+        previous = baseline.get('workloads', {}).get(workload)
+        if not previous:
+            continue
+        deltas[workload] = {
+            'ops_per_sec_pct': change(result['ops_per_sec'], previous['ops_per_sec']),
+            'p99_pct': {
+                name: change(operation['latency_ms']['p99'], previous['operations'][name]['latency_ms']['p99'])
+                for name, operation in result['operations'].items() if name in previous['operations']
+            }
+        }
+    return deltas
+
+def main():
+    parser = argparse.ArgumentParser(description="YCSB-style workloads against a local multi-process cluster")
+    parser.add_argument('--workloads', nargs='+', default=list(WORKLOADS), choices=list(WORKLOADS))
+    parser.add_argument('--nodes', type=int, default=3)
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default=None, help="Override each workload's key distribution")
+    parser.add_argument('--clients', type=int, default=4, help="Client processes")
+    parser.add_argument('--threads', type=int, default=4, help="Threads per client process")
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--max-scan-length', type=int, default=100)
+    parser.add_argument('--codec', choices=('json', 'binary'), default='binary')
+    parser.add_argument('--smart', action='store_true', help="Route from the client straight to the owning node")
+    parser.add_argument('--server-mode', choices=('threaded', 'asyncio'), default='threaded')
+    parser.add_argument('--no-replicas', action='store_true')
+    parser.add_argument('--verbose', action='store_true', help="Let cluster processes log to stdout")
+    parser.add_argument('--output', help="Write the JSON report here as well as to stdout")
+    parser.add_argument('--baseline', help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    cluster = Cluster(args.nodes, args.server_mode, replicas=not args.no_replicas, verbose=args.verbose)
+    cluster.start()
+    config = {
+        'coordinator_port': cluster.coordinator_port,
+        'records': args.records,
+        'value_size': args.value_size,
+        'distribution': args.distribution,
+        'clients': args.clients,
+        'threads': args.threads,
+        'duration': args.duration,
+        'max_scan_length': args.max_scan_length,
+        'codec': args.codec,
+        'smart': args.smart,
+    }
+    try:
+        load(config)
+        inserted = multiprocessing.get_context('spawn').Value('q', args.records)
+        report = {
+            'config': dict({key: value for key, value in config.items() if key != 'coordinator_port'},
+                           nodes=args.nodes, server_mode=args.server_mode, replicas=not args.no_replicas),
+            'workloads': {workload: run_workload(config, workload, inserted) for workload in args.workloads}
+        }
+    finally:
+        cluster.stop()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['baseline'] = compare(report, json.load(f))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
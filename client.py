@@ -1,44 +1,430 @@
-import socket
-import json
+import io
+import shutil
+import threading
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
+from codec import load_value
+from connection_pool import PoolManager
+from consistent_hashing import ConsistentHash
+from pipeline import PipelinedConnection
+from streaming import CHUNK_SIZE, BlobWriter, chunk_keys, is_manifest, open_reader
+
+KEY_OPERATIONS = ('SET', 'GET', 'DELETE', 'CAS', 'INCR', 'DECR', 'APPEND')
+BATCH_OPERATIONS = ('MGET', 'MSET', 'MDELETE')
+
+class Topology:
+    def __init__(self, epoch: int, nodes: Dict[str, Dict], virtual_nodes: int, replication_factor: int = 0):
+        self.epoch = epoch
+        self.nodes = nodes
+        self.ring = ConsistentHash(sorted(nodes), virtual_nodes)
+        self.replication_factor = replication_factor
+
+    def owner(self, key: str) -> Optional[Dict]:
+        return self.nodes.get(self.ring.get_node(key))
+
+def _with_quorum(request: dict, **sizes: Optional[int]) -> dict:
+    request.update((name, size) for name, size in sizes.items() if size is not None)
+    return request
+
+def _chain(source: Future, target: Future):
+    def copy(done: Future):
+        try:
+            target.set_result(done.result())
+        except Exception as e:
+            target.set_exception(e)
+    source.add_done_callback(copy)
+
+class _Call(Future):
+    def __init__(self, transform: Callable[[dict], Any] = None):
+        super().__init__()
+        self.transform = transform
+
+    def complete(self, response: dict):
+        try:
+            self.set_result(self.transform(response) if self.transform else response)
+        except InvalidStateError:
+            # The caller already gave up on this request; its late response is dropped.
+            pass
 
 class KVClient:
-    def __init__(self, coordinator_host: str, coordinator_port: int):
+    def __init__(self, coordinator_host: str, coordinator_port: int, timeout: float = 10, codec: str = 'binary', smart: bool = False):
         self.coordinator_host = coordinator_host
         self.coordinator_port = coordinator_port
-    
+        self.timeout = timeout
+        self.codec = codec
+        self.smart = smart
+        self._conn = None
+        self._lock = threading.Lock()
+        self._topology: Optional[Topology] = None
+        self._topology_lock = threading.Lock()
+        self._pools = PoolManager(max_size=2, timeout=timeout, pipelined=True, codec=codec) if smart else None
+        self._retry_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='client-retry') if smart else None
+
+    def _connection(self) -> PipelinedConnection:
+        with self._lock:
+            if self._conn is None or self._conn.closed:
+                self._conn = PipelinedConnection(self.coordinator_host, self.coordinator_port, self.timeout, self.codec)
+            return self._conn
+
+    def _submit(self, request: dict, transform: Callable[[dict], Any] = None) -> _Call:
+        result = _Call(transform)
+
+        def complete(response_future: Future):
+            try:
+                response = response_future.result()
+            except Exception as e:
+                response = {'success': False, 'error': str(e)}
+            result.complete(response)
+
+        try:
+            self._dispatch(request).add_done_callback(complete)
+        except Exception as e:
+            failed = Future()
+            failed.set_exception(e)
+            complete(failed)
+        return result
+
+    def _wait(self, future: _Call) -> Any:
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            # Only this call gives up; other requests sharing the connection keep their own deadlines.
+            future.complete({'success': False, 'error': f"No response after {self.timeout}s"})
+            return future.result(0)
+
     def _send_request(self, request: dict) -> dict:
+        return self._wait(self._submit(request))
+
+    def _dispatch(self, request: dict) -> Future:
+        if self.smart and request['operation'] in KEY_OPERATIONS:
+            return self._dispatch_direct(request, self._topology_or_fetch())
+        if self.smart and request['operation'] in BATCH_OPERATIONS:
+            return self._dispatch_batch(request, self._topology_or_fetch())
+        return self._connection().submit(request)
+
+    def _topology_or_fetch(self) -> Optional[Topology]:
+        topology = self._topology
+        if topology is None:
+            try:
+                topology = self.refresh_topology()
+            except Exception as e:
+                print(f"Failed to fetch topology: {e}")
+        return topology
+
+    def refresh_topology(self, stale_epoch: int = None) -> Topology:
+        with self._topology_lock:
+            # Several requests can hit the same stale node at once; only the first refetches.
+            if self._topology is not None and (stale_epoch is None or self._topology.epoch > stale_epoch):
+                return self._topology
+            response = self._connection().request({'operation': 'TOPOLOGY'}, self.timeout)
+            if not response.get('success'):
+                raise Exception(response.get('error', 'Topology request failed'))
+            self._topology = Topology(response['epoch'], response['nodes'], response['virtual_nodes'], response.get('replication_factor', 0))
+            return self._topology
+
+    def _dispatch_direct(self, request: dict, topology: Optional[Topology], retry: bool = True) -> Future:
+        keys = self._request_keys(request)
+        # Quorum requests fan out from the coordinator, which knows every replica of the key.
+        quorum = topology is not None and (topology.replication_factor or 'n' in request) and request['operation'] in KEY_OPERATIONS
+        node_info = topology.owner(keys[0]) if topology is not None and keys and not quorum else None
+        if node_info is None:
+            return self._connection().submit(request)
+
+        result = Future()
+
+        def fallback(error: Any):
+            if retry:
+                # Either the node told us the ring moved on or it is unreachable: refetch and
+                # reroute once, then leave failover to the coordinator.
+                stale = error.get('epoch', topology.epoch) if isinstance(error, dict) else topology.epoch
+                self._retry_executor.submit(self._retry, request, stale, result)
+            else:
+                self._via_coordinator(request, result)
+
+        def done(future: Future):
+            try:
+                response = future.result()
+            except Exception as e:
+                fallback(e)
+                return
+            if response.get('stale_epoch'):
+                fallback(response)
+            else:
+                result.set_result(response)
+
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(10)
-                sock.connect((self.coordinator_host, self.coordinator_port))
-                sock.send(json.dumps(request).encode('utf-8'))
-                
-                response = sock.recv(1024).decode('utf-8')
-                return json.loads(response)
+            self._pools.submit(node_info, dict(request, epoch=topology.epoch)).add_done_callback(done)
         except Exception as e:
-            return {'success': False, 'error': str(e)}
-    
-    def set(self, key: str, value: any) -> bool:
-        response = self._send_request({
+            fallback(e)
+        return result
+
+    def _retry(self, request: dict, stale_epoch: int, result: Future):
+        try:
+            topology = self.refresh_topology(stale_epoch)
+            dispatch = self._dispatch_batch if request['operation'] in BATCH_OPERATIONS else self._dispatch_direct
+            _chain(dispatch(request, topology, retry=False), result)
+        except Exception:
+            self._via_coordinator(request, result)
+
+    def _via_coordinator(self, request: dict, result: Future):
+        try:
+            _chain(self._connection().submit(request), result)
+        except Exception as e:
+            result.set_exception(e)
+
+    def _request_keys(self, request: dict) -> List[str]:
+        if 'key' in request:
+            return [request['key']]
+        return list(request.get('items') or request.get('keys') or [])
+
+    def _dispatch_batch(self, request: dict, topology: Optional[Topology], retry: bool = True) -> Future:
+        if topology is None or topology.replication_factor or 'n' in request:
+            return self._connection().submit(request)
+
+        groups: Dict[str, List[str]] = {}
+        for key in dict.fromkeys(self._request_keys(request)):
+            node_info = topology.owner(key)
+            groups.setdefault(node_info['node_id'] if node_info else '', []).append(key)
+
+        parts = []
+        for keys in groups.values():
+            part = {k: v for k, v in request.items() if k not in ('items', 'keys')}
+            if request['operation'] == 'MSET':
+                part['items'] = {key: request['items'][key] for key in keys}
+            else:
+                part['keys'] = keys
+            parts.append(self._dispatch_direct(part, topology, retry))
+
+        result = Future()
+        remaining = [len(parts)]
+        lock = threading.Lock()
+
+        def merge(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            results = {}
+            for part in parts:
+                try:
+                    results.update(part.result().get('results', {}))
+                except Exception as e:
+                    print(f"Batch part failed: {e}")
+            result.set_result({
+                'success': not any('error' in item for item in results.values()),
+                'results': results
+            })
+
+        if not parts:
+            result.set_result({'success': True, 'results': {}})
+        for part in parts:
+            part.add_done_callback(merge)
+        return result
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        if self._pools is not None:
+            self._pools.close_all()
+
+    def set_async(self, key: str, value: Any, ttl: float = None, w: int = None, n: int = None) -> Future:
+        request = {
             'operation': 'SET',
             'key': key,
             'value': value
-        })
-        return response.get('success', False)
-    
-    def get(self, key: str) -> any:
-        response = self._send_request({
+        }
+        if ttl is not None:
+            request['ttl'] = ttl
+        return self._submit(_with_quorum(request, n=n, w=w), lambda response: response.get('success', False))
+
+    def get_async(self, key: str, max_staleness: int = None, r: int = None, n: int = None) -> Future:
+        request = {
             'operation': 'GET',
             'key': key
-        })
-        return response.get('value') if response.get('success') else None
-    
-    def delete(self, key: str) -> bool:
-        response = self._send_request({
+        }
+        if max_staleness is not None:
+            request['max_staleness'] = max_staleness
+        return self._submit(_with_quorum(request, n=n, r=r), lambda response: load_value(response.get('value')) if response.get('success') else None)
+
+    def get_versioned_async(self, key: str, r: int = None, n: int = None) -> Future:
+        return self._submit(_with_quorum({
+            'operation': 'GET',
+            'key': key
+        }, n=n, r=r), lambda response: (load_value(response.get('value')), response.get('version', 0)) if response.get('success') else (None, 0))
+
+    def cas_async(self, key: str, value: Any, expected_version: int, ttl: float = None,
+                  r: int = None, w: int = None, n: int = None) -> Future:
+        request = {
+            'operation': 'CAS',
+            'key': key,
+            'value': value,
+            'expected_version': expected_version
+        }
+        if ttl is not None:
+            request['ttl'] = ttl
+        return self._submit(_with_quorum(request, n=n, r=r, w=w), lambda response: response.get('success', False))
+
+    def incr_async(self, key: str, delta: int = 1, r: int = None, w: int = None, n: int = None) -> Future:
+        return self._submit(_with_quorum({
+            'operation': 'INCR',
+            'key': key,
+            'delta': delta
+        }, n=n, r=r, w=w), lambda response: load_value(response.get('value')) if response.get('success') else None)
+
+    def decr_async(self, key: str, delta: int = 1, r: int = None, w: int = None, n: int = None) -> Future:
+        return self._submit(_with_quorum({
+            'operation': 'DECR',
+            'key': key,
+            'delta': delta
+        }, n=n, r=r, w=w), lambda response: load_value(response.get('value')) if response.get('success') else None)
+
+    def append_async(self, key: str, value: Any, r: int = None, w: int = None, n: int = None) -> Future:
+        return self._submit(_with_quorum({
+            'operation': 'APPEND',
+            'key': key,
+            'value': value
+        }, n=n, r=r, w=w), lambda response: response.get('length') if response.get('success') else None)
+
+    def _blob_set_async(self, key: str, value: Any, ttl: float = None) -> Future:
+        # Chunk keys and manifests can only be written through the blob API.
+        request = {'operation': 'SET', 'key': key, 'value': value, 'blob': True}
+        if ttl is not None:
+            request['ttl'] = ttl
+        return self._submit(request, lambda response: response.get('success', False))
+
+    def delete_async(self, key: str, w: int = None, n: int = None) -> Future:
+        return self._submit(_with_quorum({
             'operation': 'DELETE',
             'key': key
+        }, n=n, w=w), lambda response: response.get('success', False))
+
+    def mset_async(self, items: Dict[str, Any], ttl: float = None, w: int = None, n: int = None) -> Future:
+        def transform(response: dict) -> Dict[str, bool]:
+            results = response.get('results', {})
+            return {key: results.get(key, {}).get('success', False) for key in items}
+
+        request = {
+            'operation': 'MSET',
+            'items': items
+        }
+        if ttl is not None:
+            request['ttl'] = ttl
+        return self._submit(_with_quorum(request, n=n, w=w), transform)
+
+    def mget_async(self, keys: List[str], r: int = None, n: int = None) -> Future:
+        def transform(response: dict) -> Dict[str, Any]:
+            results = response.get('results', {})
+            return {
+                key: results[key].get('value') if results.get(key, {}).get('success') else None
+                for key in keys
+            }
+
+        return self._submit(_with_quorum({
+            'operation': 'MGET',
+            'keys': keys
+        }, n=n, r=r), transform)
+
+    def mdelete_async(self, keys: List[str], w: int = None, n: int = None) -> Future:
+        def transform(response: dict) -> Dict[str, bool]:
+            results = response.get('results', {})
+            return {key: results.get(key, {}).get('success', False) for key in keys}
+
+        return self._submit(_with_quorum({
+            'operation': 'MDELETE',
+            'keys': keys
+        }, n=n, w=w), transform)
+
+    def set(self, key: str, value: any, ttl: float = None, w: int = None, n: int = None) -> bool:
+        return self._wait(self.set_async(key, value, ttl, w, n))
+
+    def get(self, key: str, max_staleness: int = None, r: int = None, n: int = None) -> any:
+        return self._wait(self.get_async(key, max_staleness, r, n))
+
+    def delete(self, key: str, w: int = None, n: int = None) -> bool:
+        return self._wait(self.delete_async(key, w, n))
+
+    def get_versioned(self, key: str, r: int = None, n: int = None) -> Tuple[Any, int]:
+        return self._wait(self.get_versioned_async(key, r, n))
+
+    def cas(self, key: str, value: Any, expected_version: int, ttl: float = None,
+            r: int = None, w: int = None, n: int = None) -> bool:
+        return self._wait(self.cas_async(key, value, expected_version, ttl, r, w, n))
+
+    def incr(self, key: str, delta: int = 1, r: int = None, w: int = None, n: int = None) -> Optional[int]:
+        return self._wait(self.incr_async(key, delta, r, w, n))
+
+    def decr(self, key: str, delta: int = 1, r: int = None, w: int = None, n: int = None) -> Optional[int]:
+        return self._wait(self.decr_async(key, delta, r, w, n))
+
+    def append(self, key: str, value: Any, r: int = None, w: int = None, n: int = None) -> Optional[int]:
+        return self._wait(self.append_async(key, value, r, w, n))
+
+    def mset(self, items: Dict[str, Any], ttl: float = None, w: int = None, n: int = None) -> Dict[str, bool]:
+        return self._wait(self.mset_async(items, ttl, w, n))
+
+    def mget(self, keys: List[str], r: int = None, n: int = None) -> Dict[str, Any]:
+        return self._wait(self.mget_async(keys, r, n))
+
+    def mdelete(self, keys: List[str], w: int = None, n: int = None) -> Dict[str, bool]:
+        return self._wait(self.mdelete_async(keys, w, n))
+
+    def scan_page(self, prefix: str = None, start: str = None, end: str = None, cursor: str = None, limit: int = 100) -> dict:
+        response = self._send_request({
+            'operation': 'SCAN',
+            'prefix': prefix,
+            'start': start,
+            'end': end,
+            'cursor': cursor,
+            'limit': limit
         })
-        return response.get('success', False)
-    
+        if not response.get('success'):
+            raise Exception(response.get('error', 'Scan failed'))
+        return response
+
+    def scan(self, prefix: str = None, start: str = None, end: str = None, page_size: int = 100) -> Iterator[Tuple[str, Any]]:
+        cursor = None
+        while True:
+            page = self.scan_page(prefix, start, end, cursor, page_size)
+            for entry in page.get('entries') or []:
+                yield entry['key'], load_value(entry.get('value'))
+            cursor = page.get('cursor')
+            if cursor is None:
+                return
+
+    def open_writer(self, key: str, ttl: float = None, chunk_size: int = CHUNK_SIZE) -> BlobWriter:
+        return BlobWriter(self, key, chunk_size, ttl=ttl)
+
+    def open_reader(self, key: str) -> Optional[io.BufferedReader]:
+        reader = open_reader(self, key)
+        return io.BufferedReader(reader, len(reader.buffer)) if reader is not None else None
+
+    def put_file(self, key: str, fileobj, ttl: float = None, chunk_size: int = CHUNK_SIZE) -> int:
+        with self.open_writer(key, ttl, chunk_size) as writer:
+            shutil.copyfileobj(fileobj, writer, chunk_size)
+        return writer.size
+
+    def get_file(self, key: str, fileobj) -> Optional[int]:
+        reader = open_reader(self, key)
+        if reader is None:
+            return None
+        with reader:
+            shutil.copyfileobj(reader, fileobj, len(reader.buffer))
+        return reader.size
+
+    def delete_blob(self, key: str) -> bool:
+        manifest = self.get(key)
+        if not self._send_request({'operation': 'DELETE', 'key': key, 'blob': True}).get('success', False):
+            return False
+        if is_manifest(manifest):
+            self.mdelete(chunk_keys(key, manifest))
+        return True
+
     def health(self) -> dict:
-        return self._send_request({'operation': 'HEALTH'})
\ No newline at end of file
+        return self._send_request({'operation': 'HEALTH'})
+
+    def stats(self, prometheus: bool = False) -> Any:
+        if prometheus:
+            return self._send_request({'operation': 'STATS', 'format': 'prometheus'}).get('text', '')
+        return self._send_request({'operation': 'STATS'})
@@ -0,0 +1,109 @@
+import json
+import struct
+from typing import Any
+
+CODECS = ('json', 'binary')
+BINARY_MAGIC = 0xB1
+BINARY_HEADER = struct.Struct('!BBBQHII')
+
+FLAG_REQUEST_ID = 0x01
+FLAG_KEY = 0x02
+FLAG_VALUE = 0x04
+FLAG_SUCCESS = 0x08
+FLAG_SUCCEEDED = 0x10
+
+OPERATIONS = ['', 'SET', 'GET', 'DELETE', 'MGET', 'MSET', 'MDELETE', 'REPLICATE', 'HEALTH', 'REGISTER', 'MEMORY', 'HELLO', 'TOPOLOGY', 'EPOCH']
+OPCODES = {operation: code for code, operation in enumerate(OPERATIONS)}
+OPCODE_OTHER = 255
+
+class RawValue(bytes):
+    pass
+
+def load_value(value: Any) -> Any:
+    if isinstance(value, RawValue):
+        return json.loads(value)
+    return value
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, RawValue):
+        return json.loads(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def encode_json(message: dict) -> bytes:
+    return json.dumps(message, default=_default).encode('utf-8')
+
+def encode_binary(message: dict) -> bytes:
+    extra = dict(message)
+    flags = 0
+    request_id = extra.pop('request_id', None)
+    if isinstance(request_id, int) and 0 <= request_id < 1 << 64:
+        flags |= FLAG_REQUEST_ID
+    elif request_id is not None:
+        extra['request_id'] = request_id
+        request_id = None
+
+    operation = extra.pop('operation', '')
+    opcode = OPCODES.get(operation, OPCODE_OTHER)
+    if opcode == OPCODE_OTHER:
+        extra['operation'] = operation
+
+    key_bytes = b''
+    key = extra.get('key')
+    if isinstance(key, str):
+        key_bytes = key.encode('utf-8')
+        if len(key_bytes) < 1 << 16:
+            del extra['key']
+            flags |= FLAG_KEY
+        else:
+            key_bytes = b''
+
+    value_bytes = b''
+    if 'value' in extra:
+        value = extra.pop('value')
+        value_bytes = value if isinstance(value, RawValue) else json.dumps(value, separators=(',', ':')).encode('utf-8')
+        flags |= FLAG_VALUE
+
+    if isinstance(extra.get('success'), bool):
+        flags |= FLAG_SUCCESS | (FLAG_SUCCEEDED if extra.pop('success') else 0)
+
+    extra_bytes = json.dumps(extra, separators=(',', ':'), default=_default).encode('utf-8') if extra else b''
+    header = BINARY_HEADER.pack(BINARY_MAGIC, opcode, flags, request_id or 0, len(key_bytes), len(value_bytes), len(extra_bytes))
+    return b''.join((header, key_bytes, value_bytes, extra_bytes))
+
+def decode_binary(payload) -> dict:
+    magic, opcode, flags, request_id, key_length, value_length, extra_length = BINARY_HEADER.unpack_from(payload, 0)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"Bad binary frame magic {magic:#x}")
+    view = memoryview(payload)
+    offset = BINARY_HEADER.size
+    key_bytes = view[offset:offset + key_length]
+    offset += key_length
+    value_bytes = view[offset:offset + value_length]
+    offset += value_length
+    message = json.loads(view[offset:offset + extra_length].tobytes()) if extra_length else {}
+
+    if opcode != OPCODE_OTHER and opcode < len(OPERATIONS) and OPERATIONS[opcode]:
+        message['operation'] = OPERATIONS[opcode]
+    elif opcode != OPCODE_OTHER and opcode:
+        raise ValueError(f"Unknown binary opcode {opcode}")
+    if flags & FLAG_REQUEST_ID:
+        message['request_id'] = request_id
+    if flags & FLAG_KEY:
+        message['key'] = str(key_bytes, 'utf-8')
+    if flags & FLAG_VALUE:
+        # Left encoded so a relaying hop can forward it without parsing; see load_value.
+        message['value'] = RawValue(value_bytes)
+    if flags & FLAG_SUCCESS:
+        message['success'] = bool(flags & FLAG_SUCCEEDED)
+    return message
+
+def payload_codec(payload) -> str:
+    return 'binary' if payload and payload[0] == BINARY_MAGIC else 'json'
+
+def encode_payload(message: dict, codec: str = 'json') -> bytes:
+    return encode_binary(message) if codec == 'binary' else encode_json(message)
+
+def decode_payload(payload) -> dict:
+    if payload_codec(payload) == 'binary':
+        return decode_binary(payload)
+    return json.loads(payload)
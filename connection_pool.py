@@ -0,0 +1,166 @@
+import threading
+import socket
+import time
+from typing import Any, Dict, List, Tuple
+from protocol import NoResponse, RequestNotSent, request
+from pipeline import PipelinePool
+
+class ConnectionPool:
+    def __init__(self, host: str, port: int, max_size: int = 8, timeout: float = 5, idle_timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle: List[Tuple[socket.socket, float]] = []
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def acquire(self) -> Tuple[socket.socket, bool]:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ConnectionError(f"Pool for {self.host}:{self.port} is closed")
+                now = time.monotonic()
+                while self._idle:
+                    sock, last_used = self._idle.pop()
+                    if now - last_used < self.idle_timeout:
+                        return sock, True
+                    self._discard(sock)
+                if self._open < self.max_size:
+                    self._open += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise TimeoutError(f"No free connection to {self.host}:{self.port} after {self.timeout}s")
+                self._cond.wait(remaining)
+        try:
+            return self._connect(), False
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, sock: socket.socket, broken: bool = False):
+        with self._cond:
+            if broken or self._closed:
+                self._discard(sock)
+            else:
+                self._idle.append((sock, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, sock: socket.socket):
+        self._open -= 1
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def request(self, message: dict) -> dict:
+        sock, reused = self.acquire()
+        try:
+            response = request(sock, message)
+        except (RequestNotSent, NoResponse):
+            self.release(sock, broken=True)
+            if not reused:
+                raise
+            # A pooled connection the peer closed while idle fails on send or reads EOF at once;
+            # anything else, a timeout above all, may have reached the server and is not retried.
+            sock, _ = self.acquire()
+            try:
+                response = request(sock, message)
+            except Exception:
+                self.release(sock, broken=True)
+                raise
+        except Exception:
+            self.release(sock, broken=True)
+            raise
+        self.release(sock)
+        return response
+
+    def reap_idle(self):
+        now = time.monotonic()
+        with self._cond:
+            fresh = []
+            for sock, last_used in self._idle:
+                if now - last_used >= self.idle_timeout:
+                    self._discard(sock)
+                else:
+                    fresh.append((sock, last_used))
+            self._idle = fresh
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for sock, _ in self._idle:
+                self._discard(sock)
+            self._idle = []
+            self._cond.notify_all()
+
+class PoolManager:
+    def __init__(self, max_size: int = 8, timeout: float = 5, idle_timeout: float = 30, reap_interval: float = 10, pipelined: bool = False,
+                 codec: str = 'json'):
+        self.max_size = max_size
+        self.pipelined = pipelined
+        self.codec = codec
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self.pools: Dict[Tuple[str, int], Any] = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def get_pool(self, node_info: dict):
+        address = (node_info['host'], node_info['port'])
+        pool = self.pools.get(address)
+        if pool is None:
+            with self._lock:
+                pool = self.pools.get(address)
+                if pool is None:
+                    if self.pipelined:
+                        pool = PipelinePool(address[0], address[1], self.max_size, self.timeout, self.idle_timeout, self.codec)
+                    else:
+                        pool = ConnectionPool(address[0], address[1], self.max_size, self.timeout, self.idle_timeout)
+                    self.pools[address] = pool
+                    self._start_reaper()
+        return pool
+
+    def request(self, node_info: dict, message: dict) -> dict:
+        return self.get_pool(node_info).request(message)
+    
+    def submit(self, node_info: dict, message: dict):
+        return self.get_pool(node_info).submit(message)
+
+    def remove(self, node_info: dict):
+        with self._lock:
+            pool = self.pools.pop((node_info['host'], node_info['port']), None)
+        if pool:
+            pool.close()
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self.pools.values())
+            self.pools = {}
+        for pool in pools:
+            pool.close()
+
+    def _start_reaper(self):
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_loop)
+            self._reaper.daemon = True
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(self.reap_interval)
+            for pool in list(self.pools.values()):
+                pool.reap_idle()
@@ -1,77 +1,190 @@
 import hashlib
-from typing import List, Dict
+import threading
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Optional, Tuple
+
+HASH_SPACE = 1 << 64
+
+def key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+class _RingState:
+    __slots__ = ('sorted_keys', 'owners', 'preferences')
+
+    def __init__(self, sorted_keys: List[int], owners: List[str]):
+        self.sorted_keys = sorted_keys
+        self.owners = owners
+        self.preferences: Optional[List[Tuple[str, ...]]] = None
 
 class ConsistentHash:
-    def __init__(self, nodes: List[str] = None, virtual_nodes: int = 150):
+    def __init__(self, nodes: List[str] = None, virtual_nodes: int = 150, preference_depth: int = 3):
         self.virtual_nodes = virtual_nodes
+        self.preference_depth = preference_depth
         self.ring: Dict[int, str] = {}
-        self.sorted_keys: List[int] = []
-        
+        self.nodes = set()
+        self._state = _RingState([], [])
+        self._lock = threading.Lock()
+
         if nodes:
             for node in nodes:
                 self.add_node(node)
-    
+
+    @property
+    def sorted_keys(self) -> List[int]:
+        return self._state.sorted_keys
+
+    @property
+    def state(self) -> _RingState:
+        return self._state
+
+    def copy(self) -> 'ConsistentHash':
+        with self._lock:
+            clone = ConsistentHash(virtual_nodes=self.virtual_nodes, preference_depth=self.preference_depth)
+            clone.ring = dict(self.ring)
+            clone.nodes = set(self.nodes)
+            clone._state = self._state
+        return clone
+
     def _hash(self, key: str) -> int:
-        return int(hashlib.md5(key.encode()).hexdigest(), 16)
-    
+        return key_hash(key)
+
+    def _vnode_hashes(self, node: str) -> List[int]:
+        return sorted(self._hash(f"{node}:{i}") for i in range(self.virtual_nodes))
+
     def add_node(self, node: str):
-        for i in range(self.virtual_nodes):
-            virtual_node = f"{node}:{i}"
-            hash_key = self._hash(virtual_node)
-            self.ring[hash_key] = node
-            self.sorted_keys.append(hash_key)
-        
-        self.sorted_keys.sort()
-    
+        with self._lock:
+            if node in self.nodes:
+                return
+            self.nodes.add(node)
+            old_keys, old_owners = self._state.sorted_keys, self._state.owners
+            sorted_keys: List[int] = []
+            owners: List[str] = []
+            previous = 0
+            for hash_key in self._vnode_hashes(node):
+                if hash_key in self.ring:
+                    continue
+                index = bisect_left(old_keys, hash_key, previous)
+                sorted_keys.extend(old_keys[previous:index])
+                owners.extend(old_owners[previous:index])
+                sorted_keys.append(hash_key)
+                owners.append(node)
+                self.ring[hash_key] = node
+                previous = index
+            sorted_keys.extend(old_keys[previous:])
+            owners.extend(old_owners[previous:])
+            self._state = _RingState(sorted_keys, owners)
+
     def remove_node(self, node: str):
-        for i in range(self.virtual_nodes):
-            virtual_node = f"{node}:{i}"
-            hash_key = self._hash(virtual_node)
-            if hash_key in self.ring:
+        with self._lock:
+            if node not in self.nodes:
+                return
+            self.nodes.discard(node)
+            old_keys, old_owners = self._state.sorted_keys, self._state.owners
+            sorted_keys: List[int] = []
+            owners: List[str] = []
+            previous = 0
+            for hash_key in self._vnode_hashes(node):
+                if self.ring.get(hash_key) != node:
+                    continue
+                index = bisect_left(old_keys, hash_key, previous)
+                sorted_keys.extend(old_keys[previous:index])
+                owners.extend(old_owners[previous:index])
                 del self.ring[hash_key]
-                self.sorted_keys.remove(hash_key)
-    
+                previous = index + 1
+            sorted_keys.extend(old_keys[previous:])
+            owners.extend(old_owners[previous:])
+            self._state = _RingState(sorted_keys, owners)
+
+    def _build_preferences(self, state: _RingState) -> List[Tuple[str, ...]]:
+        owners = state.owners
+        total = len(owners)
+        depth = min(self.preference_depth, len(set(owners)))
+        preferences = []
+        for start in range(total):
+            nodes = []
+            step = 0
+            while len(nodes) < depth:
+                node = owners[(start + step) % total]
+                if node not in nodes:
+                    nodes.append(node)
+                step += 1
+            preferences.append(tuple(nodes))
+        state.preferences = preferences
+        return preferences
+
     def get_node(self, key: str) -> str:
-        if not self.ring:
+        state = self._state
+        if not state.sorted_keys:
             return None
-        
-        hash_key = self._hash(key)
-        
-        for ring_key in self.sorted_keys:
-            if ring_key >= hash_key:
-                return self.ring[ring_key]
-        
-        return self.ring[self.sorted_keys[0]]
+
+        index = bisect_left(state.sorted_keys, self._hash(key))
+        return state.owners[index if index < len(state.owners) else 0]
 
     def get_nodes(self, key: str, count: int = 1) -> List[str]:
-        if not self.ring:
+        state = self._state
+        if not state.sorted_keys:
             return []
-        
-        hash_key = self._hash(key)
+
+        index = bisect_left(state.sorted_keys, self._hash(key))
+        if index == len(state.sorted_keys):
+            index = 0
+
+        if count <= self.preference_depth:
+            preferences = state.preferences or self._build_preferences(state)
+            return list(preferences[index][:count])
+
+        owners = state.owners
+        total = len(owners)
         nodes = []
-        start_index = 0
-        found = False
-        for i, ring_key in enumerate(self.sorted_keys):
-            if ring_key >= hash_key:
-                start_index = i
-                found = True
-                break
-        
-        if not found:
-            start_index = 0
-        seen_nodes = set()
-        total_keys = len(self.sorted_keys)
-        
-        for i in range(total_keys):
-            idx = (start_index + i) % total_keys
-            ring_key = self.sorted_keys[idx]
-            node = self.ring[ring_key]
-            
-            if node not in seen_nodes:
+        for step in range(total):
+            node = owners[(index + step) % total]
+            if node not in nodes:
                 nodes.append(node)
-                seen_nodes.add(node)
-                
-            if len(nodes) == count:
-                break
-                
-        return nodes
\ No newline at end of file
+                if len(nodes) == count:
+                    break
+        return nodes
+
+def _owner_at(state: _RingState, position: int) -> Optional[str]:
+    if not state.sorted_keys:
+        return None
+    index = bisect_left(state.sorted_keys, position)
+    return state.owners[index if index < len(state.owners) else 0]
+
+def moved_ranges(old: _RingState, new: _RingState) -> List[Tuple[int, int, str, str]]:
+    if not old.sorted_keys or not new.sorted_keys:
+        return []
+    # Ownership only changes just past a vnode of either ring, so comparing owners at those
+    # boundaries finds every [start, end) hash range that changed hands.
+    boundaries = sorted({0} | {k + 1 for k in old.sorted_keys if k + 1 < HASH_SPACE} | {k + 1 for k in new.sorted_keys if k + 1 < HASH_SPACE})
+    moves: List[Tuple[int, int, str, str]] = []
+    for i, start in enumerate(boundaries):
+        end = boundaries[i + 1] if i + 1 < len(boundaries) else HASH_SPACE
+        source, target = _owner_at(old, start), _owner_at(new, start)
+        if source == target:
+            continue
+        if moves and moves[-1][1] == start and moves[-1][2:] == (source, target):
+            moves[-1] = (moves[-1][0], end, source, target)
+        else:
+            moves.append((start, end, source, target))
+    return moves
+
+class HashRanges:
+    def __init__(self, ranges: List[Tuple[int, int]]):
+        merged: List[List[int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    def __contains__(self, position: int) -> bool:
+        index = bisect_right(self.starts, position) - 1
+        return index >= 0 and position < self.ends[index]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def contains_key(self, key: str) -> bool:
+        return key_hash(key) in self
@@ -1,40 +1,218 @@
+import heapq
 import threading
 import socket
-import json
-from typing import List, Dict, Any
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from operator import itemgetter
+from typing import List, Dict, Any, Iterator, Tuple
 from consistent_hashing import ConsistentHash
+from connection_pool import PoolManager
+from protocol import serve_connection
+from async_server import AsyncServer
+from read_balancer import ReadBalancer
+from rebalance import Rebalancer
+from failure_detector import FailureDetector
+from stats import Stats
+from read_cache import ReadCache
+
+ATOMIC_OPERATIONS = ('CAS', 'INCR', 'DECR', 'APPEND')
+WRITE_OPERATIONS = ('SET', 'DELETE') + ATOMIC_OPERATIONS
+QUORUM_FIELDS = ('n', 'r', 'w')
+BATCH_KEY_OPERATIONS = {'MGET': 'GET', 'MSET': 'SET', 'MDELETE': 'DELETE'}
+MAX_WRITTEN_VERSIONS = 100000
+MAX_RECENT_DELETES = 100000
+
+def _read_version(response: Dict) -> int:
+    # A miss from a replica that saw the delete still carries the delete's version.
+    return response.get('version', 0) if response.get('success') else response.get('tombstone', 0)
+
+def _remember(lru: OrderedDict, key: str, value: Any, limit: int):
+    lru[key] = value
+    lru.move_to_end(key)
+    if len(lru) > limit:
+        lru.popitem(last=False)
+
+def _versioned_copy(key: str, response: Dict) -> Dict:
+    # A copy may replace a stale manifest; the write that superseded it removed its chunks.
+    if not response.get('success'):
+        return {'operation': 'DELETE', 'key': key, 'version': _read_version(response), 'blob': True}
+    copy = {'operation': 'SET', 'key': key, 'value': response['value'], 'version': response['version'], 'blob': True}
+    if response.get('expires_at'):
+        copy['expires_at'] = response['expires_at']
+    return copy
 
 class Coordinator:
-    def __init__(self, host: str, port: int):
+    def __init__(self, host: str, port: int, pool_size: int = 4, pool_idle_timeout: float = 30, fanout_workers: int = 16, wire_codec: str = 'binary',
+                 read_policy: str = 'primary', max_staleness: int = None,
+                 rebalance: bool = True, rebalance_batch_size: int = 500, rebalance_rate: float = 20,
+                 failure_detection: bool = True, heartbeat_interval: float = 0.5, heartbeat_timeout: float = 1.0,
+                 phi_threshold: float = 8.0, breaker_failures: int = 3, breaker_reset: float = 1.0, collect_stats: bool = True,
+                 read_cache_bytes: int = 0, read_cache_policy: str = 'lru',
+                 replication_factor: int = 0, read_quorum: int = None, write_quorum: int = None):
         self.host = host
         self.port = port
         self.nodes: Dict[str, Dict] = {} 
         self.consistent_hash = ConsistentHash()
+        self.pools = PoolManager(max_size=pool_size, timeout=5, idle_timeout=pool_idle_timeout, pipelined=True, codec=wire_codec)
+        self.executor = ThreadPoolExecutor(max_workers=fanout_workers, thread_name_prefix='coordinator-fanout')
+        self.request_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix='coordinator-request')
+        self.epoch = 0
+        self._epoch_lock = threading.Lock()
+        self.read_balancer = ReadBalancer(read_policy)
+        self.max_staleness = max_staleness
+        self.written_versions: 'OrderedDict[str, float]' = OrderedDict()
+        self.recent_deletes: 'OrderedDict[str, None]' = OrderedDict()
+        self._written_lock = threading.Lock()
+        # Under quorum replication the source of a moved range is often still one of its
+        # replicas, so copied keys are left in place instead of deleted without a version.
+        self.rebalancer = Rebalancer(self._send_to_node, rebalance_batch_size, rebalance_rate, cleanup=not replication_factor) if rebalance else None
+        self._membership_lock = threading.Lock()
+        self.failure_detector = FailureDetector(
+            heartbeat_interval, heartbeat_timeout, phi_threshold, breaker_failures, breaker_reset,
+            on_change=self._on_node_state
+        ) if failure_detection else None
+        self.stats = Stats() if collect_stats else None
+        self.read_cache = ReadCache(read_cache_bytes, read_cache_policy) if read_cache_bytes else None
+        # With a replication factor every key lives on the first N nodes of its ring preference
+        # list; otherwise keys are written to their primary and nodes replicate on their own.
+        self.replication_factor = replication_factor
+        self.read_quorum = read_quorum
+        self.write_quorum = write_quorum
+        self.quorum_stats = {'read_repairs': 0, 'read_failures': 0, 'write_failures': 0}
+        self._last_version = 0
+        self._version_lock = threading.Lock()
         self.running = False
     
     def register_node(self, node_id: str, host: str, port: int):
-        self.nodes[node_id] = {
+        node_info = {
             'host': host,
             'port': port,
             'node_id': node_id
         }
-        self.consistent_hash.add_node(node_id)
+        with self._membership_lock:
+            changed = self.nodes.get(node_id) != node_info
+            planned = self.consistent_hash.copy()
+            planned.add_node(node_id)
+            jobs = self._plan_rebalance(self.consistent_hash.state, planned.state, dict(self.nodes, **{node_id: node_info})) if changed else []
+            self.nodes[node_id] = node_info
+            self.consistent_hash = planned
+            if self.failure_detector:
+                self.failure_detector.track(node_info)
+                self.failure_detector.start()
+            if changed:
+                self._bump_epoch()
+            self._start_rebalance(jobs)
     
     def unregister_node(self, node_id: str):
-        if node_id in self.nodes:
-            del self.nodes[node_id]
-            self.consistent_hash.remove_node(node_id)
+        with self._membership_lock:
+            if node_id in self.nodes:
+                planned = self.consistent_hash.copy()
+                planned.remove_node(node_id)
+                # The leaving node stays reachable as a migration source until its ranges are drained.
+                jobs = self._plan_rebalance(self.consistent_hash.state, planned.state, self.nodes)
+                node_info = self.nodes.pop(node_id)
+                self.consistent_hash = planned
+                self.read_balancer.forget(node_id)
+                if self.failure_detector:
+                    self.failure_detector.forget(node_id)
+                self._bump_epoch()
+                if not jobs:
+                    self.pools.remove(node_info)
+                self._start_rebalance(jobs)
+    
+    def _plan_rebalance(self, old_state, new_state, nodes: Dict[str, Dict]) -> list:
+        # Targets are told about incoming ranges before the new ring is published, and copying
+        # only starts once it is, so no request sees the new owner unprepared.
+        if self.rebalancer is None:
+            return []
+        return self.rebalancer.plan(old_state, new_state, nodes)
+    
+    def _start_rebalance(self, jobs: list):
+        if jobs:
+            self.rebalancer.start(jobs)
+    
+    def _on_node_state(self, node_info: Dict, up: bool):
+        if not up:
+            # Drop pooled connections so nothing queued on a hung socket waits out the timeout.
+            self.pools.remove(node_info)
+    
+    def _candidates(self, key: str) -> List[str]:
+        target_nodes = self.consistent_hash.get_nodes(key, count=2)
+        if self.failure_detector is None:
+            return target_nodes
+        return [node_id for node_id in target_nodes if self.failure_detector.available(node_id)]
+    
+    def _bump_epoch(self):
+        with self._epoch_lock:
+            self.epoch += 1
+            epoch = self.epoch
+        threading.Thread(target=self._announce_epoch, args=(epoch, list(self.nodes.values())), daemon=True).start()
+    
+    def _announce_epoch(self, epoch: int, nodes: List[Dict]):
+        # Nodes only need the number: they reject requests routed with an older one so smart clients refetch.
+        for node_info in nodes:
+            try:
+                self._send_to_node(node_info, {'operation': 'EPOCH', 'epoch': epoch})
+            except Exception as e:
+                print(f"Failed to announce epoch {epoch} to {node_info['node_id']}: {e}")
+    
+    def topology(self) -> Dict[str, Any]:
+        with self._epoch_lock:
+            return {
+                'success': True,
+                'epoch': self.epoch,
+                'virtual_nodes': self.consistent_hash.virtual_nodes,
+                'nodes': dict(self.nodes),
+                'suspected': self.failure_detector.suspected() if self.failure_detector else [],
+                'replication_factor': self.replication_factor
+            }
     
     def get_node_for_key(self, key: str) -> Dict[str, Any]:
         node_id = self.consistent_hash.get_node(key)
         return self.nodes.get(node_id)
     
-    def route_request(self, key: str, operation: str, value: Any = None) -> Dict[str, Any]:
-        target_nodes = self.consistent_hash.get_nodes(key, count=2)
+    def route_request(self, key: str, operation: str, value: Any = None, ttl: float = None, max_staleness: int = None, **fields) -> Dict[str, Any]:
+        if self.stats is None:
+            return self._route(key, operation, value, ttl, max_staleness, fields)
+        start = time.perf_counter()
+        response = self._route(key, operation, value, ttl, max_staleness, fields)
+        self.stats.record(operation, time.perf_counter() - start, 'error' in response)
+        return response
+    
+    def _route(self, key: str, operation: str, value: Any = None, ttl: float = None, max_staleness: int = None, fields: Dict = None) -> Dict[str, Any]:
+        fields = dict(fields or {})
+        n, r, w = (fields.pop(name, None) for name in QUORUM_FIELDS)
+        n = n or self.replication_factor
+        target_nodes = self._candidates(key) if not n else []
         
-        if not target_nodes:
+        if not n and not target_nodes:
             return {'success': False, 'error': 'No available nodes'}
         
+        message = {
+            'operation': operation,
+            'key': key,
+            'value': value
+        }
+        if ttl is not None:
+            message['ttl'] = ttl
+        if fields:
+            message.update(fields)
+        
+        if n:
+            return self._route_quorum(key, operation, message, n, r, w)
+        
+        if operation == 'GET':
+            max_staleness = self.max_staleness if max_staleness is None else max_staleness
+            if self.read_cache is not None:
+                return self._cached_read(key, target_nodes, message, max_staleness)
+            return self._route_read(key, target_nodes, message, max_staleness)
+        
+        if operation in ('INCR', 'DECR', 'APPEND'):
+            # A timed-out attempt may still have been applied, and applying it twice is not harmless.
+            target_nodes = target_nodes[:1]
+        owner = self.consistent_hash.get_node(key) if operation == 'SET' else None
         last_error = None
         
         for node_id in target_nodes:
@@ -43,11 +221,10 @@ class Coordinator:
                 continue
             
             try:
-                return self._send_to_node(node_info, {
-                    'operation': operation,
-                    'key': key,
-                    'value': value
-                })
+                # A failed-over write names the key's primary so anti-entropy can hand it back.
+                response = self._send_to_node(node_info, message if node_id == owner or owner is None else dict(message, owner=owner))
+                self._track_write(key, operation, response)
+                return response
             except Exception as e:
                 print(f"Node {node_id} failed: {e}, trying next node...")
                 last_error = e
@@ -55,24 +232,450 @@ class Coordinator:
             
         return {'success': False, 'error': f'All nodes failed. Last error: {str(last_error)}'}
     
+    def _next_version(self) -> int:
+        # Quorum writes are versioned here, so replicas that are written in parallel agree on
+        # the order; the clock only has to move forward.
+        with self._version_lock:
+            self._last_version = max(time.time_ns(), self._last_version + 1)
+            return self._last_version
+    
+    def _quorum_sizes(self, n: int, r: int = None, w: int = None) -> Tuple[int, int]:
+        return r or self.read_quorum or n // 2 + 1, w or self.write_quorum or n // 2 + 1
+    
+    def _replicas(self, key: str, n: int) -> List[str]:
+        preference = self.consistent_hash.get_nodes(key, count=n)
+        if self.failure_detector is not None:
+            preference = [node_id for node_id in preference if self.failure_detector.available(node_id)]
+        return preference
+    
+    def _route_quorum(self, key: str, operation: str, message: Dict, n: int, r: int = None, w: int = None) -> Dict[str, Any]:
+        r, w = self._quorum_sizes(n, r, w)
+        if not 1 <= r <= n or not 1 <= w <= n:
+            return {'success': False, 'error': f'Quorum sizes must be between 1 and N={n}, got R={r} W={w}'}
+        replicas = self._replicas(key, n)
+        needed = r if operation == 'GET' else max(r, w) if operation in ATOMIC_OPERATIONS else w
+        if len(replicas) < needed:
+            return {'success': False, 'error': f'Only {len(replicas)} of {needed} required replicas are available'}
+        
+        if operation == 'GET':
+            return self._quorum_read(key, self._fan_out(replicas, message), r)
+        if operation in ATOMIC_OPERATIONS:
+            response = self._quorum_update(key, replicas, message, r, w)
+        else:
+            message = dict(message, version=self._next_version())
+            response = self._quorum_write(message, self._fan_out(replicas, message), w)
+        self._track_write(key, operation, response)
+        return response
+    
+    def _fan_out(self, node_ids: List[str], message: Dict) -> Dict[Future, str]:
+        return {
+            self._submit_to_node(self.nodes[node_id], message): node_id
+            for node_id in node_ids if node_id in self.nodes
+        }
+    
+    def _gather(self, futures: Dict[Future, str], needed: int) -> Tuple[Dict[str, Dict], List[str]]:
+        answers: Dict[str, Dict] = {}
+        errors: List[str] = []
+        pending = set(futures)
+        deadline = time.monotonic() + self.pools.timeout
+        # Returns as soon as enough replicas answered; the rest keep going in the background.
+        while pending and len(answers) < needed:
+            done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                errors.append(f"No answer from {len(pending)} replicas after {self.pools.timeout}s")
+                break
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                if 'error' in response:
+                    errors.append(f"Node {futures[future]}: {response['error']}")
+                    continue
+                answers[futures[future]] = response
+        return answers, errors
+    
+    def _submit_to_node(self, node_info: Dict, message: Dict) -> Future:
+        # A pipelined request holds no thread while in flight, so a fan-out costs one send per
+        # replica instead of one blocked worker per replica.
+        try:
+            future = self.pools.submit(node_info, message)
+        except Exception:
+            return self.executor.submit(self._send_to_node, node_info, message)
+        if self.failure_detector is not None:
+            node_id = node_info['node_id']
+            
+            def record(done: Future):
+                if done.exception() is None:
+                    self.failure_detector.record_success(node_id, heartbeat=False)
+                else:
+                    self.failure_detector.record_failure(node_id)
+            
+            future.add_done_callback(record)
+        return future
+    
+    def _quorum_read(self, key: str, futures: Dict[Future, str], r: int) -> Dict[str, Any]:
+        answers, errors = self._gather(futures, r)
+        if len(answers) < r:
+            self.quorum_stats['read_failures'] += 1
+            return {'success': False, 'error': f'Read quorum not reached: {len(answers)} of {r} replicas answered. Last error: {errors[-1] if errors else None}'}
+        self._repair_when_done(key, futures)
+        latest = dict(max(answers.values(), key=_read_version))
+        latest.pop('tombstone', None)
+        return latest
+    
+    def _repair_when_done(self, key: str, futures: Dict[Future, str]):
+        # Replicas that answer after the quorum are compared too, so every stale copy is fixed,
+        # without holding a fan-out worker while the slowest one is awaited.
+        remaining = [len(futures)]
+        lock = threading.Lock()
+        
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            self.executor.submit(self._read_repair, key, futures)
+        
+        for future in futures:
+            future.add_done_callback(done)
+    
+    def _read_repair(self, key: str, futures: Dict[Future, str]):
+        answers = {}
+        for future, node_id in futures.items():
+            try:
+                response = future.result()
+            except Exception:
+                continue
+            if 'error' not in response:
+                answers[node_id] = response
+        if not answers:
+            return
+        latest = max(answers.values(), key=_read_version)
+        version = _read_version(latest)
+        stale = [node_id for node_id, response in answers.items() if _read_version(response) < version]
+        if not stale:
+            return
+        repair = _versioned_copy(key, latest)
+        for node_id in stale:
+            node_info = self.nodes.get(node_id)
+            if node_info is None:
+                continue
+            try:
+                self._send_to_node(node_info, repair)
+                self.quorum_stats['read_repairs'] += 1
+            except Exception as e:
+                print(f"Read repair of {key} on node {node_id} failed: {e}")
+    
+    def _quorum_write(self, message: Dict, futures: Dict[Future, str], w: int) -> Dict[str, Any]:
+        answers, errors = self._gather(futures, w)
+        if len(answers) < w:
+            # Replicas that did take the write keep it; reads and read repair converge on it.
+            self.quorum_stats['write_failures'] += 1
+            return {'success': False, 'error': f'Write quorum not reached: {len(answers)} of {w} replicas acknowledged. Last error: {errors[-1] if errors else None}'}
+        # A replica that already holds a newer write reports that version instead.
+        version = max(response.get('version', message['version']) for response in answers.values())
+        if message['operation'] == 'DELETE':
+            return {'success': any(response.get('success') for response in answers.values()), 'operation': 'DELETE', 'version': version}
+        return {'success': True, 'operation': message['operation'], 'version': version}
+    
+    def _quorum_update(self, key: str, replicas: List[str], message: Dict, r: int, w: int) -> Dict[str, Any]:
+        operation = message['operation']
+        # Read-modify-write has to run on one replica, and it must be one that holds the newest
+        # version, or a replica that missed writes would overwrite them with its own result.
+        answers, errors = self._gather(self._fan_out(replicas, {'operation': 'GET', 'key': key}), r)
+        if len(answers) < r:
+            self.quorum_stats['read_failures'] += 1
+            return {'success': False, 'error': f'Read quorum not reached: {len(answers)} of {r} replicas answered. Last error: {errors[-1] if errors else None}'}
+        newest = max(_read_version(response) for response in answers.values())
+        candidates = [node_id for node_id in replicas if node_id in answers and _read_version(answers[node_id]) == newest]
+        # Only CAS is safe to retry on the next one.
+        if operation != 'CAS':
+            candidates = candidates[:1]
+        message = dict(message, version=self._next_version())
+        response = None
+        last_error = None
+        for node_id in candidates:
+            try:
+                response = self._send_to_node(self.nodes[node_id], message)
+                break
+            except Exception as e:
+                print(f"Node {node_id} failed: {e}, trying next node...")
+                last_error = e
+        if response is None:
+            return {'success': False, 'error': f'All nodes failed. Last error: {str(last_error)}'}
+        if not response.get('success'):
+            return response
+        
+        # The other replicas get the result as a plain versioned write.
+        copy = _versioned_copy(key, response)
+        if operation not in ('INCR', 'DECR'):
+            response.pop('value', None)
+        response.pop('expires_at', None)
+        others = [other for other in replicas if other != node_id]
+        answers, errors = self._gather(self._fan_out(others, copy), w - 1)
+        if len(answers) < w - 1:
+            self.quorum_stats['write_failures'] += 1
+            return {'success': False, 'error': f'Write quorum not reached: {len(answers) + 1} of {w} replicas acknowledged. Last error: {errors[-1] if errors else None}'}
+        return response
+    
+    def _route_batch_quorum(self, operation: str, keys: List[str], items: Dict[str, Any] = None, ttl: float = None,
+                            n: int = None, r: int = None, w: int = None) -> Dict[str, Any]:
+        n = n or self.replication_factor
+        r, w = self._quorum_sizes(n, r, w)
+        if not 1 <= r <= n or not 1 <= w <= n:
+            return {'success': False, 'error': f'Quorum sizes must be between 1 and N={n}, got R={r} W={w}'}
+        single = BATCH_KEY_OPERATIONS[operation]
+        needed = r if single == 'GET' else w
+        results: Dict[str, Dict] = {}
+        pending: Dict[str, Tuple[Dict, Dict[Future, str]]] = {}
+        # Each key is its own versioned quorum operation; every fan-out is sent before any is awaited.
+        for key in dict.fromkeys(keys):
+            replicas = self._replicas(key, n)
+            if len(replicas) < needed:
+                results[key] = {'success': False, 'error': f'Only {len(replicas)} of {needed} required replicas are available'}
+                continue
+            message = {'operation': single, 'key': key}
+            if single == 'SET':
+                message['value'] = items[key]
+                if ttl is not None:
+                    message['ttl'] = ttl
+            if single != 'GET':
+                message['version'] = self._next_version()
+            pending[key] = (message, self._fan_out(replicas, message))
+        
+        for key, (message, futures) in pending.items():
+            if single == 'GET':
+                results[key] = self._quorum_read(key, futures, r)
+            else:
+                results[key] = self._quorum_write(message, futures, w)
+                self._track_write(key, single, results[key])
+        return {
+            'success': not any('error' in result for result in results.values()),
+            'results': results
+        }
+    
+    def _route_read(self, key: str, target_nodes: List[str], message: Dict, max_staleness: int = None) -> Dict[str, Any]:
+        primary = target_nodes[0]
+        fallback = None
+        last_error = None
+        
+        for node_id in self.read_balancer.order(target_nodes):
+            node_info = self.nodes.get(node_id)
+            if not node_info:
+                continue
+            
+            try:
+                response = self._send_to_node(node_info, message)
+            except Exception as e:
+                print(f"Node {node_id} failed: {e}, trying next node...")
+                last_error = e
+                continue
+            
+            if node_id == primary or self._fresh_enough(key, response, max_staleness):
+                return response
+            # A replica miss or an answer older than the bound is only used if the primary is down.
+            fallback = response
+        
+        if fallback is not None:
+            return fallback
+        return {'success': False, 'error': f'All nodes failed. Last error: {str(last_error)}'}
+    
+    def _cached_read(self, key: str, target_nodes: List[str], message: Dict, max_staleness: int = None) -> Dict[str, Any]:
+        cached = self.read_cache.get(key)
+        if cached is not None:
+            return {'success': True, 'value': cached[0], 'version': cached[1]}
+        # The serving node reports the next change to this key so the entry can be dropped.
+        response = self._route_read(key, target_nodes, dict(message, watch=True), max_staleness)
+        version = response.get('version', 0)
+        # A write or invalidation that overtook this read leaves a higher known version behind.
+        if response.get('success') and version >= self._known_version(key):
+            self.read_cache.put(key, response['value'], version)
+        return response
+    
+    def invalidate(self, changes: Dict[str, Any]):
+        for key, version in changes.items():
+            known = float('inf') if version is None else version
+            if known > self._known_version(key):
+                self._note_written(key, known)
+            if self.read_cache is not None:
+                self.read_cache.invalidate(key, version)
+    
+    def _fresh_enough(self, key: str, response: Dict, max_staleness: int = None) -> bool:
+        if not response.get('success'):
+            return False
+        if max_staleness is None:
+            return True
+        known = self._known_version(key)
+        return not known or response.get('version', 0) >= known - max_staleness
+    
+    def _known_version(self, key: str) -> float:
+        if key in self.recent_deletes:
+            return float('inf')
+        # A key evicted from the LRU is unknown again, like one never written through here.
+        return self.written_versions.get(key, 0)
+    
+    def _note_written(self, key: str, version: float):
+        # Deletes are kept apart, so a burst of writes cannot evict them from under a lagging replica.
+        with self._written_lock:
+            if version == float('inf'):
+                self.written_versions.pop(key, None)
+                _remember(self.recent_deletes, key, None, MAX_RECENT_DELETES)
+            else:
+                self.recent_deletes.pop(key, None)
+                _remember(self.written_versions, key, version, MAX_WRITTEN_VERSIONS)
+    
+    def _track_write(self, key: str, operation: str, response: Dict):
+        if self.read_cache is not None and operation in WRITE_OPERATIONS:
+            self.read_cache.invalidate(key)
+        if not response.get('success') or operation not in WRITE_OPERATIONS:
+            return
+        # After a delete no replica answer is trusted until the key is written again.
+        self._note_written(key, response.get('version', 0) if operation != 'DELETE' else float('inf'))
+    
+    def route_batch(self, operation: str, keys: List[str], items: Dict[str, Any] = None, ttl: float = None,
+                    n: int = None, r: int = None, w: int = None) -> Dict[str, Any]:
+        if self.stats is None:
+            return self._route_batch(operation, keys, items, ttl, n, r, w)
+        start = time.perf_counter()
+        response = self._route_batch(operation, keys, items, ttl, n, r, w)
+        self.stats.record(operation, time.perf_counter() - start, not response['success'])
+        return response
+    
+    def _invalidate_batch(self, operation: str, keys: List[str]):
+        if self.read_cache is not None and operation in ('MSET', 'MDELETE'):
+            for key in keys:
+                self.read_cache.invalidate(key)
+    
+    def _route_batch(self, operation: str, keys: List[str], items: Dict[str, Any] = None, ttl: float = None,
+                     n: int = None, r: int = None, w: int = None) -> Dict[str, Any]:
+        if n or self.replication_factor:
+            return self._route_batch_quorum(operation, keys, items, ttl, n, r, w)
+        results: Dict[str, Dict] = {}
+        pending: Dict[str, List[str]] = {}
+        fallbacks: Dict[str, List[str]] = {}
+        
+        for key in dict.fromkeys(keys):
+            target_nodes = self._candidates(key)
+            if not target_nodes:
+                results[key] = {'success': False, 'error': 'No available nodes'}
+                continue
+            pending.setdefault(target_nodes[0], []).append(key)
+            fallbacks[key] = target_nodes[1:]
+        
+        while pending:
+            futures = {
+                node_id: self.executor.submit(self._send_batch, node_id, operation, node_keys, items, ttl)
+                for node_id, node_keys in pending.items()
+            }
+            retry: Dict[str, List[str]] = {}
+            for node_id, future in futures.items():
+                try:
+                    node_results = future.result().get('results', {})
+                    for key in pending[node_id]:
+                        results[key] = node_results.get(key, {'success': False, 'error': 'Missing result'})
+                except Exception as e:
+                    print(f"Node {node_id} failed: {e}, trying next node...")
+                    for key in pending[node_id]:
+                        if fallbacks[key]:
+                            retry.setdefault(fallbacks[key].pop(0), []).append(key)
+                        else:
+                            results[key] = {'success': False, 'error': f'All nodes failed. Last error: {str(e)}'}
+            pending = retry
+        
+        self._invalidate_batch(operation, list(results))
+        return {
+            'success': not any('error' in result for result in results.values()),
+            'results': results
+        }
+    
+    def scan(self, prefix: str = None, start: str = None, end: str = None, cursor: str = None, page_size: int = 100) -> Iterator[Dict]:
+        message = {'operation': 'SCAN', 'prefix': prefix, 'start': start, 'end': end, 'limit': page_size}
+        first_pages = [
+            (node_info, self.executor.submit(self._send_to_node, node_info, dict(message, cursor=cursor)))
+            for node_info in list(self.nodes.values())
+        ]
+        streams = [self._scan_node(node_info, message, first_page) for node_info, first_page in first_pages]
+        # Each node returns its keys in order, so a k-way merge only ever holds one page per node.
+        # Replicas and ranges in flight can hold the same key twice; the highest version wins.
+        current = None
+        for entry in heapq.merge(*streams, key=itemgetter('key')):
+            if current is not None and current['key'] != entry['key']:
+                yield current
+                current = None
+            if current is None or entry.get('version', 0) > current.get('version', 0):
+                current = entry
+        if current is not None:
+            yield current
+    
+    def _scan_node(self, node_info: Dict, message: Dict, first_page: Future) -> Iterator[Dict]:
+        response = first_page.result()
+        while True:
+            if not response.get('success'):
+                raise Exception(f"Scan failed on node {node_info['node_id']}: {response.get('error')}")
+            yield from response.get('entries') or []
+            if response.get('cursor') is None:
+                return
+            response = self._send_to_node(node_info, dict(message, cursor=response['cursor']))
+    
+    def scan_page(self, prefix: str = None, start: str = None, end: str = None, cursor: str = None, limit: int = 100) -> Dict[str, Any]:
+        if self.stats is None:
+            return self._scan_page(prefix, start, end, cursor, limit)
+        begin = time.perf_counter()
+        response = self._scan_page(prefix, start, end, cursor, limit)
+        self.stats.record('SCAN', time.perf_counter() - begin, 'error' in response)
+        return response
+    
+    def _scan_page(self, prefix: str = None, start: str = None, end: str = None, cursor: str = None, limit: int = 100) -> Dict[str, Any]:
+        try:
+            # One entry past the page tells whether there is a next one.
+            entries = list(islice(self.scan(prefix, start, end, cursor, limit), limit + 1))
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        more = len(entries) > limit
+        entries = entries[:limit]
+        return {'success': True, 'entries': entries, 'cursor': entries[-1]['key'] if more else None}
+    
+    def _send_batch(self, node_id: str, operation: str, keys: List[str], items: Dict[str, Any] = None, ttl: float = None) -> Dict:
+        node_info = self.nodes.get(node_id)
+        if not node_info:
+            raise Exception(f"Unknown node {node_id}")
+        
+        message = {'operation': operation}
+        if operation == 'MSET':
+            message['items'] = {key: items[key] for key in keys}
+            if ttl is not None:
+                message['ttl'] = ttl
+            owners = {key: owner for key, owner in ((key, self.consistent_hash.get_node(key)) for key in keys) if owner != node_id}
+            if owners:
+                message['owners'] = owners
+        else:
+            message['keys'] = keys
+        return self._send_to_node(node_info, message)
+    
     def _send_to_node(self, node_info: Dict, message: Dict) -> Dict:
+        node_id = node_info['node_id']
+        self.read_balancer.start(node_id)
+        start = time.perf_counter()
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(5)
-                sock.connect((node_info['host'], node_info['port']))
-                sock.send(json.dumps(message).encode('utf-8'))
-                
-                response = sock.recv(1024 * 1024).decode('utf-8')
-                return json.loads(response)
+            response = self.pools.request(node_info, message)
         except Exception as e:
-            raise Exception(f"Failed to communicate with node {node_info['node_id']}: {e}")
+            if self.failure_detector:
+                self.failure_detector.record_failure(node_id)
+            raise Exception(f"Failed to communicate with node {node_id}: {e}")
+        finally:
+            self.read_balancer.finish(node_id, time.perf_counter() - start)
+        if self.failure_detector:
+            self.failure_detector.record_success(node_id, heartbeat=False)
+        return response
     
-    def start_server(self):
+    def start_server(self, backlog: int = 128):
         self.running = True
         server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         server_socket.bind((self.host, self.port))
-        server_socket.listen(10)
+        server_socket.listen(backlog)
         
         while self.running:
             try:
@@ -86,13 +689,19 @@ class Coordinator:
             except Exception as e:
                 print(f"Error accepting connection: {e}")
     
+    def start_async_server(self, port: int = None, backlog: int = 1024, max_concurrency: int = 256, executor_workers: int = 64):
+        self.running = True
+        server = AsyncServer(
+            self.host, port or self.port, self._process_client_request, lambda: self.running,
+            backlog=backlog, max_concurrency=max_concurrency,
+            executor_workers=executor_workers, name='coordinator', stats=self.stats
+        )
+        server.serve_forever()
+    
     def _handle_client(self, client_socket: socket.socket, addr: tuple):
         try:
-            data = client_socket.recv(1024).decode('utf-8')
-            if data:
-                request = json.loads(data)
-                response = self._process_client_request(request)
-                client_socket.send(json.dumps(response).encode('utf-8'))
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            serve_connection(client_socket, self._process_client_request, lambda: self.running, self.request_executor, stats=self.stats)
         except Exception as e:
             print(f"Error handling client {addr}: {e}")
         finally:
@@ -102,14 +711,58 @@ class Coordinator:
         operation = request.get('operation')
         key = request.get('key')
         
+        sizes = {name: request[name] for name in QUORUM_FIELDS if name in request}
+        quorum = dict(sizes)
+        if request.get('blob'):
+            # Lets the blob API write chunk keys and replace manifests on the nodes.
+            quorum['blob'] = True
         if operation in ['SET', 'GET', 'DELETE']:
-            return self.route_request(key, operation, request.get('value'))
+            return self.route_request(key, operation, request.get('value'), request.get('ttl'), request.get('max_staleness'), **quorum)
+        elif operation in ATOMIC_OPERATIONS:
+            fields = {name: request[name] for name in ('delta', 'expected_version') if name in request}
+            return self.route_request(key, operation, request.get('value'), request.get('ttl'), **fields, **quorum)
+        elif operation in ['MGET', 'MDELETE']:
+            return self.route_batch(operation, request.get('keys') or [], **sizes)
+        elif operation == 'MSET':
+            items = request.get('items') or {}
+            return self.route_batch(operation, list(items), items, request.get('ttl'), **sizes)
+        elif operation == 'SCAN':
+            return self.scan_page(request.get('prefix'), request.get('start'), request.get('end'),
+                                  request.get('cursor'), request.get('limit', 100))
+        elif operation == 'TOPOLOGY':
+            return self.topology()
+        elif operation == 'REBALANCE_STATUS':
+            if self.rebalancer is None:
+                return {'success': False, 'error': 'Rebalancing is disabled'}
+            return dict(self.rebalancer.status(), success=True)
+        elif operation == 'STATS':
+            if request.get('format') == 'prometheus':
+                text = self.stats.prometheus('kv_coordinator') if self.stats is not None else ''
+                return {'success': True, 'text': text}
+            return dict(self.stats.snapshot() if self.stats is not None else {'operations': {}}, success=True)
         elif operation == 'HEALTH':
             return {
                 'status': 'healthy',
                 'node_count': len(self.nodes),
-                'nodes': list(self.nodes.keys())
+                'nodes': list(self.nodes.keys()),
+                'read_policy': self.read_balancer.policy,
+                'node_load': self.read_balancer.status(),
+                'rebalance_pending': self.rebalancer.pending() if self.rebalancer else 0,
+                'node_state': self.failure_detector.status() if self.failure_detector else {},
+                'read_cache': self.read_cache.status() if self.read_cache is not None else None,
+                'quorum': dict(self.quorum_stats, n=self.replication_factor,
+                               r=self.read_quorum or self.replication_factor // 2 + 1,
+                               w=self.write_quorum or self.replication_factor // 2 + 1) if self.replication_factor else None
             }
+        elif operation == 'INVALIDATE':
+            self.invalidate(request.get('keys') or {})
+            return {'success': True}
+        elif operation == 'UNREGISTER':
+            node_id = request.get('node_id')
+            if node_id not in self.nodes:
+                return {'success': False, 'error': f'Unknown node {node_id}'}
+            self.unregister_node(node_id)
+            return {'success': True, 'message': f'Node {node_id} unregistered'}
         elif operation == 'REGISTER':
             node_id = request.get('node_id')
             host = request.get('host')
@@ -0,0 +1,149 @@
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+EVICTION_POLICIES = ('lru', 'lfu')
+LFU_INITIAL = 5
+LFU_LOG_FACTOR = 10
+ENTRY_OVERHEAD = 120
+
+def estimate_size(key: str, value: Any, depth: int = 2) -> int:
+    size = len(key) + ENTRY_OVERHEAD
+    if isinstance(value, (str, bytes, bytearray)):
+        return size + len(value)
+    size += sys.getsizeof(value)
+    if depth and isinstance(value, dict):
+        size += sum(estimate_size(str(k), v, depth - 1) for k, v in value.items())
+    elif depth and isinstance(value, (list, tuple)):
+        size += sum(estimate_size('', item, depth - 1) for item in value)
+    return size
+
+class SampledKeySet:
+    def __init__(self):
+        self._keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def add(self, key: str):
+        with self._lock:
+            if key not in self._positions:
+                self._positions[key] = len(self._keys)
+                self._keys.append(key)
+
+    def discard(self, key: str):
+        with self._lock:
+            position = self._positions.pop(key, None)
+            if position is None:
+                return
+            last = self._keys.pop()
+            if position < len(self._keys):
+                self._keys[position] = last
+                self._positions[last] = position
+
+    def sample(self, count: int) -> List[str]:
+        with self._lock:
+            if len(self._keys) <= count:
+                return list(self._keys)
+            return [self._keys[random.randrange(len(self._keys))] for _ in range(count)]
+
+class ExpiryIndex:
+    def __init__(self):
+        self.deadlines: Dict[str, float] = {}
+        self._keys = SampledKeySet()
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def set(self, key: str, expires_at: Optional[float]):
+        if expires_at:
+            self.deadlines[key] = expires_at
+            self._keys.add(key)
+        elif key in self.deadlines:
+            self.discard(key)
+
+    def get(self, key: str) -> Optional[float]:
+        return self.deadlines.get(key)
+
+    def discard(self, key: str):
+        self.deadlines.pop(key, None)
+        self._keys.discard(key)
+
+    def is_expired(self, key: str, now: float = None) -> bool:
+        deadline = self.deadlines.get(key)
+        return deadline is not None and deadline <= (now or time.time())
+
+    def sample_expired(self, count: int, now: float = None) -> List[str]:
+        now = now or time.time()
+        return [key for key in set(self._keys.sample(count)) if self.is_expired(key, now)]
+
+class EvictionPolicy:
+    def __init__(self, policy: str = 'lru', max_memory: int = 0, samples: int = 5):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.policy = policy
+        self.max_memory = max_memory
+        self.samples = samples
+        self.used_memory = 0
+        self.meta: Dict[str, list] = {}
+        self._keys = SampledKeySet()
+        self._lock = threading.Lock()
+
+    def record_write(self, key: str, value: Any):
+        size = estimate_size(key, value)
+        with self._lock:
+            meta = self.meta.get(key)
+            if meta is None:
+                self.meta[key] = [size, time.monotonic(), LFU_INITIAL]
+                self._keys.add(key)
+                self.used_memory += size
+            else:
+                self.used_memory += size - meta[0]
+                meta[0] = size
+                meta[1] = time.monotonic()
+
+    def record_access(self, key: str):
+        meta = self.meta.get(key)
+        if meta is None:
+            return
+        now = time.monotonic()
+        if self.policy == 'lfu':
+            counter = self._decayed(meta, now)
+            # Logarithmic counter: each increment gets less likely as the counter grows.
+            if counter < 255 and random.random() < 1.0 / ((counter - LFU_INITIAL) * LFU_LOG_FACTOR + 1 if counter > LFU_INITIAL else 1):
+                counter += 1
+            meta[2] = counter
+        meta[1] = now
+
+    def _decayed(self, meta: list, now: float) -> int:
+        minutes = int((now - meta[1]) // 60)
+        return max(0, meta[2] - minutes)
+
+    def forget(self, key: str):
+        with self._lock:
+            meta = self.meta.pop(key, None)
+            if meta is not None:
+                self.used_memory -= meta[0]
+                self._keys.discard(key)
+
+    def over_limit(self) -> bool:
+        return bool(self.max_memory) and self.used_memory > self.max_memory
+
+    def pick_victim(self) -> Optional[str]:
+        now = time.monotonic()
+        best_key, best_score = None, None
+        for key in self._keys.sample(self.samples):
+            meta = self.meta.get(key)
+            if meta is None:
+                continue
+            score = (self._decayed(meta, now), meta[1]) if self.policy == 'lfu' else meta[1]
+            if best_score is None or score < best_score:
+                best_key, best_score = key, score
+        return best_key
@@ -0,0 +1,190 @@
+import math
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from protocol import request
+
+class PhiAccrual:
+    def __init__(self, window: int = 100, min_interval: float = 0.05):
+        self.intervals = deque(maxlen=window)
+        self.min_interval = min_interval
+        self.last: Optional[float] = None
+
+    def heartbeat(self, now: float):
+        if self.last is not None:
+            self.intervals.append(now - self.last)
+        self.last = now
+
+    def phi(self, now: float) -> float:
+        if self.last is None or not self.intervals:
+            return 0.0
+        mean = max(sum(self.intervals) / len(self.intervals), self.min_interval)
+        # Arrivals are treated as exponential, so phi = -log10(P(silence lasts this long)).
+        return (now - self.last) / (mean * math.log(10))
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 1.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def allow(self, now: float) -> bool:
+        if self.state == 'closed':
+            return True
+        if self.state == 'open' and now - self.opened_at >= self.reset_timeout:
+            self.state = 'half-open'
+            self.probing = False
+        if self.state == 'half-open' and not self.probing:
+            # One live request goes through as a recovery probe; the rest keep failing fast.
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self, now: float):
+        self.failures += 1
+        if self.state == 'half-open' or self.failures >= self.failure_threshold:
+            self.state = 'open'
+            self.opened_at = now
+            self.probing = False
+
+class NodeMonitor:
+    def __init__(self, node_info: dict, failure_threshold: int, reset_timeout: float):
+        self.node_info = node_info
+        self.phi = PhiAccrual()
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.up = True
+
+def probe_health(node_info: dict, timeout: float):
+    # A fresh connection each time, so a node that stopped accepting is noticed even while
+    # pooled connections to it are still open.
+    with socket.create_connection((node_info['host'], node_info['port']), timeout=timeout) as sock:
+        response = request(sock, {'operation': 'HEALTH'})
+    if response.get('status') != 'healthy':
+        raise Exception(response.get('error', 'unhealthy'))
+
+class FailureDetector:
+    def __init__(self, interval: float = 0.5, timeout: float = 1.0, phi_threshold: float = 8.0,
+                 failure_threshold: int = 3, reset_timeout: float = 1.0,
+                 on_change: Callable[[dict, bool], None] = None, probe: Callable[[dict, float], None] = probe_health):
+        self.interval = interval
+        self.timeout = timeout
+        self.phi_threshold = phi_threshold
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.probe = probe
+        self.monitors: Dict[str, NodeMonitor] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='heartbeat')
+        self._thread = None
+        self.running = False
+
+    def track(self, node_info: dict):
+        with self._lock:
+            monitor = self.monitors.get(node_info['node_id'])
+            if monitor is None or monitor.node_info != node_info:
+                self.monitors[node_info['node_id']] = NodeMonitor(node_info, self.failure_threshold, self.reset_timeout)
+
+    def forget(self, node_id: str):
+        with self._lock:
+            self.monitors.pop(node_id, None)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.running = True
+            self._thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _heartbeat_loop(self):
+        while self.running:
+            started = time.monotonic()
+            self.check()
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def check(self):
+        with self._lock:
+            monitors = list(self.monitors.values())
+        futures = [(monitor, self._executor.submit(self.probe, monitor.node_info, self.timeout)) for monitor in monitors]
+        for monitor, future in futures:
+            try:
+                future.result()
+                self.record_success(monitor.node_info['node_id'])
+            except Exception:
+                self.record_failure(monitor.node_info['node_id'])
+
+    def record_success(self, node_id: str, heartbeat: bool = True):
+        with self._lock:
+            monitor = self.monitors.get(node_id)
+            if monitor is None:
+                return
+            # Only heartbeats feed the interval history; live traffic would shrink the mean.
+            if heartbeat:
+                monitor.phi.heartbeat(time.monotonic())
+            monitor.breaker.record_success()
+        self._update(monitor)
+
+    def record_failure(self, node_id: str):
+        with self._lock:
+            monitor = self.monitors.get(node_id)
+            if monitor is None:
+                return
+            monitor.breaker.record_failure(time.monotonic())
+        self._update(monitor)
+
+    def _suspected(self, monitor: NodeMonitor, now: float) -> bool:
+        return monitor.breaker.state == 'open' or monitor.phi.phi(now) >= self.phi_threshold
+
+    def _update(self, monitor: NodeMonitor):
+        with self._lock:
+            up = not self._suspected(monitor, time.monotonic())
+            changed = up != monitor.up
+            monitor.up = up
+        if changed:
+            print(f"Node {monitor.node_info['node_id']} {'recovered' if up else 'suspected down'}")
+            if self.on_change:
+                self.on_change(monitor.node_info, up)
+
+    def available(self, node_id: str) -> bool:
+        with self._lock:
+            monitor = self.monitors.get(node_id)
+            if monitor is None:
+                return True
+            now = time.monotonic()
+            if monitor.phi.phi(now) >= self.phi_threshold:
+                return False
+            return monitor.breaker.allow(now)
+
+    def suspected(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            return [node_id for node_id, monitor in self.monitors.items() if self._suspected(monitor, now)]
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                node_id: {
+                    'state': monitor.breaker.state,
+                    'phi': round(monitor.phi.phi(now), 3),
+                    'failures': monitor.breaker.failures
+                }
+                for node_id, monitor in self.monitors.items()
+            }
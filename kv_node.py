@@ -1,112 +1,1000 @@
 import threading
 import socket
 import json
+import os
 import time
-from typing import Dict, Any, Optional
-from RWlock import ReadWriteLock
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Any, Callable, Optional, List, Iterable, Iterator, Tuple, Set
+from RWlock import StripeLock, LockStripes
+from async_server import AsyncServer
+from connection_pool import PoolManager
+from protocol import serve_connection, request as send_request
+from replication import ReplicationLog
+from wal import WriteAheadLog
+from snapshot import SnapshotReader, write_snapshot
+from storage import create_store
+from expiry import ExpiryIndex, EvictionPolicy
+from codec import load_value
+from stats import Stats, LOCK_WAITS
+from read_cache import InvalidationNotifier
+from consistent_hashing import HashRanges
+from ordered_index import OrderedIndex
+from streaming import CHUNK_SEPARATOR, holds_manifest, is_chunk_key
+from merkle import MERKLE_DEPTH, MerkleTree, differing_buckets, plan_repair
+
+EXPIRY_SAMPLE_SIZE = 20
+EVICTION_BATCH = 16
+ROUTED_OPERATIONS = {'SET', 'GET', 'DELETE', 'MGET', 'MSET', 'MDELETE', 'CAS', 'INCR', 'DECR', 'APPEND'}
+ATOMIC_OPERATIONS = {'CAS', 'INCR', 'DECR', 'APPEND'}
+MAX_FORWARD_HOPS = 2
+RANGE_SCAN_IDLE = 300
+SCAN_PAGE_LIMIT = 1000
+REPAIR_BATCH = 500
+MAX_DELETED_VERSIONS = 100000
+
+def _check_key_names(keys: Iterable[str]):
+    for key in keys:
+        if is_chunk_key(key):
+            raise ValueError(f"Key {key!r} contains {CHUNK_SEPARATOR!r}, which is reserved for chunks of streamed values")
+
+def _incremented(key: str, value: Any, delta: int) -> int:
+    if value is None:
+        value = 0
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"Value of {key} is not an integer")
+    return value + delta
+
+def _appended(key: str, value: Any, addition: Any) -> Any:
+    if value is None:
+        return addition
+    if isinstance(value, str) and isinstance(addition, str):
+        return value + addition
+    if isinstance(value, list):
+        return value + [addition]
+    raise ValueError(f"Cannot append {type(addition).__name__} to the value of {key}")
 
 class KVStoreNode:
-    def __init__(self, node_id: str, host: str, port: int, coordinator_host: str = None, coordinator_port: int = None, replica_of: str = None):
+    def __init__(self, node_id: str, host: str, port: int, coordinator_host: str = None, coordinator_port: int = None, replica_of: str = None, lock_stripes: int = 1024,
+                 replication_mode: str = 'sync', replication_acks: int = 1, replication_timeout: float = 5, replication_batch_size: int = 512,
+                 data_dir: str = None, wal_fsync_interval: float = 0.005, wal_batch_size: int = 256, wal_compact_bytes: int = 64 * 1024 * 1024, wal_wait: bool = True,
+                 snapshot_promote_after: int = 2, storage_engine: str = 'dict',
+                 max_memory: int = 0, eviction_policy: str = 'lru', eviction_samples: int = 5, expiry_sweep_interval: float = 0.1,
+                 collect_stats: bool = True, ordered_index: bool = False, merkle_depth: int = MERKLE_DEPTH, anti_entropy_interval: float = 30):
         self.node_id = node_id
         self.host = host
         self.port = port
         self.coordinator_host = coordinator_host
         self.coordinator_port = coordinator_port
-        self.data: Dict[str, Any] = {}
-        self.locks: Dict[str, threading.Lock] = {}
+        self.data = create_store(storage_engine)
+        self.locks = LockStripes(lock_stripes)
         self.replica_of = replica_of
         self.replicas = []
+        self.pools = PoolManager(max_size=4, timeout=5)
+        self.replication = ReplicationLog(
+            node_id, self._send_to_node, self._snapshot_entries,
+            mode=replication_mode, acks=replication_acks,
+            timeout=replication_timeout, batch_size=replication_batch_size
+        )
+        self.applied_seqs: Dict[str, int] = {}
+        self._apply_lock = threading.Lock()
+        self.wal = None
+        self.wal_wait = wal_wait
+        self.snapshot: Optional[SnapshotReader] = None
+        self.snapshot_path = None
+        self.snapshot_promote_after = snapshot_promote_after
+        self.tombstones: Set[str] = set()
+        # Versions of quorum deletes, so a read can tell a delete from a write this replica missed.
+        self.deleted_versions: 'OrderedDict[str, int]' = OrderedDict()
+        self._snapshot_hits: Dict[str, int] = {}
+        self.expiry = ExpiryIndex()
+        self.eviction = EvictionPolicy(eviction_policy, max_memory, eviction_samples)
+        self.expiry_sweep_interval = expiry_sweep_interval
+        self.cache_stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+        self._sweeper = None
+        self._sweeper_lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self.epoch = 0
+        self.stats = Stats() if collect_stats else None
+        self.invalidations = InvalidationNotifier(self._send_invalidations)
+        self.index = OrderedIndex() if ordered_index else None
+        # One tree per origin: '' for writes made here, otherwise the primary they were replicated from.
+        self.merkle_depth = merkle_depth
+        self.trees: Dict[str, MerkleTree] = {}
+        self.key_origins: Dict[str, str] = {}
+        # Keys written here while their primary was down; anti-entropy hands them back to it.
+        self.failover_writes: Set[str] = set()
+        self._tree_lock = threading.Lock()
+        self.anti_entropy_interval = anti_entropy_interval
+        self.anti_entropy_status: Dict[str, dict] = {}
+        self._anti_entropy = None
+        self.incoming: Dict[str, Tuple[HashRanges, dict]] = {}
+        self.incoming_deletes: Set[str] = set()
+        self._range_scans: Dict[str, Tuple[Iterator[dict], float]] = {}
+        self._scan_lock = threading.Lock()
+        if data_dir:
+            self.snapshot_path = os.path.join(data_dir, f"{node_id}.snapshot")
+            self.wal = WriteAheadLog(
+                data_dir, node_id, self._write_checkpoint,
+                fsync_interval=wal_fsync_interval, batch_size=wal_batch_size, compact_bytes=wal_compact_bytes
+            )
+            self._recover()
+        self.request_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix=f"{node_id}-request")
         self.running = False
         
-    def get_lock(self, key: str) -> threading.Lock:
-        if key not in self.locks:
-            self.locks[key] = ReadWriteLock()
-        return self.locks[key]
+    def get_lock(self, key: str) -> StripeLock:
+        return self.locks.for_key(key)
+    
+    def _acquire_batch(self, keys: Iterable[str], write: bool) -> List[StripeLock]:
+        locks = self.locks.for_keys(keys)
+        for lock in locks:
+            if write:
+                lock.acquire_write()
+            else:
+                lock.acquire_read()
+        return locks
+    
+    def _release_batch(self, locks: List[StripeLock], write: bool):
+        for lock in reversed(locks):
+            if write:
+                lock.release_write()
+            else:
+                lock.release_read()
     
     def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry['value'] if entry is not None else None
+    
+    def get_entry(self, key: str, encoded: bool = False) -> Optional[dict]:
+        entry, cold = self.get_lock(key).read_optimistic(lambda: self._lookup(key, encoded=encoded))
+        self._count_access(key, entry)
+        if entry is not None and cold:
+            self._promote(key, entry)
+        return entry
+    
+    def _lookup(self, key: str, include_expired: bool = False, encoded: bool = False) -> Tuple[Optional[dict], bool]:
+        if not include_expired and self.expiry.is_expired(key):
+            return None, False
+        entry = self.data.get_encoded(key) if encoded else self.data.get(key)
+        snapshot = self.snapshot
+        if entry is not None or snapshot is None or key in self.tombstones:
+            return entry, False
+        entry = snapshot.get_encoded(key) if encoded else snapshot.get(key)
+        if entry is not None and not include_expired and entry.get('expires_at', float('inf')) <= time.time():
+            return None, False
+        return entry, True
+    
+    def _count_access(self, key: str, entry: Optional[dict]):
+        if entry is None:
+            self.cache_stats['misses'] += 1
+            if self.expiry.is_expired(key):
+                self._expire([key])
+            return
+        self.cache_stats['hits'] += 1
+        if self.eviction.max_memory:
+            self.eviction.record_access(key)
+    
+    def _promote(self, key: str, entry: dict):
+        if self.snapshot_promote_after > 1:
+            hits = self._snapshot_hits.get(key, 0) + 1
+            if hits < self.snapshot_promote_after:
+                if len(self._snapshot_hits) >= 100000:
+                    self._snapshot_hits.clear()
+                self._snapshot_hits[key] = hits
+                return
+            self._snapshot_hits.pop(key, None)
+        
         lock = self.get_lock(key)
-        lock.acquire_read()
+        lock.acquire_write()
         try:
-            if key in self.data:
-                return self.data[key]['value']
-            return None
+            if key not in self.data and key not in self.tombstones:
+                self._write_entry(key, load_value(entry['value']), entry['timestamp'], entry['version'], entry.get('expires_at'), origin=None)
         finally:
-            lock.release_read()
+            lock.release_write()
+        self._enforce_memory()
 
-    def set(self, key: str, value: Any, sync_replicas: bool = True) -> bool:
+    def set(self, key: str, value: Any, sync_replicas: bool = True, ttl: float = None) -> bool:
+        self.set_versioned(key, value, sync_replicas, ttl)
+        return True
+    
+    def set_versioned(self, key: str, value: Any, sync_replicas: bool = True, ttl: float = None, version: int = None, expires_at: float = None, owner: str = None,
+                      replace_blob: bool = True) -> int:
+        if expires_at is None:
+            expires_at = self._expires_at(ttl)
+        origin = self._failover_origin(owner)
         lock = self.get_lock(key)
         lock.acquire_write()
         try:
-            self.data[key] = {
-                'value': value,
-                'timestamp': time.time(),
-                'version': self.data.get(key, {}).get('version', 0) + 1
-            }
-            
-            if sync_replicas and not self.replica_of:
-                self._sync_to_replicas('SET', key, value)
-                
-            return True
+            if version is not None:
+                # A quorum write carries its version; one that arrives after a newer write is dropped.
+                newest = self._newest_version(key)
+                if newest >= version:
+                    return newest
+            if not replace_blob:
+                self._refuse_blob(key)
+            entry = self._write_entry(key, value, time.time(), version, expires_at, origin)
+            if origin:
+                self.failover_writes.add(key)
+            lsn, seq = self._record(self._set_record(key, value, entry, expires_at), sync_replicas)
         finally:
             lock.release_write()
+        
+        self._await_write(lsn, seq)
+        self._enforce_memory()
+        return entry['version']
+    
+    def _set_record(self, key: str, value: Any, entry: dict, expires_at: Optional[float]) -> dict:
+        record = {
+            'operation': 'SET',
+            'key': key,
+            'value': value,
+            'version': entry['version'],
+            'timestamp': entry['timestamp']
+        }
+        if expires_at:
+            record['expires_at'] = expires_at
+        return record
+    
+    def _holds_blob(self, key: str) -> bool:
+        current, _ = self._lookup(key, encoded=True)
+        return current is not None and holds_manifest(current['value'])
+    
+    def _refuse_blob(self, key: str):
+        # Only the blob API knows where a manifest's chunks are; anything else would leave them behind.
+        if self._holds_blob(key):
+            raise ValueError(f"Key {key} holds a streamed value; replace it with open_writer or remove it with delete_blob")
+    
+    def _failover_origin(self, owner: Optional[str]) -> str:
+        # A write the coordinator failed over from the key's primary is tracked in that primary's
+        # tree, so anti-entropy sees it as the replica's copy of the primary's key.
+        return owner if owner and owner != self.node_id and self.merkle_depth else ''
+    
+    def _newest_version(self, key: str) -> int:
+        current, _ = self._lookup(key, include_expired=True, encoded=True)
+        return max(current['version'] if current is not None else 0, self.deleted_versions.get(key, 0))
+    
+    def _version_at_least(self, current: Optional[dict], min_version: int) -> Optional[int]:
+        if not min_version:
+            return None
+        return max((current['version'] if current is not None else 0) + 1, min_version)
+    
+    def compare_and_set(self, key: str, value: Any, expected_version: int, sync_replicas: bool = True, ttl: float = None, min_version: int = 0,
+                        replace_blob: bool = True) -> Tuple[bool, int]:
+        expires_at = self._expires_at(ttl)
+        lock = self.get_lock(key)
+        lock.acquire_write()
+        try:
+            current, _ = self._lookup(key)
+            version = current['version'] if current is not None else 0
+            if version != expected_version:
+                return False, version
+            if not replace_blob:
+                self._refuse_blob(key)
+            entry = self._write_entry(key, value, time.time(), self._version_at_least(current, min_version), expires_at)
+            lsn, seq = self._record(self._set_record(key, value, entry, expires_at), sync_replicas)
+        finally:
+            lock.release_write()
+        
+        self._await_write(lsn, seq)
+        self._enforce_memory()
+        return True, entry['version']
+    
+    def incr(self, key: str, delta: int = 1, sync_replicas: bool = True, min_version: int = 0) -> Tuple[int, int]:
+        if isinstance(delta, bool) or not isinstance(delta, int):
+            raise ValueError(f"Increment must be an integer, got {delta!r}")
+        return self._update(key, 'INCR', lambda value: _incremented(key, value, delta), {'delta': delta}, sync_replicas, min_version)
+    
+    def append(self, key: str, addition: Any, sync_replicas: bool = True, min_version: int = 0) -> Tuple[Any, int]:
+        return self._update(key, 'APPEND', lambda value: _appended(key, value, addition), {'value': addition}, sync_replicas, min_version)
+    
+    def _update(self, key: str, operation: str, change: Callable[[Any], Any], delta: dict, sync_replicas: bool, min_version: int = 0) -> Tuple[Any, int]:
+        lock = self.get_lock(key)
+        lock.acquire_write()
+        try:
+            current, _ = self._lookup(key)
+            value = change(current['value'] if current is not None else None)
+            expires_at = (self.expiry.get(key) or current.get('expires_at')) if current is not None else None
+            entry = self._write_entry(key, value, time.time(), self._version_at_least(current, min_version), expires_at)
+            # Only the change is logged and replicated; the version says where in the history it belongs.
+            record = dict(delta, operation=operation, key=key, version=entry['version'], timestamp=entry['timestamp'])
+            if current is None:
+                record['reset'] = True
+            lsn, seq = self._record(record, sync_replicas)
+        finally:
+            lock.release_write()
+        
+        self._await_write(lsn, seq)
+        self._enforce_memory()
+        return value, entry['version']
+    
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        if ttl is None:
+            return None
+        if ttl <= 0:
+            raise ValueError(f"TTL must be positive, got {ttl}")
+        return time.time() + ttl
 
-    def delete(self, key: str, sync_replicas: bool = True) -> bool:
+    def delete(self, key: str, sync_replicas: bool = True, version: int = None, replace_blob: bool = True) -> bool:
         lock = self.get_lock(key)
         lock.acquire_write()
         try:
-            if key in self.data:
-                del self.data[key]
-                
-                if sync_replicas and not self.replica_of:
-                    self._sync_to_replicas('DELETE', key)
-                    
-                return True
-            return False
+            if not replace_blob:
+                self._refuse_blob(key)
+            expired = self.expiry.is_expired(key)
+            if version is None:
+                if not self._remove_entry(key):
+                    return False
+                lsn, seq = self._record({'operation': 'DELETE', 'key': key}, sync_replicas)
+            else:
+                if self._newest_version(key) >= version:
+                    return False
+                # The version is kept even if the key was never here, so a later read repair
+                # cannot bring back the value this delete removed elsewhere.
+                removed = self._remove_entry(key)
+                self._note_deletion(key, version)
+                lsn, seq = self._record({'operation': 'DELETE', 'key': key, 'version': version}, sync_replicas)
+                expired = expired or not removed
         finally:
             lock.release_write()
+        
+        self._await_write(lsn, seq)
+        return not expired
+    
+    def _note_deletion(self, key: str, version: int):
+        if key not in self.deleted_versions and len(self.deleted_versions) >= MAX_DELETED_VERSIONS:
+            self.deleted_versions.popitem(last=False)
+        self.deleted_versions[key] = max(version, self.deleted_versions.get(key, 0))
     
-    def _sync_to_replicas(self, operation: str, key: str, value: Any = None):
-        for replica in self.replicas:
+    def _write_entry(self, key: str, value: Any, timestamp: float, version: int = None, expires_at: float = None, origin: Optional[str] = ''):
+        current, _ = self._lookup(key, include_expired=True, encoded=True)
+        deleted = self.deleted_versions.pop(key, 0) if self.deleted_versions else 0
+        if version is None:
+            version = max((current or {}).get('version', 0), deleted) + 1
+        entry = self.data.put(key, value, timestamp, version)
+        if self.merkle_depth:
+            self._track_digest(key, current['version'] if current is not None else None, entry['version'], origin)
+        self.invalidations.changed(key, entry['version'])
+        self.tombstones.discard(key)
+        self.failover_writes.discard(key)
+        if self.index is not None:
+            self.index.add(key)
+        self.expiry.set(key, expires_at)
+        if expires_at:
+            self._start_sweeper()
+        if self.eviction.max_memory:
+            self.eviction.record_write(key, value)
+        return entry
+    
+    def _remove_entry(self, key: str) -> bool:
+        self.invalidations.changed(key, None)
+        self.failover_writes.discard(key)
+        self.expiry.discard(key)
+        self.eviction.forget(key)
+        removed = self.data.pop(key, None)
+        existed = removed is not None
+        if self.index is not None:
+            self.index.discard(key)
+        snapshot = self.snapshot
+        if not existed and snapshot is not None and key not in self.tombstones:
+            removed = snapshot.get_raw(key)
+            existed = removed is not None
+            if existed:
+                removed = {'version': removed[1]}
+        if self.merkle_depth:
+            self._track_digest(key, removed['version'] if removed is not None else None, None)
+        if self.wal:
+            # Checkpoints copy the data concurrently with writers, so a delete must shadow the
+            # key until the next checkpoint proves it is gone from the snapshot too.
+            self.tombstones.add(key)
+        return existed
+    
+    def _tree(self, origin: str) -> MerkleTree:
+        tree = self.trees.get(origin)
+        if tree is None:
+            with self._tree_lock:
+                tree = self.trees.setdefault(origin, MerkleTree(self.merkle_depth))
+        return tree
+    
+    def _track_digest(self, key: str, old_version: Optional[int], new_version: Optional[int], origin: Optional[str] = ''):
+        old_origin = self.key_origins.get(key, '') if self.key_origins else ''
+        if origin is None:
+            origin = old_origin
+        if new_version is None or origin == old_origin:
+            self._tree(old_origin).update(key, old_version, new_version)
+        else:
+            self._tree(old_origin).update(key, old_version, None)
+            self._tree(origin).update(key, None, new_version)
+        if new_version is not None and origin:
+            self.key_origins[key] = origin
+        elif old_origin:
+            del self.key_origins[key]
+    
+    def mget(self, keys: List[str], encoded: bool = False) -> Dict[str, Any]:
+        locks = self._acquire_batch(keys, write=False)
+        try:
+            found = {key: self._lookup(key, encoded=encoded) for key in keys}
+        finally:
+            self._release_batch(locks, write=False)
+        
+        values = {}
+        for key, (entry, cold) in found.items():
+            self._count_access(key, entry)
+            if entry is not None:
+                if cold:
+                    self._promote(key, entry)
+                values[key] = entry['value']
+        return values
+    
+    def mset(self, items: Dict[str, Any], sync_replicas: bool = True, ttl: float = None, owners: Dict[str, str] = None,
+             replace_blob: bool = True) -> Dict[str, bool]:
+        expires_at = self._expires_at(ttl)
+        owners = owners or {}
+        requested = list(items)
+        locks = self._acquire_batch(items, write=True)
+        try:
+            if not replace_blob:
+                items = {key: value for key, value in items.items() if not self._holds_blob(key)}
+            now = time.time()
+            versions = {}
+            for key, value in items.items():
+                origin = self._failover_origin(owners.get(key))
+                versions[key] = self._write_entry(key, value, now, expires_at=expires_at, origin=origin)['version']
+                if origin:
+                    self.failover_writes.add(key)
+            record = {'operation': 'MSET', 'items': items, 'versions': versions, 'timestamp': now}
+            if expires_at:
+                record['expires_at'] = expires_at
+            lsn, seq = self._record(record, sync_replicas)
+        finally:
+            self._release_batch(locks, write=True)
+        
+        self._await_write(lsn, seq)
+        self._enforce_memory()
+        return {key: key in items for key in requested}
+    
+    def mdelete(self, keys: List[str], sync_replicas: bool = True, replace_blob: bool = True) -> Dict[str, bool]:
+        lsn = seq = 0
+        locks = self._acquire_batch(keys, write=True)
+        try:
+            results = {}
+            deleted = []
+            for key in keys:
+                expired = self.expiry.is_expired(key)
+                if not replace_blob and self._holds_blob(key):
+                    results[key] = False
+                elif self._remove_entry(key):
+                    deleted.append(key)
+                    results[key] = not expired
+                else:
+                    results[key] = False
+            
+            if deleted:
+                lsn, seq = self._record({'operation': 'MDELETE', 'keys': deleted}, sync_replicas)
+        finally:
+            self._release_batch(locks, write=True)
+        
+        self._await_write(lsn, seq)
+        return results
+    
+    def _drop_keys(self, keys: List[str], reason: str, still_due) -> List[str]:
+        locks = self._acquire_batch(keys, write=True)
+        try:
+            dropped = [key for key in keys if still_due(key) and self._remove_entry(key)]
+            if dropped:
+                # One batched delete per sweep keeps replicas and the WAL in step without
+                # waiting on either; a lost record only means the key expires or is evicted again.
+                self._record({'operation': 'MDELETE', 'keys': dropped, 'reason': reason})
+        finally:
+            self._release_batch(locks, write=True)
+        return dropped
+    
+    def _expire(self, keys: List[str]) -> int:
+        dropped = self._drop_keys(keys, 'expire', self.expiry.is_expired)
+        self.cache_stats['expired'] += len(dropped)
+        return len(dropped)
+    
+    def sweep_expired(self, budget: float = 0.025) -> int:
+        deadline = time.monotonic() + budget
+        total = 0
+        while True:
+            expired = self.expiry.sample_expired(EXPIRY_SAMPLE_SIZE)
+            if expired:
+                total += self._expire(expired)
+            # Keep sampling only while a large share of the sample was stale.
+            if len(expired) <= EXPIRY_SAMPLE_SIZE // 4 or time.monotonic() >= deadline:
+                return total
+    
+    def _start_sweeper(self):
+        if self._sweeper is not None:
+            return
+        with self._sweeper_lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._expiry_loop, daemon=True)
+                self._sweeper.start()
+    
+    def _expiry_loop(self):
+        while True:
+            time.sleep(self.expiry_sweep_interval)
             try:
-                self._send_to_node(replica, {
-                    'operation': operation,
+                self.sweep_expired()
+            except Exception as e:
+                print(f"KV Node {self.node_id}: expiry sweep failed: {e}")
+    
+    def _enforce_memory(self):
+        if not self.eviction.over_limit() or not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            while self.eviction.over_limit():
+                victims = {self.eviction.pick_victim() for _ in range(EVICTION_BATCH)}
+                victims.discard(None)
+                if not victims:
+                    break
+                dropped = self._drop_keys(list(victims), 'evict', lambda key: key in self.eviction.meta)
+                self.cache_stats['evicted'] += len(dropped)
+        finally:
+            self._evict_lock.release()
+    
+    def cache_status(self) -> dict:
+        return dict(
+            self.cache_stats,
+            ttl_keys=len(self.expiry),
+            eviction_policy=self.eviction.policy,
+            used_memory=self.eviction.used_memory,
+            max_memory=self.eviction.max_memory
+        )
+    
+    def _record(self, entry: dict, sync_replicas: bool = True):
+        lsn = self.wal.append(entry) if self.wal else 0
+        seq = self._sync_to_replicas(entry) if sync_replicas and not self.replica_of else 0
+        return lsn, seq
+    
+    def _await_write(self, lsn: int, seq: int):
+        if lsn and self.wal_wait:
+            self.wal.wait_durable(lsn)
+        if seq:
+            if self.stats is None or not self.replication.streams:
+                self.replication.wait_for(seq)
+                return
+            start = time.perf_counter()
+            self.replication.wait_for(seq)
+            self.stats.record('replication_wait', time.perf_counter() - start)
+    
+    def _sync_to_replicas(self, entry: dict) -> int:
+        return self.replication.append(dict(entry))
+    
+    def _snapshot_entries(self):
+        for key, entry in list(self.data.items()):
+            if key in self.key_origins:
+                continue
+            record = {
+                'operation': 'SET',
+                'key': key,
+                'value': entry['value'],
+                'version': entry['version'],
+                'timestamp': entry['timestamp']
+            }
+            expires_at = self.expiry.get(key)
+            if expires_at:
+                record['expires_at'] = expires_at
+            yield record
+        snapshot = self.snapshot
+        if snapshot is not None:
+            now = time.time()
+            for key, raw_value, version, timestamp, expires_at in snapshot.iter_raw():
+                if key not in self.data and key not in self.tombstones and key not in self.key_origins and not 0 < expires_at <= now:
+                    record = {
+                        'operation': 'SET',
+                        'key': key,
+                        'value': json.loads(bytes(raw_value)),
+                        'version': version,
+                        'timestamp': timestamp
+                    }
+                    if expires_at:
+                        record['expires_at'] = expires_at
+                    yield record
+    
+    def write_snapshot(self):
+        if not self.wal:
+            raise ValueError(f"Node {self.node_id} has no data_dir")
+        self.wal.compact()
+    
+    def _write_checkpoint(self, segment: int):
+        previous = self.snapshot
+        
+        def entries():
+            now = time.time()
+            in_memory = set()
+            for key, raw_value, version, timestamp in self.data.raw_items():
+                in_memory.add(key)
+                expires_at = self.expiry.get(key) or 0.0
+                if not 0 < expires_at <= now:
+                    yield key, raw_value, version, timestamp, expires_at
+            if previous is not None:
+                tombstones = set(self.tombstones)
+                for key, raw_value, version, timestamp, expires_at in previous.iter_raw():
+                    if key not in in_memory and key not in tombstones and not 0 < expires_at <= now:
+                        yield key, raw_value, version, timestamp, expires_at
+        
+        write_snapshot(self.snapshot_path, entries(), segment)
+        self.snapshot = SnapshotReader(self.snapshot_path)
+        
+        for key in list(self.tombstones):
+            lock = self.get_lock(key)
+            lock.acquire_write()
+            try:
+                if key not in self.snapshot:
+                    self.tombstones.discard(key)
+            finally:
+                lock.release_write()
+    
+    def apply_replicated(self, source: str, entries: List[dict], upto: int = 0) -> int:
+        # Sources are per-incarnation log ids; data is attributed to the node across its restarts.
+        origin = (source or '').rsplit(':', 1)[0]
+        with self._apply_lock:
+            applied = self.applied_seqs.get(source, 0)
+            for entry in entries:
+                seq = entry.get('seq')
+                if seq is not None and seq <= applied:
+                    continue
+                self._apply_entry(entry, origin)
+                if seq is not None:
+                    applied = seq
+            applied = max(applied, upto)
+            self.applied_seqs[source] = applied
+        self._enforce_memory()
+        return applied
+    
+    def _entry_keys(self, entry: dict) -> List[str]:
+        if 'key' in entry:
+            return [entry['key']]
+        return list(entry.get('items') or entry.get('keys') or [])
+    
+    def _apply_entry(self, entry: dict, origin: str = ''):
+        locks = self._acquire_batch(self._entry_keys(entry), write=True)
+        try:
+            self._restore_entry(entry, origin)
+            lsn = self.wal.append(dict(entry, origin=origin) if origin else entry) if self.wal else 0
+        finally:
+            self._release_batch(locks, write=True)
+        self._await_write(lsn, 0)
+    
+    def _restore_entry(self, entry: dict, origin: str = ''):
+        operation = entry['operation']
+        timestamp = entry.get('timestamp', time.time())
+        if operation == 'SET':
+            self._write_entry(entry['key'], entry.get('value'), timestamp, entry.get('version'), entry.get('expires_at'), origin)
+        elif operation == 'DELETE':
+            self._remove_entry(entry['key'])
+            if entry.get('version'):
+                self._note_deletion(entry['key'], entry['version'])
+        elif operation == 'MSET':
+            versions = entry.get('versions', {})
+            for key, value in entry['items'].items():
+                self._write_entry(key, value, timestamp, versions.get(key), entry.get('expires_at'), origin)
+        elif operation == 'MDELETE':
+            for key in entry['keys']:
+                self._remove_entry(key)
+        elif operation in ('INCR', 'APPEND'):
+            self._apply_delta(entry, timestamp, origin)
+        else:
+            raise ValueError(f"Cannot apply operation: {operation}")
+    
+    def _apply_delta(self, entry: dict, timestamp: float, origin: str = ''):
+        key = entry['key']
+        current, _ = self._lookup(key, include_expired=True)
+        # A checkpoint taken while writes were running may already hold this version, and
+        # applying a delta twice would count it twice.
+        if current is not None and current['version'] >= entry['version']:
+            return
+        base = None if current is None or entry.get('reset') else current['value']
+        if entry['operation'] == 'INCR':
+            value = _incremented(key, base, entry['delta'])
+        else:
+            value = _appended(key, base, entry['value'])
+        expires_at = None if current is None or entry.get('reset') else self.expiry.get(key) or current.get('expires_at')
+        self._write_entry(key, value, timestamp, entry['version'], expires_at, origin)
+    
+    def _recover(self):
+        start = time.time()
+        start_segment = 0
+        if os.path.exists(self.snapshot_path):
+            self.snapshot = SnapshotReader(self.snapshot_path)
+            start_segment = self.snapshot.segment
+        if self.snapshot is not None and self.merkle_depth:
+            # Origins are not kept in the snapshot, so its keys count as local until a repair says otherwise.
+            tree = self._tree('')
+            for key, _, version, *_ in self.snapshot.iter_raw():
+                tree.update(key, None, version)
+        count = 0
+        for entry in self.wal.replay(start_segment):
+            self._restore_entry(entry, entry.get('origin', ''))
+            count += 1
+        if self.index is not None and self.snapshot is not None:
+            self.index.update(key for key, *_ in self.snapshot.iter_raw() if key not in self.tombstones)
+        if count or self.snapshot is not None:
+            snapshot_keys = len(self.snapshot) if self.snapshot is not None else 0
+            print(f"KV Node {self.node_id} mapped {snapshot_keys} snapshot keys and replayed {count} WAL records in {time.time() - start:.3f}s")
+    
+    def _bucket_versions(self, origin: str, buckets: Iterable[int]) -> Dict[str, int]:
+        wanted = set(buckets)
+        tree = self._tree(origin)
+        if origin:
+            keys = [key for key, source in list(self.key_origins.items()) if source == origin]
+        else:
+            # Listing a bucket means a pass over the keys, but only what differs goes over the wire.
+            keys = [key for key in list(self.data.keys()) if key not in self.key_origins]
+            snapshot = self.snapshot
+            if snapshot is not None:
+                keys.extend(key for key, *_ in snapshot.iter_raw()
+                            if key not in self.data and key not in self.tombstones and key not in self.key_origins)
+        versions = {}
+        for key in keys:
+            if tree.bucket(key) not in wanted:
+                continue
+            entry, _ = self.get_lock(key).read_optimistic(lambda: self._lookup(key, include_expired=True, encoded=True))
+            if entry is not None:
+                versions[key] = entry['version']
+        return versions
+    
+    def _repair_record(self, key: str) -> Optional[dict]:
+        entry, _ = self.get_lock(key).read_optimistic(lambda: self._lookup(key, include_expired=True))
+        if entry is None:
+            return None
+        record = {'key': key, 'value': entry['value'], 'version': entry['version'], 'timestamp': entry['timestamp']}
+        expires_at = self.expiry.get(key) or entry.get('expires_at')
+        if expires_at:
+            record['expires_at'] = expires_at
+        return record
+    
+    def repair(self, origin: str, entries: List[dict], deletes: Dict[str, int]) -> int:
+        applied = 0
+        lsn = 0
+        for record in entries:
+            key = record['key']
+            lock = self.get_lock(key)
+            lock.acquire_write()
+            try:
+                # The replication stream may have delivered something newer since the listing.
+                current, _ = self._lookup(key, include_expired=True, encoded=True)
+                if current is not None and current['version'] >= record['version']:
+                    continue
+                self._write_entry(key, record.get('value'), record.get('timestamp', time.time()), record['version'], record.get('expires_at'), origin)
+                if self.wal:
+                    lsn = self.wal.append(dict(record, operation='SET', origin=origin) if origin else dict(record, operation='SET'))
+                applied += 1
+            finally:
+                lock.release_write()
+        for key, version in deletes.items():
+            lock = self.get_lock(key)
+            lock.acquire_write()
+            try:
+                current, _ = self._lookup(key, include_expired=True, encoded=True)
+                if current is None or current['version'] != version or self.key_origins.get(key, '') != origin:
+                    continue
+                self._remove_entry(key)
+                if self.wal:
+                    lsn = self.wal.append({'operation': 'DELETE', 'key': key})
+                applied += 1
+            finally:
+                lock.release_write()
+        self._await_write(lsn, 0)
+        return applied
+    
+    def anti_entropy(self, replica: dict) -> dict:
+        tree = self._tree('')
+        
+        def ask(message: dict) -> dict:
+            response = self._send_to_node(replica, dict(message, source=self.node_id, depth=tree.depth))
+            if not response.get('success'):
+                raise Exception(f"Anti-entropy with {replica['node_id']} failed: {response.get('error')}")
+            return response
+        
+        buckets = differing_buckets(tree, lambda level, indices: ask({'operation': 'MERKLE', 'level': level, 'indices': indices})['digests'])
+        summary = {'buckets': len(buckets), 'pushed': 0, 'pulled': 0, 'deleted': 0, 'time': time.time()}
+        if buckets:
+            listing = ask({'operation': 'MERKLE_KEYS', 'buckets': buckets})
+            remote = listing['keys']
+            plan = plan_repair(self._bucket_versions('', buckets), remote, listing.get('failover', []))
+            pulled = []
+            for key in plan['pull']:
+                # Writes the coordinator failed over to the replica while we were unreachable.
+                response = self._send_to_node(replica, {'operation': 'GET', 'key': key, 'hops': MAX_FORWARD_HOPS})
+                if response.get('success'):
+                    record = {'key': key, 'value': load_value(response['value']), 'version': response['version']}
+                    if response.get('expires_at'):
+                        record['expires_at'] = response['expires_at']
+                    pulled.append(record)
+            summary['pulled'] = self.repair('', pulled, {})
+            records = [record for record in map(self._repair_record, plan['push']) if record is not None]
+            deletes = {key: remote[key] for key in plan['delete']}
+            for start in range(0, len(records), REPAIR_BATCH):
+                ask({'operation': 'REPAIR', 'entries': records[start:start + REPAIR_BATCH], 'deletes': {}})
+            if deletes:
+                ask({'operation': 'REPAIR', 'entries': [], 'deletes': deletes})
+            summary['pushed'] = len(records)
+            summary['deleted'] = len(deletes)
+        self.anti_entropy_status[replica['node_id']] = summary
+        return summary
+    
+    def _start_anti_entropy(self):
+        if self._anti_entropy is None and self.anti_entropy_interval and self.merkle_depth:
+            self._anti_entropy = threading.Thread(target=self._anti_entropy_loop, daemon=True)
+            self._anti_entropy.start()
+    
+    def _anti_entropy_loop(self):
+        while True:
+            time.sleep(self.anti_entropy_interval)
+            for replica in list(self.replicas):
+                try:
+                    self.anti_entropy(replica)
+                except Exception as e:
+                    print(f"KV Node {self.node_id}: anti-entropy with {replica.get('node_id')} failed: {e}")
+    
+    def iter_range(self, ranges: HashRanges) -> Iterator[dict]:
+        keys = list(self.data.keys())
+        snapshot = self.snapshot
+        if snapshot is not None:
+            in_memory = set(keys)
+            keys.extend(key for key, *_ in snapshot.iter_raw() if key not in in_memory)
+        for key in keys:
+            if not ranges.contains_key(key):
+                continue
+            entry, _ = self.get_lock(key).read_optimistic(lambda: self._lookup(key))
+            if entry is None:
+                continue
+            record = {'key': key, 'value': entry['value'], 'version': entry['version'], 'timestamp': entry['timestamp']}
+            expires_at = self.expiry.get(key) or entry.get('expires_at')
+            if expires_at:
+                record['expires_at'] = expires_at
+            yield record
+    
+    def scan(self, prefix: str = None, start: str = None, end: str = None, cursor: str = None, limit: int = 100) -> Tuple[List[dict], Optional[str]]:
+        if self.index is None:
+            raise ValueError(f"Node {self.node_id} has no ordered index")
+        limit = max(1, min(limit, SCAN_PAGE_LIMIT))
+        position = max(start or '', prefix or '')
+        inclusive = True
+        if cursor is not None and cursor >= position:
+            position, inclusive = cursor, False
+        
+        entries = []
+        while True:
+            keys = self.index.keys_from(position, limit - len(entries), inclusive)
+            if not keys:
+                return entries, None
+            for key in keys:
+                if (end is not None and key >= end) or (prefix and not key.startswith(prefix)):
+                    return entries, None
+                if is_chunk_key(key):
+                    continue
+                entry, _ = self.get_lock(key).read_optimistic(lambda: self._lookup(key))
+                if entry is not None:
+                    entries.append({'key': key, 'value': entry['value'], 'version': entry['version']})
+            position, inclusive = keys[-1], False
+            # A full page can't tell whether more keys follow, so the caller asks once more.
+            if len(entries) >= limit:
+                return entries, position
+    
+    def export_range(self, scan_id: str, ranges: List[Tuple[int, int]], limit: int) -> Tuple[List[dict], bool]:
+        now = time.monotonic()
+        with self._scan_lock:
+            for stale in [other for other, (_, used) in self._range_scans.items() if now - used > RANGE_SCAN_IDLE]:
+                del self._range_scans[stale]
+            scan = self._range_scans.get(scan_id)
+            iterator = scan[0] if scan else self.iter_range(HashRanges([tuple(r) for r in ranges]))
+            self._range_scans[scan_id] = (iterator, now)
+        
+        entries = list(islice(iterator, limit))
+        done = len(entries) < limit
+        if done:
+            with self._scan_lock:
+                self._range_scans.pop(scan_id, None)
+        return entries, done
+    
+    def import_entries(self, entries: List[dict]) -> int:
+        imported = 0
+        lsn = seq = 0
+        for record in entries:
+            key = record['key']
+            expires_at = record.get('expires_at')
+            if expires_at and expires_at <= time.time():
+                continue
+            lock = self.get_lock(key)
+            lock.acquire_write()
+            try:
+                # Writes and deletes that reached this node during the move are newer than the copy.
+                if key in self.incoming_deletes or self._lookup(key, include_expired=True, encoded=True)[0] is not None:
+                    continue
+                entry = self._write_entry(key, record.get('value'), record.get('timestamp', time.time()), record.get('version'), expires_at)
+                log = {
+                    'operation': 'SET',
                     'key': key,
-                    'value': value,
-                    'sync': True 
-                })
+                    'value': record.get('value'),
+                    'version': entry['version'],
+                    'timestamp': entry['timestamp']
+                }
+                if expires_at:
+                    log['expires_at'] = expires_at
+                lsn, seq = self._record(log)
+                imported += 1
+            finally:
+                lock.release_write()
+        
+        self._await_write(lsn, seq)
+        self._enforce_memory()
+        return imported
+    
+    def start_migration(self, migration_id: str, ranges: List[Tuple[int, int]], source: dict):
+        self.incoming = dict(self.incoming, **{migration_id: (HashRanges([tuple(r) for r in ranges]), source)})
+    
+    def end_migration(self, migration_id: str):
+        incoming = dict(self.incoming)
+        incoming.pop(migration_id, None)
+        self.incoming = incoming
+        if not incoming:
+            self.incoming_deletes.clear()
+    
+    def _migration_source(self, key: str) -> Optional[dict]:
+        for ranges, source in self.incoming.values():
+            if ranges.contains_key(key):
+                return source
+        return None
+    
+    def _forward(self, operation: str, keys: List[str], hops: int) -> Dict[str, dict]:
+        by_source: Dict[str, Tuple[dict, List[str]]] = {}
+        for key in keys:
+            source = self._migration_source(key)
+            if source is not None:
+                by_source.setdefault(source['node_id'], (source, []))[1].append(key)
+                if operation == 'MDELETE':
+                    self.incoming_deletes.add(key)
+        
+        results = {}
+        for source, source_keys in by_source.values():
+            try:
+                response = self._send_to_node(source, {'operation': operation, 'keys': source_keys, 'hops': hops + 1})
+                results.update(response.get('results', {}))
             except Exception as e:
-                print(f"Failed to sync to replica {replica}: {e}")
+                print(f"KV Node {self.node_id}: forwarding {operation} to {source['node_id']} failed: {e}")
+        return results
+    
+    def _adopt(self, key: str, hops: int):
+        source = self._migration_source(key)
+        if source is None or self._lookup(key, include_expired=True, encoded=True)[0] is not None:
+            return
+        # A read-modify-write needs the current value, which may not have been copied over yet.
+        response = self._send_to_node(source, {'operation': 'GET', 'key': key, 'hops': hops + 1}) or {}
+        if response.get('success'):
+            self.import_entries([{'key': key, 'value': load_value(response['value']), 'version': response.get('version'), 'timestamp': time.time()}])
     
     def _send_to_node(self, node_info: dict, message: dict):
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(5)
-                host = node_info.get('host')
-                port = node_info.get('port')
-                
-                sock.connect((host, port))
-                sock.send(json.dumps(message).encode('utf-8'))
-                
-                response = sock.recv(1024).decode('utf-8')
-                return json.loads(response)
+            return self.pools.request(node_info, message)
         except Exception as e:
             print(f"Failed to send to node {node_info.get('node_id')}: {e}")
             raise e
     
+    def _send_invalidations(self, message: dict):
+        self._send_to_node({'node_id': 'coordinator', 'host': self.coordinator_host, 'port': self.coordinator_port}, message)
+    
     def add_replica(self, replica_node: dict):
         self.replicas.append(replica_node)
+        self.replication.add_replica(replica_node)
+        self._start_anti_entropy()
     
-    def start_server(self):
+    def start_server(self, backlog: int = 128):
         self.running = True
         server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         server_socket.bind((self.host, self.port))
-        server_socket.listen(10)
+        server_socket.listen(backlog)
         
         print(f"KV Node {self.node_id} listening on {self.host}:{self.port}")
         
         if self.coordinator_host and self.coordinator_port:
-            self._register_with_coordinator()
+            # In the background, because the coordinator calls back (MIGRATION_START) while registering us.
+            threading.Thread(target=self._register_with_coordinator, daemon=True).start()
         
         while self.running:
             try:
@@ -120,54 +1008,231 @@ class KVStoreNode:
             except Exception as e:
                 print(f"Error accepting connection: {e}")
     
+    def start_async_server(self, port: int = None, backlog: int = 1024, max_concurrency: int = 256, executor_workers: int = 32, register: bool = True):
+        self.running = True
+        server = AsyncServer(
+            self.host, port or self.port, self._process_request, lambda: self.running,
+            backlog=backlog, max_concurrency=max_concurrency,
+            executor_workers=executor_workers, name=self.node_id, stats=self.stats
+        )
+        
+        print(f"KV Node {self.node_id} listening (asyncio) on {self.host}:{server.port}")
+        
+        if register and self.coordinator_host and self.coordinator_port:
+            threading.Thread(target=self._register_with_coordinator, daemon=True).start()
+        
+        server.serve_forever()
+    
     def _register_with_coordinator(self):
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.connect((self.coordinator_host, self.coordinator_port))
+            with socket.create_connection((self.coordinator_host, self.coordinator_port), timeout=5) as sock:
                 message = {
                     'operation': 'REGISTER',
                     'node_id': self.node_id,
                     'host': self.host,
                     'port': self.port
                 }
-                sock.send(json.dumps(message).encode('utf-8'))
-                response = sock.recv(1024).decode('utf-8')
+                response = send_request(sock, message)
                 print(f"KV Node {self.node_id} Registration response: {response}")
         except Exception as e:
             print(f"Failed to register with coordinator: {e}")
 
     def _handle_client(self, client_socket: socket.socket, addr: tuple):
         try:
-            data = client_socket.recv(1024).decode('utf-8')
-            if data:
-                request = json.loads(data)
-                response = self._process_request(request)
-                client_socket.send(json.dumps(response).encode('utf-8'))
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            serve_connection(client_socket, self._process_request, lambda: self.running, self.request_executor, stats=self.stats)
         except Exception as e:
             print(f"Error handling client {addr}: {e}")
         finally:
             client_socket.close()
     
     def _process_request(self, request: dict) -> dict:
+        if self.stats is None:
+            return self._execute_request(request)
+        start = time.perf_counter()
+        response = self._execute_request(request)
+        self.stats.record(request.get('operation'), time.perf_counter() - start, 'error' in response)
+        return response
+    
+    def stats_report(self) -> dict:
+        report = self.stats.snapshot() if self.stats is not None else {'operations': {}}
+        report['locks'] = LOCK_WAITS.snapshot()['operations']
+        return report
+    
+    def stats_text(self) -> str:
+        text = self.stats.prometheus('kv_node', {'node': self.node_id}) if self.stats is not None else ''
+        return text + LOCK_WAITS.prometheus('kv_lock_wait', {'node': self.node_id})
+    
+    def _execute_request(self, request: dict) -> dict:
         operation = request.get('operation')
         key = request.get('key')
-        value = request.get('value')
         
         try:
+            epoch = request.get('epoch')
+            if epoch is not None and epoch < self.epoch and operation in ROUTED_OPERATIONS:
+                return {'success': False, 'error': 'Stale topology epoch', 'stale_epoch': True, 'epoch': self.epoch}
+            
+            value = load_value(request.get('value'))
+            hops = request.get('hops', 0)
+            # While ranges are moving in, misses and deletes are also sent to the node they come from.
+            forwarding = bool(self.incoming) and not request.get('sync') and hops < MAX_FORWARD_HOPS
+            # Chunk keys and manifests are only written by the blob API and by nodes among themselves.
+            blob = bool(request.get('blob') or request.get('sync') or hops)
+            if not blob and operation in ('SET', 'CAS', 'INCR', 'DECR', 'APPEND'):
+                _check_key_names([key])
             if operation == 'SET':
-                success = self.set(key, value, sync_replicas=not request.get('sync', False))
-                return {'success': success, 'operation': 'SET'}
+                version = self.set_versioned(key, value, sync_replicas=not request.get('sync', False), ttl=request.get('ttl'),
+                                             version=request.get('version'), expires_at=request.get('expires_at'), owner=request.get('owner'),
+                                             replace_blob=blob)
+                return {'success': True, 'operation': 'SET', 'version': version}
             
             elif operation == 'GET':
-                result = self.get(key)
-                return {'success': result is not None, 'value': result}
+                if request.get('watch') and self.coordinator_host:
+                    # Armed before the read, so any write that could make the answer stale is reported.
+                    self.invalidations.watch(key)
+                entry = self.get_entry(key, encoded=True)
+                if entry is None and forwarding:
+                    forwarded = self._forward('MGET', [key], hops).get(key, {})
+                    if forwarded.get('success'):
+                        return {'success': True, 'value': forwarded['value'], 'version': forwarded.get('version', 0)}
+                result = entry['value'] if entry is not None else None
+                response = {'success': result is not None, 'value': result, 'version': entry['version'] if entry is not None else 0}
+                if entry is None:
+                    if key in self.deleted_versions:
+                        response['tombstone'] = self.deleted_versions.get(key, 0)
+                elif self.expiry.get(key) or entry.get('expires_at'):
+                    # Copies made by read repair keep the key's expiry.
+                    response['expires_at'] = self.expiry.get(key) or entry.get('expires_at')
+                return response
             
             elif operation == 'DELETE':
-                success = self.delete(key, sync_replicas=not request.get('sync', False))
-                return {'success': success, 'operation': 'DELETE'}
+                forwarded = self._forward('MDELETE', [key], hops).get(key, {}) if forwarding else {}
+                success = self.delete(key, sync_replicas=not request.get('sync', False), version=request.get('version'), replace_blob=blob)
+                return {'success': success or forwarded.get('success', False), 'operation': 'DELETE'}
+            
+            elif operation in ATOMIC_OPERATIONS:
+                if forwarding:
+                    self._adopt(key, hops)
+                sync_replicas = not request.get('sync', False)
+                # A quorum coordinator passes a version floor so the result outranks every older copy.
+                min_version = request.get('version', 0)
+                if operation == 'CAS':
+                    swapped, version = self.compare_and_set(key, value, request.get('expected_version', 0), sync_replicas, request.get('ttl'), min_version, blob)
+                    response = {'success': swapped, 'operation': 'CAS', 'version': version}
+                    result = value
+                elif operation == 'APPEND':
+                    result, version = self.append(key, value, sync_replicas, min_version)
+                    response = {'success': True, 'operation': 'APPEND', 'length': len(result), 'version': version}
+                else:
+                    delta = request.get('delta', 1)
+                    result, version = self.incr(key, -delta if operation == 'DECR' else delta, sync_replicas, min_version)
+                    response = {'success': True, 'operation': operation, 'value': result, 'version': version}
+                if min_version and response['success']:
+                    # The coordinator copies the new value, and its expiry, to the other replicas.
+                    response['value'] = result
+                    expires_at = self.expiry.get(key)
+                    if expires_at:
+                        response['expires_at'] = expires_at
+                return response
+            
+            elif operation == 'MGET':
+                keys = request.get('keys') or []
+                found = self.mget(keys, encoded=True)
+                if forwarding and len(found) < len(keys):
+                    for missing, result in self._forward('MGET', [k for k in keys if k not in found], hops).items():
+                        if result.get('success'):
+                            found[missing] = result['value']
+                return {
+                    'success': True,
+                    'results': {key: {'success': key in found, 'value': found.get(key)} for key in keys}
+                }
+            
+            elif operation == 'MSET':
+                items = request.get('items') or {}
+                if not blob:
+                    _check_key_names(items)
+                results = self.mset(items, sync_replicas=not request.get('sync', False), ttl=request.get('ttl'),
+                                    owners=request.get('owners'), replace_blob=blob)
+                return {'success': True, 'results': {key: {'success': ok} for key, ok in results.items()}}
+            
+            elif operation == 'MDELETE':
+                keys = request.get('keys') or []
+                forwarded = self._forward('MDELETE', keys, hops) if forwarding else {}
+                results = self.mdelete(keys, sync_replicas=not request.get('sync', False), replace_blob=blob)
+                return {
+                    'success': True,
+                    'results': {key: {'success': ok or forwarded.get(key, {}).get('success', False)} for key, ok in results.items()}
+                }
+            
+            elif operation == 'REPLICATE':
+                ack = self.apply_replicated(request.get('source'), request.get('entries') or [], request.get('upto', 0))
+                return {'success': True, 'ack': ack}
+            
+            elif operation == 'SCAN':
+                entries, cursor = self.scan(request.get('prefix'), request.get('start'), request.get('end'),
+                                            request.get('cursor'), request.get('limit', 100))
+                return {'success': True, 'entries': entries, 'cursor': cursor}
+            
+            elif operation == 'MERKLE':
+                if not self.merkle_depth:
+                    return {'success': False, 'error': f"Node {self.node_id} keeps no Merkle trees"}
+                tree = self._tree(request.get('source', ''))
+                if request.get('depth', tree.depth) != tree.depth:
+                    return {'success': False, 'error': f"Merkle depth {request['depth']} does not match {tree.depth}"}
+                return {'success': True, 'digests': tree.digests(request.get('level', 0), request.get('indices') or [0])}
+            
+            elif operation == 'MERKLE_KEYS':
+                keys = self._bucket_versions(request.get('source', ''), request.get('buckets') or [])
+                return {'success': True, 'keys': keys, 'failover': [key for key in keys if key in self.failover_writes]}
+            
+            elif operation == 'REPAIR':
+                applied = self.repair(request.get('source', ''), request.get('entries') or [], request.get('deletes') or {})
+                return {'success': True, 'applied': applied}
+            
+            elif operation == 'ANTI_ENTROPY':
+                return {'success': True, 'results': {replica['node_id']: self.anti_entropy(replica) for replica in list(self.replicas)}}
+            
+            elif operation == 'RANGE_SCAN':
+                entries, done = self.export_range(request['scan_id'], request.get('ranges') or [], request.get('limit', 500))
+                return {'success': True, 'entries': entries, 'done': done}
+            
+            elif operation == 'IMPORT':
+                return {'success': True, 'imported': self.import_entries(request.get('entries') or [])}
+            
+            elif operation == 'MIGRATION_START':
+                self.start_migration(request['migration_id'], request.get('ranges') or [], request['source'])
+                return {'success': True}
+            
+            elif operation == 'MIGRATION_END':
+                self.end_migration(request['migration_id'])
+                return {'success': True}
+            
+            elif operation == 'STATS':
+                if request.get('format') == 'prometheus':
+                    return {'success': True, 'text': self.stats_text()}
+                return dict(self.stats_report(), success=True, node_id=self.node_id)
+            
+            elif operation == 'EPOCH':
+                self.epoch = max(self.epoch, request.get('epoch', 0))
+                return {'success': True, 'epoch': self.epoch}
+            
+            elif operation == 'MEMORY':
+                report = self.data.memory_report()
+                report['snapshot_keys'] = len(self.snapshot) if self.snapshot is not None else 0
+                return {'success': True, 'node_id': self.node_id, 'memory': report}
             
             elif operation == 'HEALTH':
-                return {'status': 'healthy', 'node_id': self.node_id, 'data_size': len(self.data)}
+                return {
+                    'status': 'healthy',
+                    'node_id': self.node_id,
+                    'data_size': len(self.data),
+                    'storage_engine': self.data.engine,
+                    'snapshot_keys': len(self.snapshot) if self.snapshot is not None else 0,
+                    'replication': self.replication.status(),
+                    'cache': self.cache_status(),
+                    'migrations_in': list(self.incoming),
+                    'anti_entropy': self.anti_entropy_status
+                }
             
             else:
                 return {'success': False, 'error': f'Unknown operation: {operation}'}
@@ -0,0 +1,77 @@
+import threading
+import zlib
+from functools import reduce
+from operator import xor
+from typing import Callable, Dict, Iterable, List, Optional
+
+MERKLE_DEPTH = 10
+MASK = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+MIXER = 0xBF58476D1CE4E5B9
+
+def key_digest(key: str) -> int:
+    # Runs on every write, so two C checksums stand in for a cryptographic hash.
+    data = key.encode()
+    return (zlib.crc32(data) << 32 | zlib.adler32(data)) * GOLDEN & MASK
+
+def entry_digest(hashed: int, version: int) -> int:
+    mixed = (hashed ^ version) * MIXER & MASK
+    return mixed ^ (mixed >> 31)
+
+class MerkleTree:
+    def __init__(self, depth: int = MERKLE_DEPTH):
+        self.depth = depth
+        self.shift = 64 - depth
+        # Each leaf is the XOR of the digests of the keys hashing into it, so a write is one
+        # XOR. Inner levels are folded from the leaves when a peer asks for them.
+        self.leaves = [0] * (1 << depth)
+        self._lock = threading.Lock()
+
+    def bucket(self, key: str) -> int:
+        return key_digest(key) >> self.shift
+
+    def update(self, key: str, old_version: Optional[int], new_version: Optional[int]):
+        if old_version == new_version:
+            return
+        hashed = key_digest(key)
+        change = 0
+        if old_version is not None:
+            mixed = (hashed ^ old_version) * MIXER & MASK
+            change = mixed ^ (mixed >> 31)
+        if new_version is not None:
+            mixed = (hashed ^ new_version) * MIXER & MASK
+            change ^= mixed ^ (mixed >> 31)
+        bucket = hashed >> self.shift
+        with self._lock:
+            self.leaves[bucket] ^= change
+
+    @property
+    def root(self) -> int:
+        return self.digests(0, [0])[0]
+
+    def digests(self, level: int, indices: List[int]) -> List[int]:
+        width = 1 << (self.depth - level)
+        with self._lock:
+            leaves = list(self.leaves)
+        return [reduce(xor, leaves[index * width:(index + 1) * width], 0) for index in indices]
+
+def differing_buckets(tree: MerkleTree, fetch: Callable[[int, List[int]], List[int]]) -> List[int]:
+    # Walk down only where the digests disagree, so the exchange grows with the divergence.
+    indices = [0]
+    for level in range(tree.depth + 1):
+        remote = fetch(level, indices)
+        differing = [index for index, mine, theirs in zip(indices, tree.digests(level, indices), remote) if mine != theirs]
+        if not differing or level == tree.depth:
+            return differing
+        indices = [child for index in differing for child in (2 * index, 2 * index + 1)]
+    return []
+
+def plan_repair(local: Dict[str, int], remote: Dict[str, int], failover: Iterable[str] = ()) -> Dict[str, List[str]]:
+    # The higher version wins either way; a key only the replica holds was deleted here,
+    # unless the replica took the write while this node was unreachable.
+    failover = set(failover)
+    return {
+        'push': [key for key, version in local.items() if remote.get(key, -1) < version],
+        'pull': [key for key, version in remote.items() if local.get(key, -1) < version and (key in local or key in failover)],
+        'delete': [key for key in remote if key not in local and key not in failover]
+    }
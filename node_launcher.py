@@ -0,0 +1,186 @@
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+from kv_node import KVStoreNode
+from protocol import request
+
+def run_worker(node_id: str, host: str, port: int, coordinator_host: str, coordinator_port: int, server_mode: str,
+               cpu: Optional[int], quiet: bool, node_options: dict):
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpu})
+    node = KVStoreNode(node_id, host, port, coordinator_host=coordinator_host, coordinator_port=coordinator_port, **node_options)
+    
+    def shutdown(*_):
+        # terminate() lands here, so buffered WAL records are flushed before the process exits.
+        node.running = False
+        node.replication.close()
+        if node.wal:
+            node.wal.close()
+        os._exit(0)
+    signal.signal(signal.SIGTERM, shutdown)
+    if server_mode == 'asyncio':
+        node.start_async_server()
+    else:
+        node.start_server()
+
+class Worker:
+    def __init__(self, index: int, node_id: str, port: int):
+        self.index = index
+        self.node_id = node_id
+        self.port = port
+        self.process = None
+        self.restarts = 0
+        self.started = 0.0
+
+class NodeLauncher:
+    def __init__(self, host: str, base_port: int, workers: int = None, coordinator_host: str = None, coordinator_port: int = None,
+                 node_id: str = 'node', server_mode: str = 'threaded', data_dir: str = None, pin_cpus: bool = False,
+                 restart: bool = True, max_restart_backoff: float = 30, quiet: bool = False, **node_options):
+        self.host = host
+        self.coordinator_host = coordinator_host
+        self.coordinator_port = coordinator_port
+        self.server_mode = server_mode
+        self.data_dir = data_dir
+        self.pin_cpus = pin_cpus
+        self.restart = restart
+        self.max_restart_backoff = max_restart_backoff
+        self.quiet = quiet
+        self.node_options = node_options
+        # Each worker is a full node with its own id and port, so the coordinator gives every
+        # process its own virtual nodes on the ring and routes to it directly.
+        count = workers or os.cpu_count() or 1
+        self.workers = [Worker(i, f"{node_id}.w{i}", base_port + i) for i in range(count)]
+        self.context = multiprocessing.get_context('spawn')
+        self.running = False
+        self._monitor = None
+
+    def start(self, wait: bool = True, timeout: float = 10):
+        self.running = True
+        for worker in self.workers:
+            self._spawn(worker)
+        self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._monitor.start()
+        if wait and not self.wait_ready(timeout):
+            raise RuntimeError("Workers did not start in time")
+
+    def _spawn(self, worker: Worker):
+        options = dict(self.node_options)
+        if self.data_dir:
+            options['data_dir'] = os.path.join(self.data_dir, worker.node_id)
+        cpus = sorted(os.sched_getaffinity(0)) if self.pin_cpus and hasattr(os, 'sched_getaffinity') else None
+        cpu = cpus[worker.index % len(cpus)] if cpus else None
+        worker.process = self.context.Process(
+            target=run_worker,
+            args=(worker.node_id, self.host, worker.port, self.coordinator_host, self.coordinator_port,
+                  self.server_mode, cpu, self.quiet, options),
+            daemon=True
+        )
+        worker.process.start()
+        worker.started = time.time()
+
+    def _monitor_loop(self):
+        while self.running:
+            for worker in self.workers:
+                if not self.running or worker.process.is_alive() or not self.restart:
+                    continue
+                # Back off for workers that keep dying right after start.
+                backoff = min(2 ** worker.restarts, self.max_restart_backoff) if time.time() - worker.started < 10 else 0
+                if time.time() - worker.started < backoff:
+                    continue
+                print(f"Worker {worker.node_id} exited with {worker.process.exitcode}, restarting")
+                worker.restarts += 1
+                self._spawn(worker)
+            time.sleep(0.5)
+
+    def wait_ready(self, timeout: float = 10) -> bool:
+        deadline = time.time() + timeout
+        pending = list(self.workers)
+        while pending and time.time() < deadline:
+            pending = [worker for worker in pending if not self._healthy(worker)]
+            if pending:
+                time.sleep(0.05)
+        return not pending
+
+    def _healthy(self, worker: Worker) -> bool:
+        try:
+            with socket.create_connection((self.host, worker.port), timeout=1) as sock:
+                return request(sock, {'operation': 'HEALTH'}).get('status') == 'healthy'
+        except OSError:
+            return False
+
+    def _coordinator(self, message: dict) -> dict:
+        with socket.create_connection((self.coordinator_host, self.coordinator_port), timeout=5) as sock:
+            return request(sock, message)
+
+    def stop(self, unregister: bool = True, drain_timeout: float = 30):
+        self.running = False
+        if unregister and self.coordinator_host and self.coordinator_port:
+            try:
+                for worker in self.workers:
+                    self._coordinator({'operation': 'UNREGISTER', 'node_id': worker.node_id})
+                # Workers stay up until their ranges have been migrated to the remaining nodes.
+                deadline = time.time() + drain_timeout
+                while time.time() < deadline and self._coordinator({'operation': 'REBALANCE_STATUS'}).get('pending'):
+                    time.sleep(0.1)
+            except Exception as e:
+                print(f"Failed to unregister workers: {e}")
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+
+    def status(self) -> List[Dict]:
+        return [
+            {
+                'node_id': worker.node_id,
+                'port': worker.port,
+                'pid': worker.process.pid if worker.process else None,
+                'alive': bool(worker.process and worker.process.is_alive()),
+                'restarts': worker.restarts
+            }
+            for worker in self.workers
+        ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several KV node processes on this host")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=6000, help="Port of the first worker; the rest follow")
+    parser.add_argument('--workers', type=int, default=None, help="Defaults to one per core")
+    parser.add_argument('--node-id', default=socket.gethostname())
+    parser.add_argument('--coordinator-host', default='localhost')
+    parser.add_argument('--coordinator-port', type=int, default=5000)
+    parser.add_argument('--mode', choices=('threaded', 'asyncio'), default='threaded')
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--storage-engine', default='dict')
+    parser.add_argument('--pin-cpus', action='store_true')
+    args = parser.parse_args()
+
+    launcher = NodeLauncher(
+        args.host, args.port, args.workers, args.coordinator_host, args.coordinator_port,
+        node_id=args.node_id, server_mode=args.mode, data_dir=args.data_dir, pin_cpus=args.pin_cpus,
+        storage_engine=args.storage_engine
+    )
+    launcher.start()
+    print(f"{len(launcher.workers)} workers ready on ports {args.port}-{args.port + len(launcher.workers) - 1}")
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    try:
+        while not stopped.is_set():
+            stopped.wait(1)
+    except KeyboardInterrupt:
+        pass
+    print("Shutting down workers...")
+    launcher.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, Iterator, List, Optional
+
+CHUNK_SIZE = 512
+
+class OrderedIndex:
+    def __init__(self, keys: Iterable[str] = (), chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        # Sorted runs of keys plus the last key of each: inserts shift one short list
+        # instead of the whole keyspace, and lookups bisect the maxes first.
+        self.chunks: List[List[str]] = []
+        self.maxes: List[str] = []
+        self.count = 0
+        self._lock = threading.Lock()
+        self.update(keys)
+
+    def update(self, keys: Iterable[str]):
+        with self._lock:
+            merged = sorted(set(keys).union(*self.chunks))
+            self.chunks = [merged[i:i + self.chunk_size] for i in range(0, len(merged), self.chunk_size)]
+            self.maxes = [chunk[-1] for chunk in self.chunks]
+            self.count = len(merged)
+
+    def add(self, key: str):
+        with self._lock:
+            if not self.chunks:
+                self.chunks.append([key])
+                self.maxes.append(key)
+                self.count = 1
+                return
+            i = min(bisect_left(self.maxes, key), len(self.maxes) - 1)
+            chunk = self.chunks[i]
+            j = bisect_left(chunk, key)
+            if j < len(chunk) and chunk[j] == key:
+                return
+            insort(chunk, key)
+            self.maxes[i] = chunk[-1]
+            self.count += 1
+            if len(chunk) > 2 * self.chunk_size:
+                half = len(chunk) // 2
+                self.chunks[i:i + 1] = [chunk[:half], chunk[half:]]
+                self.maxes[i:i + 1] = [chunk[half - 1], chunk[-1]]
+
+    def discard(self, key: str):
+        with self._lock:
+            i = bisect_left(self.maxes, key)
+            if i == len(self.maxes):
+                return
+            chunk = self.chunks[i]
+            j = bisect_left(chunk, key)
+            if j == len(chunk) or chunk[j] != key:
+                return
+            del chunk[j]
+            self.count -= 1
+            if chunk:
+                self.maxes[i] = chunk[-1]
+            else:
+                del self.chunks[i]
+                del self.maxes[i]
+
+    def keys_from(self, start: Optional[str], limit: int, inclusive: bool = True) -> List[str]:
+        bisect = bisect_left if inclusive else bisect_right
+        start = start or ''
+        keys: List[str] = []
+        with self._lock:
+            i = bisect(self.maxes, start)
+            j = bisect(self.chunks[i], start) if i < len(self.chunks) else 0
+            while i < len(self.chunks) and len(keys) < limit:
+                keys.extend(self.chunks[i][j:j + limit - len(keys)])
+                i += 1
+                j = 0
+        return keys
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            i = bisect_left(self.maxes, key)
+            if i == len(self.maxes):
+                return False
+            chunk = self.chunks[i]
+            j = bisect_left(chunk, key)
+            return j < len(chunk) and chunk[j] == key
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            chunks = [list(chunk) for chunk in self.chunks]
+        for chunk in chunks:
+            yield from chunk
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,159 @@
+import itertools
+import threading
+import socket
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+from protocol import send_message, recv_message, handshake, ConnectionClosed, RequestNotSent
+
+class PipelinedConnection:
+    def __init__(self, host: str, port: int, timeout: float = 5, codec: str = 'json'):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.last_used = time.monotonic()
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            self.codec = handshake(self._sock, (codec, 'json')) if codec != 'json' else 'json'
+        except Exception:
+            self._sock.close()
+            raise
+        self._sock.settimeout(None)
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._send_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self.closed = False
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def submit(self, message: dict) -> Future:
+        return self._send(message)[1]
+
+    def _send(self, message: dict) -> Tuple[int, Future]:
+        future = Future()
+        request_id = next(self._ids)
+        with self._pending_lock:
+            if self.closed:
+                raise RequestNotSent(f"Connection to {self.host}:{self.port} is closed")
+            self._pending[request_id] = future
+        self.last_used = time.monotonic()
+        try:
+            with self._send_lock:
+                send_message(self._sock, dict(message, request_id=request_id), self.codec)
+        except Exception as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            # Requests already written on this connection fail with the error itself; only this
+            # one is known not to have reached the peer.
+            future.set_exception(RequestNotSent(f"Request to {self.host}:{self.port} was not sent: {e}"))
+            self.close(e)
+        return request_id, future
+
+    def request(self, message: dict, timeout: Optional[float] = None) -> dict:
+        request_id, future = self._send(message)
+        timeout = timeout if timeout is not None else self.timeout
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            # Only this request is abandoned: the others multiplexed on the connection keep waiting,
+            # and the reader drops its response if it still arrives.
+            with self._pending_lock:
+                abandoned = self._pending.pop(request_id, None) is not None
+            if not abandoned:
+                return future.result()
+            raise
+
+    def _read_loop(self):
+        error = None
+        try:
+            while True:
+                response = recv_message(self._sock)
+                if response is None:
+                    break
+                with self._pending_lock:
+                    future = self._pending.pop(response.pop('request_id', None), None)
+                if future is not None:
+                    future.set_result(response)
+        except Exception as e:
+            error = e
+        self.close(error)
+
+    def close(self, error: Exception = None):
+        with self._pending_lock:
+            if self.closed:
+                return
+            self.closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        failure = error or ConnectionClosed(f"Connection to {self.host}:{self.port} closed")
+        for future in pending:
+            if not future.done():
+                future.set_exception(failure)
+
+class PipelinePool:
+    def __init__(self, host: str, port: int, max_size: int = 2, timeout: float = 5, idle_timeout: float = 30, codec: str = 'json'):
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.codec = codec
+        self._connections: List[PipelinedConnection] = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _pick(self) -> PipelinedConnection:
+        with self._lock:
+            if self._closed:
+                raise ConnectionError(f"Pool for {self.host}:{self.port} is closed")
+            self._connections = [conn for conn in self._connections if not conn.closed]
+            idle = [conn for conn in self._connections if conn.in_flight == 0]
+            if idle:
+                return idle[0]
+            if len(self._connections) < self.max_size:
+                conn = PipelinedConnection(self.host, self.port, self.timeout, self.codec)
+                self._connections.append(conn)
+                return conn
+            return min(self._connections, key=lambda conn: conn.in_flight)
+
+    def submit(self, message: dict) -> Future:
+        return self._pick().submit(message)
+
+    def request(self, message: dict) -> dict:
+        try:
+            return self._pick().request(message)
+        except RequestNotSent:
+            # The peer may have dropped an idle connection; once the frame is written the request
+            # may have been applied, so only a failed send is retried on a fresh one.
+            return self._pick().request(message)
+
+    def reap_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            keep = []
+            for conn in self._connections:
+                if conn.closed:
+                    continue
+                if conn.in_flight == 0 and now - conn.last_used >= self.idle_timeout:
+                    conn.close()
+                else:
+                    keep.append(conn)
+            self._connections = keep
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            connections = self._connections
+            self._connections = []
+        for conn in connections:
+            conn.close()
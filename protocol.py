@@ -0,0 +1,120 @@
+import socket
+import struct
+import threading
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Optional
+from codec import CODECS, encode_payload, decode_payload, payload_codec
+
+HEADER = struct.Struct('!I')
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+class ConnectionClosed(ConnectionError):
+    pass
+
+class RequestNotSent(ConnectionError):
+    pass
+
+class NoResponse(ConnectionClosed):
+    pass
+
+def recv_exact(sock: socket.socket, size: int) -> Optional[bytearray]:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            if received == 0:
+                return None
+            raise ConnectionClosed(f"Connection closed after {received} of {size} bytes")
+        received += n
+    return buffer
+
+def encode_message(message: dict, codec: str = 'json') -> bytes:
+    payload = encode_payload(message, codec)
+    return HEADER.pack(len(payload)) + payload
+
+def send_message(sock: socket.socket, message: dict, codec: str = 'json'):
+    sock.sendall(encode_message(message, codec))
+
+def recv_payload(sock: socket.socket) -> Optional[bytearray]:
+    header = recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message of {length} bytes exceeds limit of {MAX_MESSAGE_SIZE}")
+    payload = recv_exact(sock, length) if length else bytearray()
+    if payload is None:
+        raise ConnectionClosed("Connection closed before message body")
+    return payload
+
+def recv_message(sock: socket.socket) -> Optional[dict]:
+    payload = recv_payload(sock)
+    return None if payload is None else decode_payload(payload)
+
+def request(sock: socket.socket, message: dict, codec: str = 'json') -> dict:
+    try:
+        send_message(sock, message, codec)
+    except socket.timeout:
+        raise
+    except OSError as e:
+        # A frame that did not go out whole is never handled by the server.
+        raise RequestNotSent(f"Request was not sent: {e}") from e
+    response = recv_message(sock)
+    if response is None:
+        raise NoResponse("Connection closed before response")
+    return response
+
+def negotiate(request: dict) -> dict:
+    offered = request.get('codecs') or []
+    return {'success': True, 'codec': next((codec for codec in offered if codec in CODECS), 'json')}
+
+def handshake(sock: socket.socket, codecs: Iterable[str]) -> str:
+    # Servers that predate HELLO reject it as an unknown operation, which leaves us on JSON.
+    response = request(sock, {'operation': 'HELLO', 'codecs': list(codecs)})
+    codec = response.get('codec')
+    return codec if response.get('success') and codec in CODECS else 'json'
+
+def serve_connection(sock: socket.socket, handler: Callable[[dict], dict], is_running: Callable[[], bool],
+                     executor: Executor, max_in_flight: int = 128, stats=None):
+    send_lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    
+    def reply(request: dict, response: dict, codec: str, received: int):
+        data = encode_message(response, codec)
+        with send_lock:
+            sock.sendall(data)
+        if stats is not None:
+            stats.record_bytes(request.get('operation'), received, len(data))
+    
+    def respond(request: dict, codec: str, received: int):
+        try:
+            response = handler(request)
+        except Exception as e:
+            response = {'success': False, 'error': str(e)}
+        response['request_id'] = request['request_id']
+        try:
+            reply(request, response, codec, received)
+        except OSError:
+            pass
+        finally:
+            in_flight.release()
+    
+    while is_running():
+        payload = recv_payload(sock)
+        if payload is None or not is_running():
+            break
+        codec = payload_codec(payload)
+        request = decode_payload(payload)
+        if request.get('operation') == 'HELLO':
+            response = negotiate(request)
+            if 'request_id' in request:
+                response['request_id'] = request['request_id']
+            with send_lock:
+                send_message(sock, response, codec)
+        elif 'request_id' in request:
+            in_flight.acquire()
+            executor.submit(respond, request, codec, HEADER.size + len(payload))
+        else:
+            reply(request, handler(request), codec, HEADER.size + len(payload))
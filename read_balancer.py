@@ -0,0 +1,78 @@
+import itertools
+import random
+import threading
+from typing import Dict, List, Optional
+
+READ_POLICIES = ('primary', 'round-robin', 'least-outstanding', 'latency')
+
+class NodeLoad:
+    __slots__ = ('outstanding', 'rtt', 'requests')
+
+    def __init__(self):
+        self.outstanding = 0
+        self.rtt: Optional[float] = None
+        self.requests = 0
+
+class ReadBalancer:
+    def __init__(self, policy: str = 'primary', rtt_alpha: float = 0.2):
+        if policy not in READ_POLICIES:
+            raise ValueError(f"Unknown read policy: {policy}")
+        self.policy = policy
+        self.rtt_alpha = rtt_alpha
+        self.loads: Dict[str, NodeLoad] = {}
+        self._turns = itertools.count()
+        self._lock = threading.Lock()
+
+    def _load(self, node_id: str) -> NodeLoad:
+        load = self.loads.get(node_id)
+        if load is None:
+            with self._lock:
+                load = self.loads.setdefault(node_id, NodeLoad())
+        return load
+
+    def order(self, candidates: List[str]) -> List[str]:
+        if self.policy == 'primary' or len(candidates) < 2:
+            return list(candidates)
+        if self.policy == 'round-robin':
+            start = next(self._turns) % len(candidates)
+            return candidates[start:] + candidates[:start]
+        if self.policy == 'least-outstanding':
+            # sorted() is stable, so ties keep the primary first.
+            return sorted(candidates, key=lambda node_id: self._load(node_id).outstanding)
+        return self._latency_order(candidates)
+
+    def _latency_order(self, candidates: List[str]) -> List[str]:
+        rtts = [self._load(node_id).rtt for node_id in candidates]
+        known = [rtt for rtt in rtts if rtt is not None]
+        # Nodes without a measurement get the best known weight so they are probed.
+        weights = [1.0 / max(rtt, 1e-6) if rtt is not None else (1.0 / max(min(known), 1e-6) if known else 1.0) for rtt in rtts]
+        first = random.choices(range(len(candidates)), weights=weights)[0]
+        rest = sorted((i for i in range(len(candidates)) if i != first), key=lambda i: -weights[i])
+        return [candidates[first]] + [candidates[i] for i in rest]
+
+    def start(self, node_id: str):
+        load = self._load(node_id)
+        with self._lock:
+            load.outstanding += 1
+
+    def finish(self, node_id: str, elapsed: float):
+        load = self._load(node_id)
+        with self._lock:
+            load.outstanding -= 1
+            load.requests += 1
+            load.rtt = elapsed if load.rtt is None else load.rtt + self.rtt_alpha * (elapsed - load.rtt)
+
+    def forget(self, node_id: str):
+        with self._lock:
+            self.loads.pop(node_id, None)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                node_id: {
+                    'outstanding': load.outstanding,
+                    'rtt_ms': round(load.rtt * 1000, 3) if load.rtt is not None else None,
+                    'requests': load.requests
+                }
+                for node_id, load in self.loads.items()
+            }
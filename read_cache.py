@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from expiry import estimate_size
+
+READ_CACHE_POLICIES = ('lru', 'tinylfu')
+
+class FrequencySketch:
+    def __init__(self, width: int, depth: int = 4, max_count: int = 15):
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self.mask = self.width - 1
+        self.rows = [[0] * self.width for _ in range(depth)]
+        self.seeds = [0x9E3779B1 * (i + 1) for i in range(depth)]
+        self.max_count = max_count
+        self.additions = 0
+        self.sample_size = 10 * width
+
+    def _slots(self, key: str):
+        h = hash(key)
+        return [((h ^ seed) * 0x5BD1E995 >> 7) & self.mask for seed in self.seeds]
+
+    def increment(self, key: str):
+        for row, slot in zip(self.rows, self._slots(key)):
+            if row[slot] < self.max_count:
+                row[slot] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            # Halving keeps the sketch biased towards recent popularity.
+            for row in self.rows:
+                row[:] = [count >> 1 for count in row]
+            self.additions //= 2
+
+    def estimate(self, key: str) -> int:
+        return min(row[slot] for row, slot in zip(self.rows, self._slots(key)))
+
+class ReadCache:
+    def __init__(self, max_bytes: int, policy: str = 'lru', window_fraction: float = 0.01):
+        if policy not in READ_CACHE_POLICIES:
+            raise ValueError(f"Unknown read cache policy: {policy}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.entries: 'OrderedDict[str, Tuple[Any, int, int]]' = OrderedDict()
+        # W-TinyLFU: new keys land in a small LRU window and only displace main-area keys
+        # that the frequency sketch says are less popular.
+        self.window: 'OrderedDict[str, Tuple[Any, int, int]]' = OrderedDict()
+        self.window_bytes = int(max_bytes * window_fraction) if policy == 'tinylfu' else 0
+        self.sketch = FrequencySketch(max(1024, max_bytes // 256)) if policy == 'tinylfu' else None
+        self.used_bytes = 0
+        self.used_window = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'rejections': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, int]]:
+        with self._lock:
+            if self.sketch is not None:
+                self.sketch.increment(key)
+            for area in (self.window, self.entries):
+                entry = area.get(key)
+                if entry is not None:
+                    area.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[0], entry[1]
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key: str, value: Any, version: int):
+        size = estimate_size(key, value, depth=1)
+        if size > self.max_bytes - self.window_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            if self.sketch is None:
+                self._admit(key, (value, version, size))
+                return
+            self.window[key] = (value, version, size)
+            self.used_window += size
+            while self.used_window > self.window_bytes and self.window:
+                candidate, entry = self.window.popitem(last=False)
+                self.used_window -= entry[2]
+                self._admit(candidate, entry)
+
+    def _admit(self, key: str, entry: Tuple[Any, int, int]):
+        limit = self.max_bytes - self.window_bytes
+        while self.used_bytes + entry[2] > limit and self.entries:
+            victim = next(iter(self.entries))
+            if self.sketch is not None and self.sketch.estimate(key) <= self.sketch.estimate(victim):
+                self.stats['rejections'] += 1
+                return
+            self.used_bytes -= self.entries.pop(victim)[2]
+            self.stats['evictions'] += 1
+        self.entries[key] = entry
+        self.used_bytes += entry[2]
+
+    def _discard(self, key: str) -> bool:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.used_bytes -= entry[2]
+            return True
+        entry = self.window.pop(key, None)
+        if entry is not None:
+            self.used_window -= entry[2]
+            return True
+        return False
+
+    def invalidate(self, key: str, version: Optional[int] = None):
+        with self._lock:
+            for area in (self.window, self.entries):
+                entry = area.get(key)
+                if entry is not None and (version is None or entry[1] < version):
+                    self._discard(key)
+                    self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.window.clear()
+            self.used_bytes = self.used_window = 0
+
+    def __len__(self) -> int:
+        return len(self.entries) + len(self.window)
+
+    def status(self) -> dict:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(
+                self.stats,
+                policy=self.policy,
+                entries=len(self.entries) + len(self.window),
+                used_bytes=self.used_bytes + self.used_window,
+                max_bytes=self.max_bytes,
+                hit_ratio=round(self.stats['hits'] / lookups, 4) if lookups else 0.0
+            )
+
+class InvalidationNotifier:
+    def __init__(self, send: Callable[[dict], Any], max_watched: int = 100000, batch_delay: float = 0.002):
+        self.send = send
+        self.max_watched = max_watched
+        self.batch_delay = batch_delay
+        self.watched: 'OrderedDict[str, None]' = OrderedDict()
+        self.pending: Dict[str, Optional[int]] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def watch(self, key: str):
+        with self._cond:
+            self.watched[key] = None
+            self.watched.move_to_end(key)
+            if len(self.watched) > self.max_watched:
+                # Forgetting a watch is only safe if the cache drops the key too, so say it changed.
+                oldest, _ = self.watched.popitem(last=False)
+                self._queue(oldest, None)
+
+    def changed(self, key: str, version: Optional[int]):
+        if key not in self.watched:
+            return
+        with self._cond:
+            # Watches are one-shot: the coordinator re-arms one on its next miss.
+            if key in self.watched:
+                del self.watched[key]
+                self._queue(key, version)
+
+    def _queue(self, key: str, version: Optional[int]):
+        self.pending[key] = version
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def _run(self):
+        backoff = 0.05
+        while True:
+            with self._cond:
+                while not self.pending:
+                    self._cond.wait()
+            # A short pause lets writes that arrive together share one message.
+            time.sleep(self.batch_delay)
+            with self._cond:
+                batch, self.pending = self.pending, {}
+            try:
+                self.send({'operation': 'INVALIDATE', 'keys': batch})
+                backoff = 0.05
+            except Exception as e:
+                # Dropping the batch would leave stale entries cached, so it goes back in line.
+                print(f"Failed to send cache invalidations for {len(batch)} keys: {e}")
+                with self._cond:
+                    self.pending = dict(batch, **self.pending)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5)
@@ -0,0 +1,162 @@
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+from consistent_hashing import moved_ranges
+
+class MigrationJob:
+    def __init__(self, job_id: str, source: dict, target: dict, ranges: List[Tuple[int, int]]):
+        self.job_id = job_id
+        self.source = source
+        self.target = target
+        self.ranges = ranges
+        self.state = 'pending'
+        self.moved = 0
+        self.batches = 0
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    def status(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            'id': self.job_id,
+            'source': self.source['node_id'],
+            'target': self.target['node_id'],
+            'ranges': len(self.ranges),
+            'state': self.state,
+            'moved': self.moved,
+            'batches': self.batches,
+            'elapsed': round(end - self.started, 3) if self.started else 0,
+            'error': self.error
+        }
+
+class Rebalancer:
+    def __init__(self, send: Callable[[dict, dict], dict], batch_size: int = 500, max_batches_per_second: float = 20,
+                 cleanup: bool = True, history: int = 100):
+        self.send = send
+        self.batch_size = batch_size
+        self.max_batches_per_second = max_batches_per_second
+        self.cleanup = cleanup
+        self.history = history
+        self.jobs: List[MigrationJob] = []
+        self._ids = itertools.count(1)
+        self._prefix = f"mig-{time.time_ns()}"
+        self._queue: 'queue.Queue[MigrationJob]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def plan(self, old_state, new_state, nodes: Dict[str, dict]) -> List[MigrationJob]:
+        grouped: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        for start, end, source, target in moved_ranges(old_state, new_state):
+            grouped.setdefault((source, target), []).append((start, end))
+
+        jobs = []
+        for (source, target), ranges in grouped.items():
+            if source not in nodes or target not in nodes:
+                continue
+            jobs.append(MigrationJob(f"{self._prefix}-{next(self._ids)}", nodes[source], nodes[target], ranges))
+
+        with self._lock:
+            self.jobs.extend(jobs)
+            finished = [job for job in self.jobs if job.state in ('done', 'failed')]
+            for job in finished[:max(0, len(self.jobs) - self.history)]:
+                self.jobs.remove(job)
+        for job in jobs:
+            self._announce(job)
+        return jobs
+
+    def _announce(self, job: MigrationJob):
+        # Sent before the ring switches, so the target forwards misses in these ranges to the
+        # source from its very first request, while the job waits in the queue and while it copies.
+        try:
+            self.send(job.target, {
+                'operation': 'MIGRATION_START',
+                'migration_id': job.job_id,
+                'ranges': job.ranges,
+                'source': job.source
+            })
+        except Exception as e:
+            print(f"Failed to announce migration {job.job_id} to {job.target['node_id']}: {e}")
+
+    def start(self, jobs: List[MigrationJob]):
+        for job in jobs:
+            self._queue.put(job)
+        if jobs:
+            self._start_worker()
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run_loop, daemon=True)
+                self._worker.start()
+
+    def _run_loop(self):
+        # Jobs run one at a time in ring-change order, so a later job never scans a node
+        # before an earlier job has finished filling it.
+        while True:
+            self._run(self._queue.get())
+
+    def _run(self, job: MigrationJob):
+        job.state = 'running'
+        job.started = time.time()
+        interval = 1.0 / self.max_batches_per_second if self.max_batches_per_second else 0
+        try:
+            while True:
+                batch_start = time.monotonic()
+                response = self.send(job.source, {
+                    'operation': 'RANGE_SCAN',
+                    'scan_id': job.job_id,
+                    'ranges': job.ranges,
+                    'limit': self.batch_size
+                })
+                if not response.get('success'):
+                    raise Exception(response.get('error', 'range scan failed'))
+                entries = response.get('entries') or []
+                if entries:
+                    imported = self.send(job.target, {'operation': 'IMPORT', 'entries': entries})
+                    if not imported.get('success'):
+                        raise Exception(imported.get('error', 'import failed'))
+                    if self.cleanup:
+                        # 'sync' keeps the source from replicating or forwarding these deletes.
+                        self.send(job.source, {'operation': 'MDELETE', 'keys': [entry['key'] for entry in entries], 'sync': True})
+                    job.moved += len(entries)
+                    job.batches += 1
+                if response.get('done'):
+                    break
+                remaining = interval - (time.monotonic() - batch_start)
+                if remaining > 0:
+                    time.sleep(remaining)
+            job.state = 'done'
+        except Exception as e:
+            job.state = 'failed'
+            job.error = str(e)
+            print(f"Migration {job.job_id} from {job.source['node_id']} to {job.target['node_id']} failed: {e}")
+        finally:
+            job.finished = time.time()
+            try:
+                self.send(job.target, {'operation': 'MIGRATION_END', 'migration_id': job.job_id})
+            except Exception as e:
+                print(f"Failed to end migration {job.job_id} on {job.target['node_id']}: {e}")
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for job in self.jobs if job.state in ('pending', 'running'))
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def status(self) -> dict:
+        with self._lock:
+            jobs = list(self.jobs)
+        return {
+            'pending': sum(1 for job in jobs if job.state in ('pending', 'running')),
+            'moved': sum(job.moved for job in jobs),
+            'jobs': [job.status() for job in jobs]
+        }
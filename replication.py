@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional
+
+REPLICATION_MODES = ('sync', 'semi-sync', 'async')
+
+class ReplicaStream:
+    def __init__(self, log: 'ReplicationLog', replica: dict):
+        self.log = log
+        self.replica = replica
+        self.acked_seq = 0
+        self.healthy = True
+        self.lagging = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        backoff = 0.05
+        while not self.log.closed:
+            if not self.log.wait_for_entries(self.acked_seq, timeout=1):
+                continue
+            batch = self.log.entries_after(self.acked_seq, self.log.batch_size)
+            try:
+                if batch is None:
+                    self._resync()
+                elif batch:
+                    response = self.log.send(self.replica, {
+                        'operation': 'REPLICATE',
+                        'source': self.log.log_id,
+                        'entries': batch,
+                        'sync': True
+                    })
+                    if not response.get('success'):
+                        raise Exception(response.get('error', 'replica rejected batch'))
+                    self.log.acked(self, response['ack'])
+                if not self.healthy:
+                    self.log.set_healthy(self, True)
+                backoff = 0.05
+            except Exception as e:
+                print(f"Failed to sync to replica {self.replica.get('node_id')}: {e}")
+                self.log.set_healthy(self, False)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5)
+
+    def _resync(self):
+        # The log no longer reaches back to our position, so ship the full dataset and resume after it.
+        self.lagging = True
+        upto = self.log.last_seq
+        batch = []
+        for entry in self.log.snapshot():
+            batch.append(entry)
+            if len(batch) >= self.log.batch_size:
+                self._send_snapshot_batch(batch, 0)
+                batch = []
+        self._send_snapshot_batch(batch, upto)
+        self.log.acked(self, upto)
+        self.lagging = False
+
+    def _send_snapshot_batch(self, batch: List[dict], upto: int):
+        response = self.log.send(self.replica, {
+            'operation': 'REPLICATE',
+            'source': self.log.log_id,
+            'entries': batch,
+            'upto': upto,
+            'sync': True
+        })
+        if not response.get('success'):
+            raise Exception(response.get('error', 'replica rejected snapshot'))
+
+class ReplicationLog:
+    def __init__(self, node_id: str, send: Callable[[dict, dict], dict], snapshot: Callable[[], Iterable[dict]],
+                 mode: str = 'sync', acks: int = 1, timeout: float = 5, batch_size: int = 512, max_entries: int = 100000):
+        if mode not in REPLICATION_MODES:
+            raise ValueError(f"Unknown replication mode: {mode}")
+        self.log_id = f"{node_id}:{time.time_ns()}"
+        self.send = send
+        self.snapshot = snapshot
+        self.mode = mode
+        self.acks = acks
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.max_entries = max_entries
+        self.entries = deque()
+        self.first_seq = 1
+        self.last_seq = 0
+        self.streams: Dict[str, ReplicaStream] = {}
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def add_replica(self, replica: dict):
+        with self._cond:
+            stream_id = replica.get('node_id') or f"{replica['host']}:{replica['port']}"
+            if stream_id not in self.streams:
+                self.streams[stream_id] = ReplicaStream(self, replica)
+
+    def append(self, entry: dict) -> int:
+        with self._cond:
+            self.last_seq += 1
+            entry['seq'] = self.last_seq
+            self.entries.append(entry)
+            self._trim()
+            self._cond.notify_all()
+            return self.last_seq
+
+    def entries_after(self, seq: int, limit: int) -> Optional[List[dict]]:
+        with self._cond:
+            if seq + 1 < self.first_seq:
+                return None
+            start = seq + 1 - self.first_seq
+            return list(islice(self.entries, start, start + limit))
+
+    def wait_for_entries(self, seq: int, timeout: float) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.last_seq > seq or self.closed, timeout)
+
+    def acked(self, stream: ReplicaStream, seq: int):
+        with self._cond:
+            stream.acked_seq = max(stream.acked_seq, seq)
+            self._trim()
+            self._cond.notify_all()
+
+    def set_healthy(self, stream: ReplicaStream, healthy: bool):
+        with self._cond:
+            stream.healthy = healthy
+            self._cond.notify_all()
+
+    def _acknowledged(self, seq: int) -> bool:
+        # Replicas that are failing are skipped until they catch up, so one dead replica
+        # degrades sync writes to async instead of stalling every write on its timeout.
+        healthy = [stream for stream in self.streams.values() if stream.healthy]
+        needed = len(healthy) if self.mode == 'sync' else min(self.acks, len(healthy))
+        return sum(1 for stream in healthy if stream.acked_seq >= seq) >= needed
+
+    def wait_for(self, seq: int) -> bool:
+        if self.mode == 'async' or not self.streams:
+            return True
+        with self._cond:
+            done = self._cond.wait_for(lambda: self._acknowledged(seq), self.timeout)
+        if not done:
+            print(f"Replication of seq {seq} not acknowledged within {self.timeout}s")
+        return done
+
+    def _trim(self):
+        floor = min((stream.acked_seq for stream in self.streams.values()), default=self.last_seq)
+        while self.entries and (self.first_seq <= floor or len(self.entries) > self.max_entries):
+            self.entries.popleft()
+            self.first_seq += 1
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                'mode': self.mode,
+                'last_seq': self.last_seq,
+                'log_entries': len(self.entries),
+                'replicas': {
+                    stream_id: {
+                        'acked_seq': stream.acked_seq,
+                        'lag': self.last_seq - stream.acked_seq,
+                        'healthy': stream.healthy
+                    }
+                    for stream_id, stream in self.streams.items()
+                }
+            }
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
@@ -0,0 +1,107 @@
+import json
+import mmap
+import os
+import struct
+from typing import Iterable, Iterator, Optional, Tuple
+from codec import RawValue
+from storage import NULL
+
+MAGIC = b'KVSNAP02'
+FILE_HEADER = struct.Struct('<8sQQQ')
+INDEX_ENTRY = struct.Struct('<QIQIQdd')
+
+def write_snapshot(path: str, entries: Iterable[tuple], segment: int) -> int:
+    temp_path = path + '.tmp'
+    index = []
+    with open(temp_path, 'wb') as f:
+        f.write(bytes(FILE_HEADER.size))
+        offset = FILE_HEADER.size
+        for key, raw_value, version, timestamp, *expiry in entries:
+            key_bytes = key.encode('utf-8')
+            f.write(raw_value)
+            f.write(key_bytes)
+            index.append((key_bytes, offset + len(raw_value), offset, len(raw_value), version, timestamp, expiry[0] if expiry else 0.0))
+            offset += len(raw_value) + len(key_bytes)
+
+        index.sort(key=lambda item: item[0])
+        index_offset = offset
+        buffer = bytearray()
+        for key_bytes, key_offset, value_offset, value_length, version, timestamp, expires_at in index:
+            buffer += INDEX_ENTRY.pack(key_offset, len(key_bytes), value_offset, value_length, version, timestamp, expires_at)
+            if len(buffer) >= 1024 * 1024:
+                f.write(buffer)
+                buffer = bytearray()
+        f.write(buffer)
+
+        f.seek(0)
+        f.write(FILE_HEADER.pack(MAGIC, len(index), index_offset, segment))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return len(index)
+
+class SnapshotReader:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        magic, self.count, self._index_offset, self.segment = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _entry(self, position: int) -> tuple:
+        return INDEX_ENTRY.unpack_from(self._mm, self._index_offset + position * INDEX_ENTRY.size)
+
+    def _key_at(self, position: int) -> bytes:
+        key_offset, key_length = INDEX_ENTRY.unpack_from(self._mm, self._index_offset + position * INDEX_ENTRY.size)[:2]
+        return self._mm[key_offset:key_offset + key_length]
+
+    def _find(self, key: str) -> Optional[tuple]:
+        target = key.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._key_at(low) == target:
+            return self._entry(low)
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) is not None
+
+    def get_raw(self, key: str) -> Optional[Tuple[memoryview, int, float]]:
+        entry = self._find(key)
+        if entry is None:
+            return None
+        _, _, value_offset, value_length, version, timestamp, _ = entry
+        return self._view[value_offset:value_offset + value_length], version, timestamp
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._get(key, json.loads)
+
+    def get_encoded(self, key: str) -> Optional[dict]:
+        # The stored JSON goes back out as is; GETs served from the snapshot never decode it.
+        return self._get(key, lambda raw: None if raw == NULL else RawValue(raw))
+
+    def _get(self, key: str, load) -> Optional[dict]:
+        entry = self._find(key)
+        if entry is None:
+            return None
+        _, _, value_offset, value_length, version, timestamp, expires_at = entry
+        found = {'value': load(self._mm[value_offset:value_offset + value_length]), 'timestamp': timestamp, 'version': version}
+        if expires_at:
+            found['expires_at'] = expires_at
+        return found
+
+    def iter_raw(self) -> Iterator[Tuple[str, memoryview, int, float, float]]:
+        for position in range(self.count):
+            key_offset, key_length, value_offset, value_length, version, timestamp, expires_at = self._entry(position)
+            key = self._mm[key_offset:key_offset + key_length].decode('utf-8')
+            yield key, self._view[value_offset:value_offset + value_length], version, timestamp, expires_at
@@ -3,29 +3,57 @@ import time
 import sys
 from kv_node import KVStoreNode
 from coordinator import Coordinator
+from node_launcher import NodeLauncher
 
-def start_coordinator():
-    coordinator = Coordinator('localhost', 5000)
-    coordinator_thread = threading.Thread(target=coordinator.start_server)
+def server_entry(server, mode):
+    return server.start_async_server if mode == 'asyncio' else server.start_server
+
+def flag(name, default=None):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+def start_coordinator(mode='threaded', replication_factor=0, read_quorum=None, write_quorum=None):
+    coordinator = Coordinator('localhost', 5000, replication_factor=replication_factor, read_quorum=read_quorum, write_quorum=write_quorum)
+    coordinator_thread = threading.Thread(target=server_entry(coordinator, mode))
     coordinator_thread.daemon = True
     coordinator_thread.start()
     return coordinator
 
-def start_kv_node(node_id, host, port, coordinator):
+def start_kv_node(node_id, host, port, coordinator, mode='threaded'):
     node = KVStoreNode(node_id, host, port, coordinator_host=coordinator.host, coordinator_port=coordinator.port)
-    node_thread = threading.Thread(target=node.start_server)
+    node_thread = threading.Thread(target=server_entry(node, mode))
     node_thread.daemon = True
     node_thread.start()
     return node
 
+def start_worker_processes(coordinator, workers, mode='threaded'):
+    launcher = NodeLauncher('localhost', 6000, workers, coordinator.host, coordinator.port, node_id='node', server_mode=mode)
+    launcher.start()
+    return launcher
+
 def main():
+    mode = 'asyncio' if '--asyncio' in sys.argv else 'threaded'
     try:
-        coordinator = start_coordinator()
+        # --n N replicates each key to its ring preference list with R/W quorums instead of
+        # chaining every node to the next one.
+        coordinator = start_coordinator(mode, flag('--n', 0), flag('--r'), flag('--w'))
         time.sleep(1)
     except Exception as e:
         print(f"Failed to start coordinator: {e}")
         return
 
+    if '--workers' in sys.argv:
+        # One node process per worker instead of node threads sharing this interpreter's GIL.
+        workers = int(sys.argv[sys.argv.index('--workers') + 1])
+        launcher = start_worker_processes(coordinator, workers, mode)
+        print(f"CLUSTER READY ({workers} node processes)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\nShutting down...")
+            launcher.stop()
+            sys.exit(0)
+
     nodes = []
     for i in range(3):
         try:
@@ -33,21 +61,25 @@ def main():
                 f"node_{i}", 
                 'localhost', 
                 6000 + i,
-                coordinator
+                coordinator,
+                mode
             )
             nodes.append(node)
             time.sleep(0.5)
         except Exception as e:
             print(f"Failed to start node_{i}: {e}")
 
-    for i, node in enumerate(nodes):
-        replica_target = nodes[(i + 1) % len(nodes)]
-        node.add_replica({
-            'node_id': replica_target.node_id,
-            'host': replica_target.host,
-            'port': replica_target.port
-        })
-        print(f"Configured {node.node_id} to replicate to {replica_target.node_id}")
+    if coordinator.replication_factor:
+        print(f"Quorum replication: N={coordinator.replication_factor} R={coordinator.read_quorum or 'majority'} W={coordinator.write_quorum or 'majority'}")
+    else:
+        for i, node in enumerate(nodes):
+            replica_target = nodes[(i + 1) % len(nodes)]
+            node.add_replica({
+                'node_id': replica_target.node_id,
+                'host': replica_target.host,
+                'port': replica_target.port
+            })
+            print(f"Configured {node.node_id} to replicate to {replica_target.node_id}")
 
     print("CLUSTER READY")
     try:
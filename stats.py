@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKET_COUNT = 40 * SUB_BUCKETS
+QUANTILES = (0.5, 0.99, 0.999)
+
+def _bucket_index(micros: int) -> int:
+    if micros < SUB_BUCKETS:
+        return micros
+    # Log-linear like HDR histograms: 16 linear sub-buckets per power of two, so ~6% error.
+    shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+    index = (shift << SUB_BUCKET_BITS) + (micros >> shift)
+    return index if index < BUCKET_COUNT else BUCKET_COUNT - 1
+
+def _bucket_upper(index: int) -> int:
+    if index < SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+class LatencyHistogram:
+    __slots__ = ('counts', 'total', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        micros = int(seconds * 1e6)
+        self.counts[micros if micros < SUB_BUCKETS else _bucket_index(micros)] += 1
+        self.total += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, quantile: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, int(quantile * self.count + 0.5))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                return min(_bucket_upper(index) / 1e6, self.max)
+        return self.max
+
+class OperationStats:
+    __slots__ = ('count', 'errors', 'bytes_in', 'bytes_out', 'latency')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency = LatencyHistogram()
+
+class Stats:
+    def __init__(self):
+        self.operations: Dict[str, OperationStats] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _operation(self, name: str) -> OperationStats:
+        operation = self.operations.get(name)
+        if operation is None:
+            with self._lock:
+                operation = self.operations.setdefault(name, OperationStats())
+        return operation
+
+    def record(self, name: str, seconds: float, error: bool = False):
+        operation = self.operations.get(name) or self._operation(name)
+        # Inlined LatencyHistogram.record: this runs on every request.
+        micros = int(seconds * 1e6)
+        if micros < SUB_BUCKETS:
+            index = micros
+        else:
+            shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+            index = min((shift << SUB_BUCKET_BITS) + (micros >> shift), BUCKET_COUNT - 1)
+        with self._lock:
+            operation.count += 1
+            if error:
+                operation.errors += 1
+            latency = operation.latency
+            latency.counts[index] += 1
+            latency.total += seconds
+            latency.count += 1
+            if seconds > latency.max:
+                latency.max = seconds
+
+    def record_bytes(self, name: str, bytes_in: int, bytes_out: int):
+        operation = self._operation(name)
+        with self._lock:
+            operation.bytes_in += bytes_in
+            operation.bytes_out += bytes_out
+
+    def snapshot(self) -> dict:
+        uptime = max(time.time() - self.started, 1e-9)
+        with self._lock:
+            return {
+                'uptime': round(uptime, 3),
+                'operations': {
+                    name: {
+                        'count': operation.count,
+                        'errors': operation.errors,
+                        'bytes_in': operation.bytes_in,
+                        'bytes_out': operation.bytes_out,
+                        'ops_per_sec': round(operation.count / uptime, 3),
+                        'latency_ms': {
+                            'mean': round(operation.latency.total / operation.latency.count * 1000, 4) if operation.latency.count else 0.0,
+                            'p50': round(operation.latency.percentile(0.5) * 1000, 4),
+                            'p99': round(operation.latency.percentile(0.99) * 1000, 4),
+                            'p999': round(operation.latency.percentile(0.999) * 1000, 4),
+                            'max': round(operation.latency.max * 1000, 4)
+                        }
+                    }
+                    for name, operation in self.operations.items()
+                }
+            }
+
+    def prometheus(self, prefix: str = 'kv', labels: Optional[Dict[str, str]] = None) -> str:
+        base = ''.join(f'{name}="{value}",' for name, value in (labels or {}).items())
+        lines: List[str] = []
+        with self._lock:
+            operations = sorted(self.operations.items())
+            for metric, field in (('requests_total', 'count'), ('errors_total', 'errors'),
+                                  ('received_bytes_total', 'bytes_in'), ('sent_bytes_total', 'bytes_out')):
+                lines.append(f"# TYPE {prefix}_{metric} counter")
+                lines.extend(f'{prefix}_{metric}{{{base}op="{name}"}} {getattr(operation, field)}' for name, operation in operations)
+            lines.append(f"# TYPE {prefix}_latency_seconds summary")
+            for name, operation in operations:
+                for quantile in QUANTILES:
+                    lines.append(f'{prefix}_latency_seconds{{{base}op="{name}",quantile="{quantile}"}} {operation.latency.percentile(quantile):.6f}')
+                lines.append(f'{prefix}_latency_seconds_sum{{{base}op="{name}"}} {operation.latency.total:.6f}')
+                lines.append(f'{prefix}_latency_seconds_count{{{base}op="{name}"}} {operation.latency.count}')
+        return '\n'.join(lines) + '\n'
+
+# Locks don't know which node owns them, so waits are counted per process.
+LOCK_WAITS = Stats()
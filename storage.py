@@ -0,0 +1,204 @@
+import json
+import sys
+import threading
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from codec import RawValue
+
+SAMPLE_SIZE = 10000
+NULL = b'null'
+
+def encode_value(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+def decode_value(raw: bytes) -> Any:
+    return json.loads(raw)
+
+def _deep_size(obj: Any) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_size(item) for item in obj)
+    return size
+
+class Entry:
+    __slots__ = ('value', 'timestamp', 'version')
+
+    def __init__(self, value: Any, timestamp: float, version: int):
+        self.value = value
+        self.timestamp = timestamp
+        self.version = version
+
+    def __getitem__(self, name: str) -> Any:
+        return getattr(self, name)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return getattr(self, name, default)
+
+class DictStore(dict):
+    engine = 'dict'
+    # Values are kept as objects, so there is nothing to skip decoding.
+    get_encoded = dict.get
+
+    def put(self, key: str, value: Any, timestamp: float, version: int) -> dict:
+        entry = {'value': value, 'timestamp': timestamp, 'version': version}
+        self[key] = entry
+        return entry
+
+    def raw_items(self) -> Iterator[Tuple[str, bytes, int, float]]:
+        for key, entry in list(self.items()):
+            yield key, encode_value(entry['value']), entry['version'], entry['timestamp']
+
+    def _entry_bytes(self, key: str, entry: Any) -> int:
+        # Field names are interned and shared by every entry, so only the values are counted.
+        return sys.getsizeof(key) + sys.getsizeof(entry) + sum(_deep_size(v) for v in entry.values())
+
+    def memory_report(self) -> dict:
+        items = list(self.items())
+        sample = items[:SAMPLE_SIZE]
+        per_entry = sum(self._entry_bytes(key, entry) for key, entry in sample) / len(sample) if sample else 0
+        total = sys.getsizeof(self) + per_entry * len(items)
+        return {
+            'engine': self.engine,
+            'keys': len(items),
+            'total_bytes': int(total),
+            'bytes_per_key': round(total / len(items), 1) if items else 0
+        }
+
+class SlotStore(DictStore):
+    engine = 'slots'
+
+    def put(self, key: str, value: Any, timestamp: float, version: int) -> Entry:
+        entry = Entry(value, timestamp, version)
+        self[key] = entry
+        return entry
+
+    def raw_items(self) -> Iterator[Tuple[str, bytes, int, float]]:
+        for key, entry in list(self.items()):
+            yield key, encode_value(entry.value), entry.version, entry.timestamp
+
+    def _entry_bytes(self, key: str, entry: Entry) -> int:
+        return (sys.getsizeof(key) + sys.getsizeof(entry) + _deep_size(entry.value)
+                + sys.getsizeof(entry.timestamp) + sys.getsizeof(entry.version))
+
+class ColumnStore:
+    engine = 'columnar'
+
+    def __init__(self):
+        self._slots: Dict[str, int] = {}
+        self._values: List[Optional[bytes]] = []
+        self._timestamps = array('d')
+        self._versions = array('Q')
+        self._free: List[int] = []
+        self._alloc_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._slots))
+
+    def put(self, key: str, value: Any, timestamp: float, version: int) -> Entry:
+        raw = encode_value(value)
+        slot = self._slots.get(key)
+        if slot is None:
+            with self._alloc_lock:
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    slot = len(self._values)
+                    self._values.append(None)
+                    self._timestamps.append(0.0)
+                    self._versions.append(0)
+        self._values[slot] = raw
+        self._timestamps[slot] = timestamp
+        self._versions[slot] = version
+        self._slots[key] = slot
+        return Entry(value, timestamp, version)
+
+    def get_raw(self, key: str) -> Optional[Tuple[bytes, int, float]]:
+        slot = self._slots.get(key)
+        if slot is None:
+            return None
+        return self._values[slot], self._versions[slot], self._timestamps[slot]
+
+    def get(self, key: str, default: Any = None) -> Optional[Entry]:
+        found = self.get_raw(key)
+        if found is None:
+            return default
+        raw, version, timestamp = found
+        return Entry(decode_value(raw), timestamp, version)
+
+    def get_encoded(self, key: str, default: Any = None) -> Optional[Entry]:
+        # For reads whose value only goes back out on the wire, or that only need the version.
+        found = self.get_raw(key)
+        if found is None:
+            return default
+        raw, version, timestamp = found
+        return Entry(None if raw == NULL else RawValue(raw), timestamp, version)
+
+    def __getitem__(self, key: str) -> Entry:
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __setitem__(self, key: str, entry: Any):
+        self.put(key, entry['value'], entry['timestamp'], entry['version'])
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return default
+        entry = Entry(RawValue(self._values[slot]), self._timestamps[slot], self._versions[slot])
+        self._values[slot] = None
+        with self._alloc_lock:
+            self._free.append(slot)
+        return entry
+
+    def __delitem__(self, key: str):
+        if self.pop(key) is None:
+            raise KeyError(key)
+
+    def keys(self) -> List[str]:
+        return list(self._slots)
+
+    def items(self) -> List[Tuple[str, Entry]]:
+        return [(key, self.get(key)) for key in list(self._slots) if key in self._slots]
+
+    def raw_items(self) -> Iterator[Tuple[str, bytes, int, float]]:
+        for key, slot in list(self._slots.items()):
+            raw = self._values[slot]
+            if raw is not None:
+                yield key, raw, self._versions[slot], self._timestamps[slot]
+
+    def memory_report(self) -> dict:
+        slots = list(self._slots.items())
+        sample = slots[:SAMPLE_SIZE]
+        per_key = (sum(sys.getsizeof(key) + sys.getsizeof(self._values[slot] or b'') for key, slot in sample) / len(sample)
+                   if sample else 0)
+        total = (sys.getsizeof(self._slots) + sys.getsizeof(self._values)
+                 + self._timestamps.buffer_info()[1] * self._timestamps.itemsize
+                 + self._versions.buffer_info()[1] * self._versions.itemsize
+                 + per_key * len(slots))
+        return {
+            'engine': self.engine,
+            'keys': len(slots),
+            'total_bytes': int(total),
+            'bytes_per_key': round(total / len(slots), 1) if slots else 0
+        }
+
+STORAGE_ENGINES = {
+    'dict': DictStore,
+    'slots': SlotStore,
+    'columnar': ColumnStore,
+}
+
+def create_store(engine: str = 'dict'):
+    if engine not in STORAGE_ENGINES:
+        raise ValueError(f"Unknown storage engine: {engine}")
+    return STORAGE_ENGINES[engine]()
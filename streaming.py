@@ -0,0 +1,163 @@
+import base64
+import binascii
+import io
+import uuid
+from collections import deque
+from typing import Any, Deque, Optional
+
+CHUNK_SIZE = 256 * 1024
+WINDOW = 4
+CHUNK_SEPARATOR = '\x00'
+BLOB_MARKER = '$blob'
+MANIFEST_PREFIX = ('{"' + BLOB_MARKER + '"').encode('utf-8')
+
+def chunk_key(key: str, blob_id: str, index: int) -> str:
+    return f"{key}{CHUNK_SEPARATOR}{blob_id}:{index}"
+
+def is_chunk_key(key: str) -> bool:
+    return CHUNK_SEPARATOR in key
+
+def is_manifest(value: Any) -> bool:
+    return isinstance(value, dict) and BLOB_MARKER in value
+
+def holds_manifest(value: Any) -> bool:
+    # Stored values may still be encoded; the writer always puts the marker first.
+    if isinstance(value, bytes):
+        return value.startswith(MANIFEST_PREFIX)
+    return is_manifest(value)
+
+def chunk_keys(key: str, manifest: dict) -> list:
+    return [chunk_key(key, manifest[BLOB_MARKER], index) for index in range(manifest['chunks'])]
+
+class BlobWriter(io.RawIOBase):
+    def __init__(self, client, key: str, chunk_size: int = CHUNK_SIZE, window: int = WINDOW, ttl: float = None):
+        self.client = client
+        self.key = key
+        self.chunk_size = chunk_size
+        self.window = window
+        self.ttl = ttl
+        self.blob_id = uuid.uuid4().hex
+        # One chunk is staged at a time and at most `window` are in flight, so memory stays
+        # bounded no matter how large the value is.
+        self.buffer = bytearray(chunk_size)
+        self.view = memoryview(self.buffer)
+        self.filled = 0
+        self.chunks = 0
+        self.size = 0
+        self.pending: Deque = deque()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = memoryview(data).cast('B')
+        written = len(data)
+        while data:
+            n = min(len(data), self.chunk_size - self.filled)
+            self.view[self.filled:self.filled + n] = data[:n]
+            self.filled += n
+            data = data[n:]
+            if self.filled == self.chunk_size:
+                self._send_chunk()
+        return written
+
+    def _send_chunk(self):
+        encoded = base64.b64encode(self.view[:self.filled]).decode('ascii')
+        self.pending.append(self.client._blob_set_async(chunk_key(self.key, self.blob_id, self.chunks), encoded, self.ttl))
+        self.chunks += 1
+        self.size += self.filled
+        self.filled = 0
+        while len(self.pending) > self.window:
+            self._wait_one()
+
+    def _wait_one(self):
+        if not self.client._wait(self.pending.popleft()):
+            raise IOError(f"Failed to store chunk of {self.key}")
+
+    def abort(self):
+        if self.closed:
+            return
+        try:
+            while self.pending:
+                self.client._wait(self.pending.popleft())
+            self.client.mdelete([chunk_key(self.key, self.blob_id, index) for index in range(self.chunks)])
+        finally:
+            super().close()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self.filled:
+                self._send_chunk()
+            while self.pending:
+                self._wait_one()
+            previous = self.client.get(self.key)
+            manifest = {BLOB_MARKER: self.blob_id, 'size': self.size, 'chunks': self.chunks, 'chunk_size': self.chunk_size}
+            # Chunks are immutable and the manifest is switched last, so readers see the old
+            # value or the new one, never a mix.
+            if not self.client._wait(self.client._blob_set_async(self.key, manifest, self.ttl)):
+                raise IOError(f"Failed to store manifest of {self.key}")
+            if is_manifest(previous) and previous[BLOB_MARKER] != self.blob_id:
+                self.client.mdelete(chunk_keys(self.key, previous))
+        finally:
+            super().close()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def __del__(self):
+        # IOBase would close, and so publish, a writer that was dropped half way through.
+        pass
+
+class BlobReader(io.RawIOBase):
+    def __init__(self, client, key: str, manifest: dict, window: int = WINDOW):
+        self.client = client
+        self.key = key
+        self.manifest = manifest
+        self.window = window
+        self.size = manifest['size']
+        self.buffer = bytearray(manifest['chunk_size'])
+        self.current = memoryview(self.buffer)[:0]
+        self.next_chunk = 0
+        self.pending: Deque = deque()
+
+    def readable(self) -> bool:
+        return True
+
+    def _prefetch(self):
+        while len(self.pending) < self.window and self.next_chunk < self.manifest['chunks']:
+            self.pending.append(self.client.get_async(chunk_key(self.key, self.manifest[BLOB_MARKER], self.next_chunk)))
+            self.next_chunk += 1
+
+    def _next_chunk(self) -> bool:
+        self._prefetch()
+        if not self.pending:
+            return False
+        encoded = self.client._wait(self.pending.popleft())
+        if encoded is None:
+            raise IOError(f"Chunk of {self.key} is missing; the value was replaced or deleted while reading")
+        data = binascii.a2b_base64(encoded)
+        self.buffer[:len(data)] = data
+        self.current = memoryview(self.buffer)[:len(data)]
+        self._prefetch()
+        return True
+
+    def readinto(self, target) -> int:
+        if not self.current and not self._next_chunk():
+            return 0
+        n = min(len(target), len(self.current))
+        memoryview(target).cast('B')[:n] = self.current[:n]
+        self.current = self.current[n:]
+        return n
+
+def open_reader(client, key: str, window: int = WINDOW) -> Optional[BlobReader]:
+    manifest = client.get(key)
+    if manifest is None:
+        return None
+    if not is_manifest(manifest):
+        raise ValueError(f"Key {key} does not hold a streamed value")
+    return BlobReader(client, key, manifest, window)
@@ -0,0 +1,116 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from merkle import MerkleTree, differing_buckets, plan_repair
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+class TestMerkleTree(unittest.TestCase):
+    def test_incremental_updates(self):
+        tree = MerkleTree(depth=6)
+        tree.update('a', None, 1)
+        tree.update('a', 1, 2)
+        other = MerkleTree(depth=6)
+        other.update('a', None, 2)
+        self.assertEqual(tree.root, other.root)
+        tree.update('a', 2, None)
+        self.assertEqual(tree.root, 0)
+
+    def test_descent_finds_only_divergent_buckets(self):
+        local, remote = MerkleTree(depth=8), MerkleTree(depth=8)
+        for i in range(1000):
+            local.update(f"k{i}", None, 1)
+            remote.update(f"k{i}", None, 1)
+        remote.update('k7', 1, 2)
+        remote.update('extra', None, 1)
+        asked = []
+
+        def fetch(level, indices):
+            asked.extend(indices)
+            return remote.digests(level, indices)
+
+        buckets = differing_buckets(local, fetch)
+        self.assertEqual(sorted(buckets), sorted({local.bucket('k7'), local.bucket('extra')}))
+        self.assertLess(len(asked), 40)
+        self.assertEqual(differing_buckets(remote, lambda level, indices: remote.digests(level, indices)), [])
+
+    def test_plan_keeps_failed_over_keys(self):
+        plan = plan_repair({'a': 2, 'b': 1}, {'a': 1, 'c': 1, 'd': 1}, failover=['d'])
+        self.assertEqual(plan, {'push': ['a', 'b'], 'pull': ['d'], 'delete': ['c']})
+
+class TestAntiEntropy(unittest.TestCase):
+    next_port = 7090
+
+    def setUp(self):
+        port = TestAntiEntropy.next_port
+        TestAntiEntropy.next_port += 2
+        self.primary = KVStoreNode('ae_primary', 'localhost', port, anti_entropy_interval=0)
+        self.replica = KVStoreNode('ae_replica', 'localhost', port + 1, anti_entropy_interval=0)
+        for node in (self.primary, self.replica):
+            threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.3)
+        self.primary.add_replica({'node_id': self.replica.node_id, 'host': self.replica.host, 'port': self.replica.port})
+
+    def tearDown(self):
+        for node in (self.primary, self.replica):
+            node.running = False
+            node.replication.close()
+
+    def test_repairs_only_what_diverged(self):
+        self.primary.mset({f"key:{i}": i for i in range(2000)})
+        self.replica.set('replica:own', 'mine')
+        self.assertEqual(self.primary.anti_entropy(self.replica_info())['buckets'], 0)
+        self.assertEqual(self.replica.trees['ae_primary'].root, self.primary.trees[''].root)
+
+        # Writes the replication stream never delivered.
+        self.primary.set('key:5', 'changed', sync_replicas=False)
+        self.primary.set('key:new', 'new', sync_replicas=False)
+        self.primary.delete('key:9', sync_replicas=False)
+        summary = self.primary.anti_entropy(self.replica_info())
+        self.assertLessEqual(summary['buckets'], 3)
+        self.assertEqual((summary['pushed'], summary['deleted']), (2, 1))
+        self.assertEqual(self.replica.get('key:5'), 'changed')
+        self.assertEqual(self.replica.get('key:new'), 'new')
+        self.assertIsNone(self.replica.get('key:9'))
+        self.assertEqual(self.replica.get('replica:own'), 'mine')
+        self.assertIsNone(self.primary.get('replica:own'))
+        self.assertEqual(self.primary.anti_entropy(self.replica_info())['buckets'], 0)
+
+    def test_failed_over_writes_are_pulled(self):
+        self.primary.set('doc', 'v1')
+        self.assertTrue(wait_until(lambda: self.replica.get('doc') == 'v1'))
+        # What the coordinator sends the replica while the primary is unreachable.
+        for key, value in (('doc', 'v9'), ('created', 'new')):
+            response = self.primary._send_to_node(self.replica_info(), {'operation': 'SET', 'key': key, 'value': value, 'owner': 'ae_primary'})
+            self.assertTrue(response['success'])
+        summary = self.primary.anti_entropy(self.replica_info())
+        self.assertEqual((summary['pulled'], summary['deleted']), (2, 0))
+        self.assertEqual(self.primary.get('doc'), 'v9')
+        self.assertEqual(self.primary.get('created'), 'new')
+        self.assertEqual(self.replica.get('created'), 'new')
+        self.assertEqual(self.primary.anti_entropy(self.replica_info())['buckets'], 0)
+
+    def test_triggered_over_the_wire(self):
+        self.primary.set('lost', 1, sync_replicas=False)
+        response = self.primary._process_request({'operation': 'ANTI_ENTROPY'})
+        self.assertEqual(response['results']['ae_replica']['pushed'], 1)
+        self.assertEqual(self.replica.get('lost'), 1)
+        self.assertIn('ae_replica', self.primary._process_request({'operation': 'HEALTH'})['anti_entropy'])
+
+    def replica_info(self):
+        return {'node_id': self.replica.node_id, 'host': self.replica.host, 'port': self.replica.port}
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from client import KVClient
+
+class TestAsyncServer(unittest.TestCase):
+    def setUp(self):
+        self.coordinator = None
+        self.nodes = []
+
+    def tearDown(self):
+        if self.coordinator:
+            self.coordinator.running = False
+        for node in self.nodes:
+            node.running = False
+
+    def test_async_cluster(self):
+        self.coordinator = Coordinator('localhost', 5100)
+        threading.Thread(target=self.coordinator.start_async_server, daemon=True).start()
+        time.sleep(0.5)
+
+        for i in range(2):
+            node = KVStoreNode(f"async_node_{i}", 'localhost', 6100 + i,
+                               coordinator_host='localhost', coordinator_port=5100)
+            threading.Thread(target=node.start_async_server, daemon=True).start()
+            self.nodes.append(node)
+        time.sleep(1)
+
+        client = KVClient('localhost', 5100)
+        self.assertEqual(client.health()['node_count'], 2)
+        for i in range(20):
+            self.assertTrue(client.set(f"async:{i}", {'i': i, 'pad': 'x' * 4096}))
+        for i in range(20):
+            self.assertEqual(client.get(f"async:{i}")['i'], i)
+        self.assertTrue(client.delete("async:0"))
+        self.assertIsNone(client.get("async:0"))
+        client.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import threading
+import time
+import sys
+import os
+import tempfile
+import shutil
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from client import KVClient
+
+class TestAtomicOperations(unittest.TestCase):
+    def setUp(self):
+        self.node = KVStoreNode('atomic_node', 'localhost', 0)
+
+    def test_incr_decr(self):
+        self.assertEqual(self.node.incr('counter')[0], 1)
+        self.assertEqual(self.node.incr('counter', 10)[0], 11)
+        response = self.node._process_request({'operation': 'DECR', 'key': 'counter', 'delta': 3})
+        self.assertEqual(response['value'], 8)
+        self.assertEqual(response['version'], 3)
+
+        self.node.set('name', 'alice')
+        response = self.node._process_request({'operation': 'INCR', 'key': 'name'})
+        self.assertFalse(response['success'])
+        self.assertIn('not an integer', response['error'])
+
+    def test_append(self):
+        self.assertEqual(self.node.append('log', 'a')[0], 'a')
+        self.assertEqual(self.node.append('log', 'bc')[0], 'abc')
+        self.node.set('items', [1])
+        self.assertEqual(self.node._process_request({'operation': 'APPEND', 'key': 'items', 'value': 2})['length'], 2)
+        self.assertEqual(self.node.get('items'), [1, 2])
+
+    def test_cas(self):
+        self.assertEqual(self.node.compare_and_set('k', 'first', 0), (True, 1))
+        self.assertEqual(self.node.compare_and_set('k', 'lost', 0), (False, 1))
+        self.assertEqual(self.node.compare_and_set('k', 'second', 1), (True, 2))
+        self.assertEqual(self.node.get('k'), 'second')
+
+    def test_concurrent_increments(self):
+        def work():
+            for _ in range(200):
+                self.node.incr('hits')
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.node.get('hits'), 1600)
+        self.assertEqual(self.node.get_entry('hits')['version'], 1600)
+
+    def test_incr_keeps_ttl(self):
+        self.node.set('session', 1, ttl=0.1)
+        self.node.incr('session')
+        time.sleep(0.2)
+        self.assertIsNone(self.node.get('session'))
+
+    def test_wal_replays_deltas_once(self):
+        data_dir = tempfile.mkdtemp()
+        try:
+            node = KVStoreNode('atomic_durable', 'localhost', 0, data_dir=data_dir)
+            for _ in range(5):
+                node.incr('counter')
+            node.append('log', 'x')
+            node.write_snapshot()
+            for _ in range(3):
+                node.incr('counter')
+            node.append('log', 'y')
+            node.wal.close()
+            restored = KVStoreNode('atomic_durable', 'localhost', 0, data_dir=data_dir)
+            self.assertEqual(restored.get('counter'), 8)
+            self.assertEqual(restored.get('log'), 'xy')
+            restored.wal.close()
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+class TestAtomicReplication(unittest.TestCase):
+    def test_deltas_reach_replica(self):
+        primary = KVStoreNode('atomic_primary', 'localhost', 7087)
+        replica = KVStoreNode('atomic_replica', 'localhost', 7088)
+        for node in (primary, replica):
+            threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.3)
+        primary.add_replica({'node_id': replica.node_id, 'host': replica.host, 'port': replica.port})
+        sent = []
+        append = primary.replication.append
+        primary.replication.append = lambda entry: sent.append(entry) or append(entry)
+        try:
+            for _ in range(5):
+                primary.incr('counter', 2)
+            primary.append('log', 'ab')
+            self.assertEqual(replica.get('counter'), 10)
+            self.assertEqual(replica.get_entry('counter')['version'], 5)
+            self.assertEqual(replica.get('log'), 'ab')
+            self.assertEqual([entry['operation'] for entry in sent], ['INCR'] * 5 + ['APPEND'])
+            self.assertNotIn('value', sent[0])
+        finally:
+            for node in (primary, replica):
+                node.running = False
+                node.replication.close()
+
+class TestAtomicThroughCoordinator(unittest.TestCase):
+    def test_client_operations(self):
+        coordinator = Coordinator('localhost', 5985)
+        threading.Thread(target=coordinator.start_server, daemon=True).start()
+        nodes = [KVStoreNode(f"atomic_routed_{i}", 'localhost', 7085 + i) for i in range(2)]
+        for node in nodes:
+            threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.5)
+        for node in nodes:
+            coordinator.register_node(node.node_id, node.host, node.port)
+        clients = [KVClient('localhost', 5985), KVClient('localhost', 5985, smart=True)]
+
+        try:
+            for client in clients:
+                prefix = 'smart' if client.smart else 'plain'
+                self.assertEqual(client.incr(f"{prefix}:views"), 1)
+                self.assertEqual(client.incr(f"{prefix}:views", 4), 5)
+                self.assertEqual(client.decr(f"{prefix}:views"), 4)
+                self.assertEqual(client.append(f"{prefix}:log", 'ab'), 2)
+                self.assertEqual(client.append(f"{prefix}:log", 'c'), 3)
+
+                self.assertTrue(client.cas(f"{prefix}:doc", {'rev': 1}, 0))
+                value, version = client.get_versioned(f"{prefix}:doc")
+                self.assertEqual(value, {'rev': 1})
+                self.assertFalse(client.cas(f"{prefix}:doc", {'rev': 'lost'}, version - 1))
+                self.assertTrue(client.cas(f"{prefix}:doc", {'rev': 2}, version))
+                self.assertEqual(client.get(f"{prefix}:doc"), {'rev': 2})
+        finally:
+            for client in clients:
+                client.close()
+            coordinator.running = False
+            for node in nodes:
+                node.running = False
+
+if __name__ == "__main__":
+    unittest.main()
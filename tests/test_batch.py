@@ -0,0 +1,58 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from client import KVClient
+
+class TestBatchOperations(unittest.TestCase):
+    def setUp(self):
+        self.coordinator = Coordinator('localhost', 5200)
+        threading.Thread(target=self.coordinator.start_server, daemon=True).start()
+        time.sleep(0.5)
+
+        self.nodes = []
+        for i in range(3):
+            node = KVStoreNode(f"batch_node_{i}", 'localhost', 6200 + i,
+                               coordinator_host='localhost', coordinator_port=5200)
+            threading.Thread(target=node.start_server, daemon=True).start()
+            self.nodes.append(node)
+        time.sleep(1)
+
+        for i, node in enumerate(self.nodes):
+            replica_target = self.nodes[(i + 1) % len(self.nodes)]
+            node.add_replica({
+                'node_id': replica_target.node_id,
+                'host': replica_target.host,
+                'port': replica_target.port
+            })
+
+    def tearDown(self):
+        self.coordinator.running = False
+        for node in self.nodes:
+            node.running = False
+
+    def test_mset_mget_mdelete(self):
+        client = KVClient('localhost', 5200)
+        items = {f"batch:{i}": {'i': i} for i in range(50)}
+
+        self.assertTrue(all(client.mset(items).values()))
+        self.assertEqual(client.mget(list(items)), items)
+        self.assertEqual(sum(len(node.data) for node in self.nodes), 2 * len(items))
+
+        result = client.mget(['batch:1', 'batch:missing'])
+        self.assertEqual(result, {'batch:1': {'i': 1}, 'batch:missing': None})
+
+        deleted = client.mdelete(['batch:1', 'batch:2', 'batch:missing'])
+        self.assertEqual(deleted, {'batch:1': True, 'batch:2': True, 'batch:missing': False})
+        self.assertIsNone(client.get('batch:1'))
+        self.assertEqual(sum(len(node.data) for node in self.nodes), 2 * (len(items) - 2))
+        client.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consistent_hashing import ConsistentHash
+
+def linear_nodes(ring: ConsistentHash, key: str, count: int):
+    hash_key = ring._hash(key)
+    keys = ring.sorted_keys
+    start = next((i for i, ring_key in enumerate(keys) if ring_key >= hash_key), 0)
+    nodes = []
+    for i in range(len(keys)):
+        node = ring.ring[keys[(start + i) % len(keys)]]
+        if node not in nodes:
+            nodes.append(node)
+        if len(nodes) == count:
+            break
+    return nodes
+
+class TestConsistentHash(unittest.TestCase):
+    def test_matches_linear_scan(self):
+        ring = ConsistentHash([f"node_{i}" for i in range(7)], virtual_nodes=20)
+        for i in range(500):
+            key = f"key:{i}"
+            self.assertEqual(ring.get_node(key), linear_nodes(ring, key, 1)[0])
+            for count in (1, 2, 3, 5):
+                self.assertEqual(ring.get_nodes(key, count=count), linear_nodes(ring, key, count))
+
+    def test_incremental_add_and_remove(self):
+        ring = ConsistentHash(['a', 'b', 'c'], virtual_nodes=50)
+        self.assertEqual(ring.sorted_keys, sorted(ring.ring))
+        before = {f"k{i}": ring.get_node(f"k{i}") for i in range(200)}
+
+        ring.add_node('d')
+        self.assertEqual(len(ring.sorted_keys), 200)
+        self.assertEqual(ring.sorted_keys, sorted(ring.ring))
+        for key, node in before.items():
+            self.assertIn(ring.get_node(key), (node, 'd'))
+
+        ring.remove_node('d')
+        self.assertEqual(ring.sorted_keys, sorted(ring.ring))
+        self.assertEqual({key: ring.get_node(key) for key in before}, before)
+
+    def test_empty_and_small_rings(self):
+        ring = ConsistentHash()
+        self.assertIsNone(ring.get_node('x'))
+        self.assertEqual(ring.get_nodes('x', count=2), [])
+        ring.add_node('only')
+        self.assertEqual(ring.get_nodes('x', count=3), ['only'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import threading
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from expiry import EvictionPolicy
+
+class TestExpiry(unittest.TestCase):
+    def wait_until(self, predicate, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.05)
+        return predicate()
+
+    def test_ttl_keys_expire_lazily_and_by_sweep(self):
+        node = KVStoreNode('ttl_node', 'localhost', 0, expiry_sweep_interval=0.05)
+        node.set('short', 1, ttl=0.2)
+        node.mset({f"batch{i}": i for i in range(100)}, ttl=0.2)
+        node.set('forever', 2)
+        self.assertEqual(node.get('short'), 1)
+
+        time.sleep(0.25)
+        self.assertIsNone(node.get('short'))
+        self.assertTrue(self.wait_until(lambda: len(node.data) == 1))
+        self.assertEqual(node.get('forever'), 2)
+        self.assertFalse(node.delete('short'))
+
+        stats = node.cache_status()
+        self.assertEqual(stats['expired'], 101)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['ttl_keys'], 0)
+
+    def test_set_without_ttl_clears_expiry(self):
+        node = KVStoreNode('ttl_reset_node', 'localhost', 0)
+        node.set('a', 1, ttl=0.1)
+        node.set('a', 2)
+        time.sleep(0.15)
+        self.assertEqual(node.get('a'), 2)
+        self.assertEqual(node._process_request({'operation': 'SET', 'key': 'b', 'value': 1, 'ttl': -1})['success'], False)
+
+    def test_expiry_survives_restart(self):
+        data_dir = tempfile.mkdtemp()
+        try:
+            node = KVStoreNode('ttl_disk_node', 'localhost', 0, data_dir=data_dir)
+            node.set('wal_short', 1, ttl=0.3)
+            node.set('snap_short', 1, ttl=0.3)
+            node.set('kept', 1, ttl=60)
+            node.write_snapshot()
+            node.wal.close()
+
+            restarted = KVStoreNode('ttl_disk_node', 'localhost', 0, data_dir=data_dir)
+            self.assertEqual(restarted.get('snap_short'), 1)
+            time.sleep(0.35)
+            self.assertIsNone(restarted.get('snap_short'))
+            self.assertIsNone(restarted.get('wal_short'))
+            self.assertEqual(restarted.get('kept'), 1)
+            restarted.wal.close()
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    def test_memory_ceiling_evicts_cold_keys(self):
+        for policy in ('lru', 'lfu'):
+            with self.subTest(policy=policy):
+                node = KVStoreNode(f"evict_{policy}", 'localhost', 0, max_memory=50000, eviction_policy=policy, eviction_samples=10)
+                node.set('hot', 'x' * 100)
+                for i in range(500):
+                    node.set(f"key{i}", 'x' * 100)
+                    node.get('hot')
+                stats = node.cache_status()
+                self.assertLessEqual(stats['used_memory'], 50000)
+                self.assertGreater(stats['evicted'], 0)
+                self.assertEqual(len(node.data), 500 + 1 - stats['evicted'])
+                self.assertEqual(node.get('hot'), 'x' * 100)
+
+    def test_unknown_policy_rejected(self):
+        with self.assertRaises(ValueError):
+            EvictionPolicy('random')
+
+    def test_expirations_replicate(self):
+        primary = KVStoreNode('ttl_primary', 'localhost', 6500, expiry_sweep_interval=0.05)
+        replica = KVStoreNode('ttl_replica', 'localhost', 6501, replica_of='ttl_primary', expiry_sweep_interval=3600)
+        threading.Thread(target=replica.start_server, daemon=True).start()
+        time.sleep(0.3)
+        try:
+            primary.add_replica({'node_id': replica.node_id, 'host': replica.host, 'port': replica.port})
+            primary.set('a', 1, ttl=0.2)
+            self.assertEqual(replica.expiry.get('a'), primary.expiry.get('a'))
+            self.assertTrue(self.wait_until(lambda: 'a' not in replica.data))
+            self.assertIsNone(replica.get('a'))
+        finally:
+            replica.running = False
+            primary.replication.close()
+
+if __name__ == "__main__":
+    unittest.main()
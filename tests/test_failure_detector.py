@@ -0,0 +1,105 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from failure_detector import FailureDetector, CircuitBreaker, PhiAccrual
+
+class TestDetector(unittest.TestCase):
+    def test_phi_grows_with_silence(self):
+        phi = PhiAccrual()
+        for i in range(10):
+            phi.heartbeat(i * 0.5)
+        self.assertLess(phi.phi(4.6), 1)
+        self.assertGreater(phi.phi(4.5 + 10), 8)
+
+    def test_breaker_opens_and_half_opens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=1.0)
+        breaker.record_failure(0)
+        self.assertTrue(breaker.allow(0))
+        breaker.record_failure(0)
+        self.assertFalse(breaker.allow(0.5))
+        self.assertTrue(breaker.allow(1.0))
+        self.assertFalse(breaker.allow(1.0))
+        breaker.record_failure(1.1)
+        self.assertEqual(breaker.state, 'open')
+        self.assertTrue(breaker.allow(2.1))
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_heartbeats_mark_nodes_down_and_recovered(self):
+        down = set()
+        changes = []
+
+        def probe(node_info, timeout):
+            if node_info['node_id'] in down:
+                raise ConnectionRefusedError()
+
+        detector = FailureDetector(failure_threshold=2, reset_timeout=60, probe=probe,
+                                   on_change=lambda node_info, up: changes.append((node_info['node_id'], up)))
+        for node_id in ('a', 'b'):
+            detector.track({'node_id': node_id, 'host': 'localhost', 'port': 0})
+        detector.check()
+        down.add('b')
+        detector.check()
+        self.assertTrue(detector.available('b'))
+        detector.check()
+        self.assertFalse(detector.available('b'))
+        self.assertTrue(detector.available('a'))
+        self.assertEqual(detector.suspected(), ['b'])
+
+        down.clear()
+        detector.check()
+        self.assertTrue(detector.available('b'))
+        self.assertEqual(changes, [('b', False), ('b', True)])
+
+class TestCoordinatorFailover(unittest.TestCase):
+    def test_suspected_primary_is_skipped(self):
+        coordinator = Coordinator('localhost', 5900, heartbeat_interval=0.05, heartbeat_timeout=0.2, breaker_failures=2)
+        nodes = [KVStoreNode(f"fd_node_{i}", 'localhost', 6900 + i) for i in range(2)]
+        for node in nodes:
+            threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.3)
+        for i, node in enumerate(nodes):
+            coordinator.register_node(node.node_id, node.host, node.port)
+            other = nodes[1 - i]
+            node.add_replica({'node_id': other.node_id, 'host': other.host, 'port': other.port})
+
+        try:
+            self.assertTrue(coordinator.route_request('fd_key', 'SET', 'value')['success'])
+            primary_id = coordinator.consistent_hash.get_node('fd_key')
+            primary = next(node for node in nodes if node.node_id == primary_id)
+            time.sleep(0.2)
+
+            # Stop answering HEALTH the way a wedged process would.
+            original = primary._process_request
+            primary._process_request = lambda request: time.sleep(1) or original(request)
+            deadline = time.time() + 5
+            while primary_id not in coordinator.failure_detector.suspected() and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertIn(primary_id, coordinator.failure_detector.suspected())
+
+            start = time.perf_counter()
+            response = coordinator.route_request('fd_key', 'GET')
+            self.assertLess(time.perf_counter() - start, 0.5)
+            self.assertTrue(response['success'])
+
+            primary._process_request = original
+            deadline = time.time() + 5
+            while primary_id in coordinator.failure_detector.suspected() and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(coordinator.failure_detector.suspected(), [])
+        finally:
+            coordinator.failure_detector.stop()
+            for node in nodes:
+                node.running = False
+                node.replication.close()
+            coordinator.pools.close_all()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RWlock import LockStripes, StripeLock
+
+class TestLockStripes(unittest.TestCase):
+    def test_keys_map_to_fixed_stripes(self):
+        stripes = LockStripes(size=64)
+        self.assertIs(stripes.for_key('user:1'), stripes.for_key('user:1'))
+        self.assertIs(stripes.for_key('user:1'), stripes._stripes[hash('user:1') % 64])
+        used = {id(stripes.for_key(f"key:{i}")) for i in range(1000)}
+        self.assertEqual(len(used), 64)
+
+    def test_for_keys_dedups_and_orders(self):
+        stripes = LockStripes(size=8)
+        keys = [f"key:{i}" for i in range(50)]
+        locks = stripes.for_keys(keys)
+        self.assertEqual(len(locks), len({hash(key) % 8 for key in keys}))
+        self.assertEqual(len({id(lock) for lock in locks}), len(locks))
+        # Every caller takes the stripes in index order, whatever order the keys came in.
+        indexes = [stripes._stripes.index(lock) for lock in locks]
+        self.assertEqual(indexes, sorted(indexes))
+        self.assertEqual(stripes.for_keys(reversed(keys)), locks)
+        self.assertEqual(stripes.for_keys(['same', 'same']), [stripes.for_key('same')])
+
+class TestStripeLock(unittest.TestCase):
+    def test_read_retried_when_a_write_overlaps(self):
+        lock = StripeLock()
+        calls = []
+
+        def reader():
+            calls.append(lock.sequence)
+            if len(calls) == 1:
+                lock.acquire_write()
+                lock.release_write()
+            return len(calls)
+
+        self.assertEqual(lock.read_optimistic(reader), 2)
+        self.assertEqual(calls, [0, 2])
+
+    def test_falls_back_to_read_lock(self):
+        lock = StripeLock()
+        calls = []
+
+        def busy_reader():
+            calls.append(1)
+            # A write that completes during every optimistic attempt.
+            lock.sequence += 2
+            return 'value'
+
+        self.assertEqual(lock.read_optimistic(busy_reader, retries=3), 'value')
+        self.assertEqual(len(calls), 4)
+
+        # While a writer holds the stripe no optimistic read is attempted; the reader waits on the lock.
+        calls.clear()
+        results = []
+        lock.acquire_write()
+        reader = threading.Thread(target=lambda: results.append(lock.read_optimistic(lambda: calls.append(1) or 'after')))
+        reader.start()
+        time.sleep(0.1)
+        self.assertEqual((calls, results), ([], []))
+        lock.release_write()
+        reader.join(2)
+        self.assertEqual((calls, results), ([1], ['after']))
+
+    def test_concurrent_reads_never_see_torn_values(self):
+        lock = StripeLock()
+        state = {'a': 0, 'b': 0}
+        running = True
+        torn = []
+
+        def writer():
+            n = 0
+            while running:
+                n += 1
+                lock.acquire_write()
+                try:
+                    state['a'] = n
+                    time.sleep(0)
+                    state['b'] = n
+                finally:
+                    lock.release_write()
+
+        def reader():
+            while running:
+                a, b = lock.read_optimistic(lambda: (state['a'], state['b']))
+                if a != b:
+                    torn.append((a, b))
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.5)
+        running = False
+        for thread in threads:
+            thread.join(2)
+        self.assertEqual(torn, [])
+        self.assertGreater(state['b'], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coordinator import Coordinator
+from node_launcher import NodeLauncher
+from codec import load_value
+
+class TestNodeLauncher(unittest.TestCase):
+    def wait_until(self, predicate, timeout=20):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.1)
+        return predicate()
+
+    def test_workers_register_restart_and_unregister(self):
+        coordinator = Coordinator('localhost', 5950)
+        threading.Thread(target=coordinator.start_server, daemon=True).start()
+        time.sleep(0.3)
+        launcher = NodeLauncher('localhost', 7050, 2, 'localhost', 5950, node_id='launch', quiet=True)
+        try:
+            launcher.start(timeout=30)
+            self.assertTrue(self.wait_until(lambda: set(coordinator.nodes) == {'launch.w0', 'launch.w1'}))
+            for i in range(20):
+                self.assertTrue(coordinator.route_request(f"k{i}", 'SET', i)['success'])
+            owners = {coordinator.consistent_hash.get_node(f"k{i}") for i in range(20)}
+            self.assertEqual(owners, {'launch.w0', 'launch.w1'})
+
+            crashed = launcher.workers[0].process
+            crashed.kill()
+            crashed.join()
+            self.assertTrue(self.wait_until(lambda: launcher.workers[0].process is not crashed and launcher.wait_ready(1)))
+            self.assertEqual(launcher.status()[0]['restarts'], 1)
+            self.assertTrue(coordinator.route_request('k0', 'SET', 'again')['success'])
+            self.assertEqual(load_value(coordinator.route_request('k0', 'GET')['value']), 'again')
+        finally:
+            launcher.stop(drain_timeout=10)
+            coordinator.running = False
+        self.assertEqual(coordinator.nodes, {})
+        self.assertFalse(any(status['alive'] for status in launcher.status()))
+
+if __name__ == "__main__":
+    unittest.main()
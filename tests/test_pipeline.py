@@ -0,0 +1,169 @@
+import unittest
+import threading
+import socket
+import time
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from protocol import serve_connection, recv_message, RequestNotSent
+from pipeline import PipelinedConnection, PipelinePool
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from client import KVClient
+
+class TestPipelining(unittest.TestCase):
+    def test_out_of_order_responses(self):
+        def handler(request):
+            if request['key'] == 'slow':
+                time.sleep(0.5)
+            return {'key': request['key']}
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('localhost', 0))
+        server.listen(1)
+        executor = ThreadPoolExecutor(max_workers=4)
+
+        def serve():
+            conn, _ = server.accept()
+            with conn:
+                serve_connection(conn, handler, lambda: True, executor)
+
+        threading.Thread(target=serve, daemon=True).start()
+        conn = PipelinedConnection('localhost', server.getsockname()[1])
+        try:
+            slow = conn.submit({'key': 'slow'})
+            fast = [conn.submit({'key': f"fast:{i}"}) for i in range(10)]
+            for i, future in enumerate(fast):
+                self.assertEqual(future.result(0.4), {'key': f"fast:{i}"})
+            self.assertFalse(slow.done())
+            self.assertEqual(slow.result(2), {'key': 'slow'})
+        finally:
+            conn.close()
+            server.close()
+            executor.shutdown(wait=False)
+
+    def start_delay_server(self):
+        def handler(request):
+            time.sleep(request.get('delay', 0))
+            return {'success': True, 'value': request.get('key')}
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('localhost', 0))
+        server.listen(8)
+        executor = ThreadPoolExecutor(max_workers=4)
+
+        def serve():
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except OSError:
+                    return
+                threading.Thread(target=serve_connection, args=(conn, handler, lambda: True, executor), daemon=True).start()
+
+        threading.Thread(target=serve, daemon=True).start()
+        self.addCleanup(executor.shutdown, wait=False)
+        self.addCleanup(server.close)
+        return server.getsockname()[1]
+
+    def test_timeout_fails_only_its_own_request(self):
+        conn = PipelinedConnection('localhost', self.start_delay_server(), timeout=0.5)
+        try:
+            slow = ThreadPoolExecutor(max_workers=1).submit(conn.request, {'key': 'slow', 'delay': 1.0})
+            time.sleep(0.4)
+            fast = conn.submit({'key': 'fast', 'delay': 0.3})
+            with self.assertRaises(TimeoutError):
+                slow.result(2)
+            self.assertEqual(fast.result(2)['value'], 'fast')
+            time.sleep(0.6)
+            self.assertFalse(conn.closed)
+            self.assertEqual(conn.in_flight, 0)
+            self.assertEqual(conn.request({'key': 'after'})['value'], 'after')
+        finally:
+            conn.close()
+
+    def test_client_timeout_leaves_other_calls_alone(self):
+        client = KVClient('localhost', self.start_delay_server(), timeout=0.5, codec='json')
+        delays = {'slow': 1.0, 'fast': 0.3}
+        try:
+            connection = client._connection()
+            with patch.object(client, '_dispatch', lambda request: connection.submit(dict(request, delay=delays[request['key']]))):
+                fast = []
+                threading.Timer(0.4, lambda: fast.append(client.get_async('fast'))).start()
+                start = time.monotonic()
+                self.assertIsNone(client.get('slow'))
+                self.assertLess(time.monotonic() - start, 0.8)
+                time.sleep(0.1)
+                self.assertEqual(fast[0].result(2), 'fast')
+            self.assertIs(client._connection(), connection)
+            time.sleep(0.5)
+            self.assertEqual(connection.in_flight, 0)
+        finally:
+            client.close()
+
+    def test_pool_retries_only_unsent_requests(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('localhost', 0))
+        server.listen(8)
+        received = []
+
+        def serve():
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except OSError:
+                    return
+                # Read the request, then drop the connection without answering.
+                with conn:
+                    received.append(recv_message(conn))
+
+        threading.Thread(target=serve, daemon=True).start()
+        pool = PipelinePool('localhost', server.getsockname()[1], max_size=1, timeout=2)
+        try:
+            with self.assertRaises(ConnectionError) as raised:
+                pool.request({'n': 1})
+            self.assertNotIsInstance(raised.exception, RequestNotSent)
+            self.assertEqual(received, [{'n': 1, 'request_id': 0}])
+
+            # A connection found closed before the write is retried on a fresh one.
+            port = server.getsockname()[1]
+            dead = PipelinedConnection('localhost', port)
+            dead.close()
+            with patch.object(pool, '_pick', side_effect=[dead, PipelinedConnection('localhost', port)]):
+                with self.assertRaises(ConnectionError):
+                    pool.request({'n': 2})
+            self.assertEqual(received[-1], {'n': 2, 'request_id': 0})
+        finally:
+            pool.close()
+            server.close()
+
+    def test_client_futures(self):
+        coordinator = Coordinator('localhost', 5300)
+        threading.Thread(target=coordinator.start_server, daemon=True).start()
+        time.sleep(0.5)
+        nodes = []
+        for i in range(2):
+            node = KVStoreNode(f"pipe_node_{i}", 'localhost', 6300 + i,
+                               coordinator_host='localhost', coordinator_port=5300)
+            threading.Thread(target=node.start_server, daemon=True).start()
+            nodes.append(node)
+        time.sleep(1)
+
+        client = KVClient('localhost', 5300)
+        try:
+            sets = [client.set_async(f"pipe:{i}", i) for i in range(200)]
+            self.assertTrue(all(future.result(10) for future in sets))
+            gets = [client.get_async(f"pipe:{i}") for i in range(200)]
+            self.assertEqual([future.result(10) for future in gets], list(range(200)))
+            self.assertEqual(client.get("pipe:7"), 7)
+        finally:
+            client.close()
+            coordinator.running = False
+            for node in nodes:
+                node.running = False
+
+if __name__ == "__main__":
+    unittest.main()
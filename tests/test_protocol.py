@@ -0,0 +1,155 @@
+import unittest
+import json
+import threading
+import socket
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import ThreadPoolExecutor
+from protocol import send_message, recv_message, serve_connection
+from connection_pool import ConnectionPool
+from codec import RawValue, encode_binary, decode_binary, encode_json, load_value
+from pipeline import PipelinedConnection
+
+class TestProtocol(unittest.TestCase):
+    def test_large_message_roundtrip(self):
+        left, right = socket.socketpair()
+        with left, right:
+            message = {'operation': 'SET', 'key': 'big', 'value': 'x' * (2 * 1024 * 1024)}
+            sender = threading.Thread(target=send_message, args=(left, message))
+            sender.start()
+            self.assertEqual(recv_message(right), message)
+            sender.join()
+
+    def test_clean_close_returns_none(self):
+        left, right = socket.socketpair()
+        left.close()
+        with right:
+            self.assertIsNone(recv_message(right))
+
+    def test_pool_reuses_and_reconnects(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('localhost', 0))
+        server.listen(8)
+        port = server.getsockname()[1]
+        accepted = []
+
+        def serve():
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except OSError:
+                    return
+                accepted.append(conn)
+                threading.Thread(target=echo, args=(conn,), daemon=True).start()
+
+        def echo(conn):
+            with conn:
+                while True:
+                    message = recv_message(conn)
+                    if message is None:
+                        return
+                    send_message(conn, {'echo': message})
+
+        threading.Thread(target=serve, daemon=True).start()
+        pool = ConnectionPool('localhost', port, max_size=2)
+        try:
+            for i in range(5):
+                self.assertEqual(pool.request({'n': i}), {'echo': {'n': i}})
+            self.assertEqual(len(accepted), 1)
+
+            accepted[0].shutdown(socket.SHUT_RDWR)
+            self.assertEqual(pool.request({'n': 'again'}), {'echo': {'n': 'again'}})
+            self.assertEqual(len(accepted), 2)
+        finally:
+            pool.close()
+            server.close()
+
+    def test_pool_does_not_retry_timeouts(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('localhost', 0))
+        server.listen(8)
+        received = []
+
+        def serve():
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except OSError:
+                    return
+                threading.Thread(target=answer, args=(conn,), daemon=True).start()
+
+        def answer(conn):
+            with conn:
+                while True:
+                    message = recv_message(conn)
+                    if message is None:
+                        return
+                    received.append(message)
+                    if message.get('n') != 'hang':
+                        send_message(conn, {'echo': message})
+
+        threading.Thread(target=serve, daemon=True).start()
+        pool = ConnectionPool('localhost', server.getsockname()[1], max_size=2, timeout=0.3)
+        try:
+            self.assertEqual(pool.request({'n': 1}), {'echo': {'n': 1}})
+            with self.assertRaises(socket.timeout):
+                pool.request({'n': 'hang'})
+            self.assertEqual(received, [{'n': 1}, {'n': 'hang'}])
+        finally:
+            pool.close()
+            server.close()
+
+    def test_binary_codec_roundtrip(self):
+        message = {'operation': 'SET', 'key': 'k\u00e9y', 'value': {'nested': [1, None]}, 'ttl': 5, 'request_id': 7}
+        decoded = decode_binary(encode_binary(message))
+        self.assertIsInstance(decoded['value'], RawValue)
+        self.assertEqual(dict(decoded, value=load_value(decoded['value'])), message)
+
+        response = {'success': False, 'error': 'boom', 'value': None, 'request_id': 'not-an-int'}
+        self.assertEqual(dict(decode_binary(encode_binary(response)), value=None), response)
+        self.assertEqual(decode_binary(encode_binary({'operation': 'CUSTOM'})), {'operation': 'CUSTOM'})
+
+    def test_raw_values_are_forwarded_without_decoding(self):
+        raw = RawValue(b'{"a":[1,2,3]}')
+        forwarded = decode_binary(encode_binary({'success': True, 'value': raw}))
+        self.assertEqual(bytes(forwarded['value']), bytes(raw))
+        self.assertEqual(json.loads(encode_json({'value': raw})), {'value': {'a': [1, 2, 3]}})
+
+    def test_connection_negotiates_codec(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('localhost', 0))
+        server.listen(8)
+        port = server.getsockname()[1]
+        executor = ThreadPoolExecutor(max_workers=4)
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return {'success': True, 'value': request.get('value')}
+
+        def serve():
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except OSError:
+                    return
+                threading.Thread(target=serve_connection, args=(conn, handler, lambda: True, executor), daemon=True).start()
+
+        threading.Thread(target=serve, daemon=True).start()
+        try:
+            for codec in ('binary', 'json'):
+                conn = PipelinedConnection('localhost', port, codec=codec)
+                self.assertEqual(conn.codec, codec)
+                response = conn.request({'operation': 'SET', 'key': 'a', 'value': [1, 2]})
+                self.assertEqual(load_value(response['value']), [1, 2])
+                self.assertEqual(isinstance(seen[-1]['value'], RawValue), codec == 'binary')
+                conn.close()
+        finally:
+            server.close()
+            executor.shutdown(wait=False)
+
+if __name__ == "__main__":
+    unittest.main()
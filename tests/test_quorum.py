@@ -0,0 +1,231 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from client import KVClient
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+class TestVersionedWrites(unittest.TestCase):
+    def setUp(self):
+        self.node = KVStoreNode('versioned_node', 'localhost', 0)
+
+    def test_older_write_is_dropped(self):
+        self.assertEqual(self.node.set_versioned('k', 'new', version=20), 20)
+        self.assertEqual(self.node.set_versioned('k', 'old', version=10), 20)
+        self.assertEqual(self.node.get('k'), 'new')
+
+    def test_delete_leaves_version_behind(self):
+        self.node.set_versioned('k', 'v', version=10)
+        self.assertFalse(self.node.delete('k', version=5))
+        self.assertTrue(self.node.delete('k', version=30))
+        response = self.node._process_request({'operation': 'GET', 'key': 'k'})
+        self.assertFalse(response['success'])
+        self.assertEqual(response['tombstone'], 30)
+        # Neither a stale copy nor a plain local write may end up below the delete.
+        self.assertEqual(self.node.set_versioned('k', 'stale', version=10), 30)
+        self.assertIsNone(self.node.get('k'))
+        self.assertEqual(self.node.set_versioned('k', 'again'), 31)
+
+    def test_atomic_version_floor(self):
+        self.node.incr('counter')
+        response = self.node._process_request({'operation': 'APPEND', 'key': 'log', 'value': 'ab', 'version': 100})
+        self.assertEqual((response['value'], response['version']), ('ab', 100))
+        self.assertEqual(self.node.incr('counter', min_version=50), (2, 50))
+        self.assertEqual(self.node.incr('counter'), (3, 51))
+
+class TestQuorumCluster(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.coordinator = Coordinator('localhost', 5990, replication_factor=3, rebalance=False)
+        threading.Thread(target=cls.coordinator.start_server, daemon=True).start()
+        cls.nodes = [KVStoreNode(f"quorum_node_{i}", 'localhost', 7100 + i) for i in range(3)]
+        for node in cls.nodes:
+            threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.5)
+        for node in cls.nodes:
+            cls.coordinator.register_node(node.node_id, node.host, node.port)
+        cls.client = KVClient('localhost', 5990)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+        cls.coordinator.running = False
+        for node in cls.nodes:
+            node.running = False
+
+    def test_writes_reach_every_replica(self):
+        self.assertTrue(self.client.set('q:user', {'name': 'alice'}))
+        self.assertTrue(wait_until(lambda: all(node.get('q:user') == {'name': 'alice'} for node in self.nodes)))
+        self.assertEqual(len({node.get_entry('q:user')['version'] for node in self.nodes}), 1)
+        self.assertEqual(self.client.get('q:user', r=3), {'name': 'alice'})
+
+        self.assertTrue(self.client.delete('q:user', w=3))
+        self.assertTrue(all(node.get('q:user') is None for node in self.nodes))
+        self.assertIsNone(self.client.get('q:user'))
+
+    def test_read_repairs_stale_replica(self):
+        self.client.set('q:profile', 'v1', w=3)
+        self.client.set('q:profile', 'v2', w=3)
+        stale = self.nodes[0]
+        entry = stale.get_entry('q:profile')
+        stale.delete('q:profile')
+        stale._write_entry('q:profile', 'v1', entry['timestamp'], entry['version'] - 1)
+
+        self.assertEqual(self.client.get('q:profile', r=3), 'v2')
+        self.assertTrue(wait_until(lambda: stale.get('q:profile') == 'v2'))
+        self.assertEqual(stale.get_entry('q:profile')['version'], self.nodes[1].get_entry('q:profile')['version'])
+
+    def test_missed_delete_is_not_resurrected(self):
+        self.client.set('q:session', 'token', w=3)
+        lagging = self.nodes[2]
+        entry = lagging.get_entry('q:session')
+        self.assertTrue(self.client.delete('q:session', w=3))
+        lagging._write_entry('q:session', 'token', entry['timestamp'], entry['version'])
+
+        self.assertIsNone(self.client.get('q:session', r=3))
+        self.assertTrue(wait_until(lambda: lagging.get('q:session') is None))
+        self.assertTrue(all(node.get('q:session') is None for node in self.nodes))
+
+    def test_atomic_operations_are_copied(self):
+        self.assertEqual(self.client.incr('q:views', 5), 5)
+        self.assertEqual(self.client.incr('q:views'), 6)
+        self.assertEqual(self.client.append('q:log', 'ab'), 2)
+        self.assertEqual(self.client.append('q:log', 'c'), 3)
+        value, version = self.client.get_versioned('q:views', r=3)
+        self.assertTrue(self.client.cas('q:views', 100, version))
+        self.assertTrue(wait_until(lambda: all(node.get('q:views') == 100 and node.get('q:log') == 'abc' for node in self.nodes)))
+
+    def test_lagging_replica_does_not_apply_update(self):
+        for _ in range(5):
+            self.client.incr('q:hits')
+        lagging = self.nodes_by_id()[self.coordinator.consistent_hash.get_nodes('q:hits', count=3)[0]]
+        entry = lagging.get_entry('q:hits')
+        for _ in range(5):
+            self.client.incr('q:hits')
+        lagging.delete('q:hits')
+        lagging._write_entry('q:hits', 5, entry['timestamp'], entry['version'])
+
+        self.assertEqual(self.client.incr('q:hits'), 11)
+        self.assertTrue(wait_until(lambda: all(node.get('q:hits') == 11 for node in self.nodes)))
+
+    def test_read_repair_keeps_ttl(self):
+        self.assertTrue(self.client.set('q:temp', 'soon', ttl=0.5, w=3))
+        stale = self.nodes[1]
+        stale.delete('q:temp')
+
+        self.assertEqual(self.client.get('q:temp', r=3), 'soon')
+        self.assertTrue(wait_until(lambda: stale.get('q:temp') == 'soon'))
+        time.sleep(0.6)
+        self.assertTrue(all(node.get('q:temp') is None for node in self.nodes))
+
+    def test_mset_is_replicated(self):
+        self.assertEqual(self.client.mset({'q:b1': 5, 'q:b2': 6}), {'q:b1': True, 'q:b2': True})
+        self.assertTrue(wait_until(lambda: all(node.get('q:b1') == 5 and node.get('q:b2') == 6 for node in self.nodes)))
+        self.assertEqual(len({node.get_entry('q:b1')['version'] for node in self.nodes}), 1)
+        self.assertEqual(self.client.mget(['q:b1', 'q:b2', 'q:b3']), {'q:b1': 5, 'q:b2': 6, 'q:b3': None})
+
+    def test_mdelete_is_replicated(self):
+        self.client.set('q:gone', 1, w=3)
+        self.assertEqual(self.client.mdelete(['q:gone']), {'q:gone': True})
+        self.assertTrue(wait_until(lambda: all(node.get('q:gone') is None for node in self.nodes)))
+        self.assertIsNone(self.client.get('q:gone', r=3))
+
+    def nodes_by_id(self):
+        return {node.node_id: node for node in self.nodes}
+
+    def test_quorum_sizes_per_request(self):
+        self.assertFalse(self.client.set('q:bad', 1, w=4))
+        response = self.coordinator.route_request('q:bad', 'SET', 1, w=4)
+        self.assertIn('between 1 and N=3', response['error'])
+        self.assertTrue(self.client.set('q:one', 1, n=1, w=1))
+        holders = [node for node in self.nodes if node.get('q:one') == 1]
+        self.assertEqual([node.node_id for node in holders], self.coordinator.consistent_hash.get_nodes('q:one', count=1))
+
+    def holders(self, key):
+        return [node.node_id for node in self.nodes if node.get(key) is not None]
+
+    def test_atomic_quorum_sizes_per_request(self):
+        self.assertEqual(self.client.incr('q:one_inc', 2, n=1, w=1), 2)
+        self.assertEqual(self.holders('q:one_inc'), self.coordinator.consistent_hash.get_nodes('q:one_inc', count=1))
+        self.assertIsNone(self.client.incr('q:one_inc', w=4))
+
+        self.assertEqual(self.client.decr('q:one_dec', 2, n=1, r=1), -2)
+        self.assertEqual(self.holders('q:one_dec'), self.coordinator.consistent_hash.get_nodes('q:one_dec', count=1))
+        self.assertIsNone(self.client.decr('q:one_dec', r=4))
+
+        self.assertEqual(self.client.append('q:one_log', 'ab', n=1, w=1), 2)
+        self.assertEqual(self.holders('q:one_log'), self.coordinator.consistent_hash.get_nodes('q:one_log', count=1))
+        self.assertIsNone(self.client.append('q:one_log', 'c', w=4))
+
+        self.assertTrue(self.client.set('q:one_cas', 1, n=1, w=1))
+        value, version = self.client.get_versioned('q:one_cas', n=1, r=1)
+        self.assertFalse(self.client.cas('q:one_cas', 2, version, w=4))
+        self.assertTrue(self.client.cas('q:one_cas', 2, version, n=1, r=1, w=1))
+        self.assertEqual(self.holders('q:one_cas'), self.coordinator.consistent_hash.get_nodes('q:one_cas', count=1))
+
+    def test_batch_quorum_sizes_per_request(self):
+        items = {'q:one_b1': 1, 'q:one_b2': 2}
+        self.assertEqual(self.client.mset(items, n=1, w=1), {'q:one_b1': True, 'q:one_b2': True})
+        for key in items:
+            self.assertEqual(self.holders(key), self.coordinator.consistent_hash.get_nodes(key, count=1))
+        self.assertEqual(self.client.mset(items, w=4), {'q:one_b1': False, 'q:one_b2': False})
+
+        self.assertEqual(self.client.mget(list(items), n=1, r=1), items)
+        self.assertEqual(self.client.mget(list(items), r=4), {'q:one_b1': None, 'q:one_b2': None})
+        response = self.coordinator.route_batch('MGET', list(items), r=4)
+        self.assertIn('between 1 and N=3', response['error'])
+
+        self.assertEqual(self.client.mset(items, w=3), {'q:one_b1': True, 'q:one_b2': True})
+        self.assertEqual(self.client.mdelete(list(items), w=4), {'q:one_b1': False, 'q:one_b2': False})
+        self.assertEqual(self.client.mdelete(list(items), w=3), {'q:one_b1': True, 'q:one_b2': True})
+        self.assertTrue(all(node.get(key) is None for node in self.nodes for key in items))
+
+    def test_smart_client_goes_through_coordinator(self):
+        client = KVClient('localhost', 5990, smart=True)
+        try:
+            self.assertTrue(client.set('q:smart', 'x'))
+            self.assertTrue(wait_until(lambda: all(node.get('q:smart') == 'x' for node in self.nodes)))
+            self.assertEqual(client.get('q:smart'), 'x')
+        finally:
+            client.close()
+
+class TestQuorumWithDeadReplica(unittest.TestCase):
+    def test_write_quorum_decides_outcome(self):
+        coordinator = Coordinator('localhost', 5991, replication_factor=3, rebalance=False, failure_detection=False)
+        threading.Thread(target=coordinator.start_server, daemon=True).start()
+        nodes = [KVStoreNode(f"quorum_live_{i}", 'localhost', 7103 + i) for i in range(2)]
+        for node in nodes:
+            threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.5)
+        for node in nodes:
+            coordinator.register_node(node.node_id, node.host, node.port)
+        coordinator.register_node('quorum_ghost', 'localhost', 7105)
+        client = KVClient('localhost', 5991)
+        try:
+            self.assertTrue(client.set('q:dead', 'ok', w=2))
+            self.assertFalse(client.set('q:dead', 'all', w=3))
+            self.assertEqual(client.get('q:dead', r=2), 'all')
+            self.assertIsNone(client.get('q:dead', r=3))
+            self.assertGreaterEqual(coordinator.quorum_stats['write_failures'], 1)
+            self.assertGreaterEqual(coordinator.quorum_stats['read_failures'], 1)
+        finally:
+            client.close()
+            coordinator.running = False
+            for node in nodes:
+                node.running = False
+
+if __name__ == "__main__":
+    unittest.main()
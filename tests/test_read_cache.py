@@ -0,0 +1,98 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from read_cache import ReadCache, InvalidationNotifier
+from codec import load_value
+
+class TestReadCache(unittest.TestCase):
+    def test_lru_evicts_by_bytes(self):
+        cache = ReadCache(1000)
+        for i in range(10):
+            cache.put(f"k{i}", 'x' * 100, 1)
+        self.assertLessEqual(cache.status()['used_bytes'], 1000)
+        self.assertIsNone(cache.get('k0'))
+        self.assertEqual(cache.get('k9'), ('x' * 100, 1))
+
+    def test_tinylfu_keeps_hot_keys_under_scan(self):
+        cache = ReadCache(20000, policy='tinylfu')
+        for _ in range(20):
+            for i in range(50):
+                if cache.get(f"hot{i}") is None:
+                    cache.put(f"hot{i}", 'v' * 100, 1)
+        for i in range(2000):
+            if cache.get(f"scan{i}") is None:
+                cache.put(f"scan{i}", 'v' * 100, 1)
+        kept = sum(cache.get(f"hot{i}") is not None for i in range(50))
+        self.assertGreater(kept, 45)
+        self.assertGreater(cache.status()['rejections'], 0)
+
+    def test_invalidate_respects_versions(self):
+        cache = ReadCache(10000)
+        cache.put('k', 'v', 5)
+        cache.invalidate('k', 5)
+        self.assertIsNotNone(cache.get('k'))
+        cache.invalidate('k', 6)
+        self.assertIsNone(cache.get('k'))
+
+    def test_notifier_reports_watched_keys_once(self):
+        sent = []
+        notifier = InvalidationNotifier(sent.append, batch_delay=0)
+        notifier.watch('a')
+        notifier.changed('a', 2)
+        notifier.changed('a', 3)
+        notifier.changed('b', 1)
+        deadline = time.time() + 2
+        while not sent and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(sent, [{'operation': 'INVALIDATE', 'keys': {'a': 2}}])
+
+class TestCoordinatorReadCache(unittest.TestCase):
+    def test_hits_and_invalidation_from_nodes(self):
+        coordinator = Coordinator('localhost', 5960, read_cache_bytes=1 << 20, read_cache_policy='tinylfu')
+        threading.Thread(target=coordinator.start_server, daemon=True).start()
+        time.sleep(0.3)
+        nodes = [KVStoreNode(f"cache_node_{i}", 'localhost', 7060 + i, coordinator_host='localhost', coordinator_port=5960) for i in range(2)]
+        for node in nodes:
+            threading.Thread(target=node.start_server, daemon=True).start()
+        deadline = time.time() + 5
+        while len(coordinator.nodes) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+
+        try:
+            read = lambda key: load_value(coordinator.route_request(key, 'GET').get('value'))
+            self.assertTrue(coordinator.route_request('hot', 'SET', 'v1')['success'])
+            self.assertEqual(read('hot'), 'v1')
+            self.assertEqual(read('hot'), 'v1')
+            self.assertEqual(coordinator.read_cache.status()['hits'], 1)
+
+            self.assertTrue(coordinator.route_request('hot', 'SET', 'v2')['success'])
+            self.assertEqual(read('hot'), 'v2')
+            self.assertEqual(read('hot'), 'v2')
+
+            # A write that bypasses the coordinator is reported by the owning node.
+            owner = next(node for node in nodes if node.node_id == coordinator.consistent_hash.get_node('hot'))
+            owner.set('hot', 'v3', sync_replicas=False)
+            deadline = time.time() + 2
+            while read('hot') != 'v3' and time.time() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(read('hot'), 'v3')
+
+            self.assertTrue(coordinator.route_request('hot', 'DELETE')['success'])
+            self.assertIsNone(read('hot'))
+            status = coordinator._process_client_request({'operation': 'HEALTH'})['read_cache']
+            self.assertGreater(status['hit_ratio'], 0)
+            self.assertGreater(status['invalidations'], 0)
+        finally:
+            coordinator.running = False
+            for node in nodes:
+                node.running = False
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import threading
+import time
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from read_balancer import ReadBalancer
+from codec import load_value
+
+class TestReadBalancer(unittest.TestCase):
+    def test_policies_order_candidates(self):
+        self.assertEqual(ReadBalancer('primary').order(['a', 'b']), ['a', 'b'])
+
+        round_robin = ReadBalancer('round-robin')
+        self.assertEqual([round_robin.order(['a', 'b'])[0] for _ in range(4)], ['a', 'b', 'a', 'b'])
+
+        least = ReadBalancer('least-outstanding')
+        least.start('a')
+        self.assertEqual(least.order(['a', 'b']), ['b', 'a'])
+        least.finish('a', 0.001)
+        self.assertEqual(least.order(['a', 'b']), ['a', 'b'])
+
+        latency = ReadBalancer('latency')
+        for _ in range(5):
+            for node_id, rtt in (('a', 0.100), ('b', 0.001)):
+                latency.start(node_id)
+                latency.finish(node_id, rtt)
+        firsts = [latency.order(['a', 'b'])[0] for _ in range(200)]
+        self.assertGreater(firsts.count('b'), 150)
+
+        with self.assertRaises(ValueError):
+            ReadBalancer('random')
+
+class TestWrittenVersions(unittest.TestCase):
+    def test_versions_are_bounded_per_key(self):
+        coordinator = Coordinator('localhost', 0, rebalance=False, failure_detection=False, collect_stats=False)
+        with patch('coordinator.MAX_WRITTEN_VERSIONS', 2), patch('coordinator.MAX_RECENT_DELETES', 2):
+            coordinator.invalidate({'gone': None})
+            for key, version in (('a', 7), ('b', 3), ('a', 8), ('c', 1)):
+                coordinator._track_write(key, 'SET', {'success': True, 'version': version})
+            self.assertEqual(list(coordinator.written_versions), ['a', 'c'])
+            self.assertEqual(coordinator._known_version('gone'), float('inf'))
+            coordinator._track_write('a', 'DELETE', {'success': True})
+            coordinator._track_write('x', 'DELETE', {'success': True})
+
+        # An evicted key is unknown again; nothing about it leaks into other keys.
+        self.assertTrue(coordinator._fresh_enough('b', {'success': True, 'version': 1}, max_staleness=0))
+        self.assertEqual(list(coordinator.written_versions), ['c'])
+        self.assertEqual(list(coordinator.recent_deletes), ['a', 'x'])
+        self.assertFalse(coordinator._fresh_enough('a', {'success': True, 'version': 100}, max_staleness=10))
+        self.assertTrue(coordinator._fresh_enough('gone', {'success': True, 'version': 1}, max_staleness=0))
+        coordinator._track_write('a', 'SET', {'success': True, 'version': 9})
+        self.assertNotIn('a', coordinator.recent_deletes)
+        self.assertTrue(coordinator._fresh_enough('a', {'success': True, 'version': 9}, max_staleness=0))
+
+class TestReadRouting(unittest.TestCase):
+    def test_round_robin_reads_respect_staleness_bound(self):
+        coordinator = Coordinator('localhost', 5700, read_policy='round-robin')
+        nodes = [KVStoreNode(f"read_node_{i}", 'localhost', 6700 + i) for i in range(2)]
+        for node in nodes:
+            threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.3)
+        for i, node in enumerate(nodes):
+            coordinator.register_node(node.node_id, node.host, node.port)
+            other = nodes[1 - i]
+            node.add_replica({'node_id': other.node_id, 'host': other.host, 'port': other.port})
+
+        try:
+            self.assertTrue(coordinator.route_request('hot', 'SET', 'fresh')['success'])
+            read = lambda **kwargs: load_value(coordinator.route_request('hot', 'GET', **kwargs)['value'])
+            for _ in range(10):
+                self.assertEqual(read(), 'fresh')
+            load = coordinator.read_balancer.status()
+            self.assertTrue(all(load[node.node_id]['requests'] >= 5 for node in nodes))
+
+            primary, secondary = coordinator.consistent_hash.get_nodes('hot', count=2)
+            replica = next(node for node in nodes if node.node_id == secondary)
+            replica.data.put('hot', 'stale', time.time(), 0)
+            for _ in range(6):
+                self.assertEqual(read(max_staleness=0), 'fresh')
+            values = {read() for _ in range(6)}
+            self.assertEqual(values, {'fresh', 'stale'})
+
+            self.assertTrue(coordinator.route_request('hot', 'DELETE')['success'])
+            replica.data.put('hot', 'stale', time.time(), 5)
+            for _ in range(4):
+                self.assertFalse(coordinator.route_request('hot', 'GET', max_staleness=0)['success'])
+        finally:
+            for node in nodes:
+                node.running = False
+                node.replication.close()
+            coordinator.pools.close_all()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from consistent_hashing import ConsistentHash, HashRanges, moved_ranges
+from codec import load_value
+
+class TestMovedRanges(unittest.TestCase):
+    def test_ranges_cover_exactly_the_moved_keys(self):
+        ring = ConsistentHash(['a', 'b', 'c'], virtual_nodes=50)
+        keys = [f"key:{i}" for i in range(3000)]
+        before = {key: ring.get_node(key) for key in keys}
+        old_state = ring.state
+        ring.add_node('d')
+        moves = moved_ranges(old_state, ring.state)
+        self.assertTrue(all(target == 'd' for _, _, _, target in moves))
+
+        ranges = HashRanges([(start, end) for start, end, _, _ in moves])
+        for key in keys:
+            self.assertEqual(ranges.contains_key(key), ring.get_node(key) != before[key])
+
+        before = {key: ring.get_node(key) for key in keys}
+        old_state = ring.state
+        ring.remove_node('a')
+        moves = moved_ranges(old_state, ring.state)
+        self.assertTrue(all(source == 'a' for _, _, source, _ in moves))
+        ranges = HashRanges([(start, end) for start, end, _, _ in moves])
+        for key in keys:
+            self.assertEqual(ranges.contains_key(key), before[key] == 'a')
+
+class TestRebalance(unittest.TestCase):
+    def start_node(self, i):
+        node = KVStoreNode(f"rebalance_node_{i}", 'localhost', 6800 + i)
+        threading.Thread(target=node.start_server, daemon=True).start()
+        self.nodes.append(node)
+        return node
+
+    def test_keys_move_to_new_owner_and_stay_readable(self):
+        self.nodes = []
+        coordinator = Coordinator('localhost', 5800, rebalance_batch_size=50, rebalance_rate=10)
+        for i in range(2):
+            self.start_node(i)
+        time.sleep(0.3)
+        for node in self.nodes:
+            coordinator.register_node(node.node_id, node.host, node.port)
+
+        try:
+            items = {f"user:{i}": i for i in range(600)}
+            self.assertTrue(all(coordinator.route_batch('MSET', list(items), items).values()))
+
+            joining = self.start_node(2)
+            time.sleep(0.3)
+            coordinator.register_node(joining.node_id, joining.host, joining.port)
+            self.assertGreater(coordinator.rebalancer.pending(), 0)
+
+            for key in list(items)[::20]:
+                self.assertEqual(load_value(coordinator.route_request(key, 'GET')['value']), items[key])
+            self.assertTrue(coordinator.route_request('user:0', 'DELETE')['success'])
+            self.assertTrue(coordinator.route_request('user:1', 'SET', 'updated')['success'])
+
+            self.assertTrue(coordinator.rebalancer.wait_idle(timeout=30))
+            status = coordinator._process_client_request({'operation': 'REBALANCE_STATUS'})
+            self.assertEqual(status['pending'], 0)
+            self.assertTrue(all(job['state'] == 'done' for job in status['jobs']))
+            self.assertGreater(status['moved'], 0)
+            self.assertEqual(joining.incoming, {})
+
+            by_id = {node.node_id: node for node in self.nodes}
+            for key, value in items.items():
+                owner = coordinator.get_node_for_key(key)['node_id']
+                for node_id, node in by_id.items():
+                    self.assertEqual(key in node.data, node_id == owner and key != 'user:0', key)
+                if key == 'user:0':
+                    self.assertFalse(coordinator.route_request(key, 'GET')['success'])
+                elif key == 'user:1':
+                    self.assertEqual(load_value(coordinator.route_request(key, 'GET')['value']), 'updated')
+                else:
+                    self.assertEqual(load_value(coordinator.route_request(key, 'GET')['value']), value)
+        finally:
+            for node in self.nodes:
+                node.running = False
+                node.replication.close()
+            coordinator.pools.close_all()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+
+class TestReplicationStream(unittest.TestCase):
+    def setUp(self):
+        self.nodes = []
+
+    def tearDown(self):
+        for node in self.nodes:
+            node.running = False
+            node.replication.close()
+
+    def start_node(self, node, delay=0.3):
+        threading.Thread(target=node.start_server, daemon=True).start()
+        self.nodes.append(node)
+        time.sleep(delay)
+
+    def wait_until(self, predicate, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.05)
+        return predicate()
+
+    def test_lagging_replica_catches_up_from_log(self):
+        primary = KVStoreNode('repl_primary', 'localhost', 6400, replication_mode='async')
+        replica = KVStoreNode('repl_replica', 'localhost', 6401)
+        self.start_node(primary)
+        primary.add_replica({'node_id': replica.node_id, 'host': replica.host, 'port': replica.port})
+
+        start = time.time()
+        for i in range(100):
+            primary.set(f"k{i}", i)
+        primary.mset({'a': 1, 'b': 2})
+        primary.delete('k0')
+        self.assertLess(time.time() - start, 2, "async writes must not wait for the replica")
+
+        self.start_node(replica)
+        self.assertTrue(self.wait_until(lambda: len(replica.data) == 101))
+        self.assertIsNone(replica.get('k0'))
+        self.assertEqual(replica.get('k99'), 99)
+        self.assertEqual(replica.data['a']['version'], primary.data['a']['version'])
+        self.assertTrue(self.wait_until(lambda: primary.replication.status()['replicas']['repl_replica']['lag'] == 0))
+
+    def test_sync_mode_waits_for_ack(self):
+        primary = KVStoreNode('sync_primary', 'localhost', 6402, replication_mode='sync')
+        replica = KVStoreNode('sync_replica', 'localhost', 6403)
+        self.start_node(primary, delay=0)
+        self.start_node(replica)
+        primary.add_replica({'node_id': replica.node_id, 'host': replica.host, 'port': replica.port})
+
+        for i in range(20):
+            primary.set(f"s{i}", i)
+            self.assertEqual(replica.get(f"s{i}"), i)
+
+    def test_new_replica_receives_existing_data(self):
+        primary = KVStoreNode('full_primary', 'localhost', 6404)
+        replica = KVStoreNode('full_replica', 'localhost', 6405)
+        self.start_node(primary, delay=0)
+        self.start_node(replica)
+        for i in range(10):
+            primary.set(f"f{i}", i)
+
+        primary.add_replica({'node_id': replica.node_id, 'host': replica.host, 'port': replica.port})
+        self.assertTrue(self.wait_until(lambda: len(replica.data) == 10))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import threading
+import time
+import sys
+import os
+import random
+import tempfile
+import shutil
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from client import KVClient
+from ordered_index import OrderedIndex
+
+class TestOrderedIndex(unittest.TestCase):
+    def test_stays_sorted_across_chunk_splits(self):
+        index = OrderedIndex(chunk_size=4)
+        keys = [f"key:{i:04d}" for i in range(200)]
+        shuffled = list(keys)
+        random.Random(7).shuffle(shuffled)
+        for key in shuffled:
+            index.add(key)
+        index.add('key:0005')
+        self.assertEqual(list(index), keys)
+        self.assertEqual(len(index), 200)
+        for key in keys[::2]:
+            index.discard(key)
+        index.discard('missing')
+        self.assertEqual(list(index), keys[1::2])
+        self.assertEqual(index.keys_from('key:0100', 3), ['key:0101', 'key:0103', 'key:0105'])
+        self.assertEqual(index.keys_from('key:0101', 2, inclusive=False), ['key:0103', 'key:0105'])
+        self.assertNotIn('key:0100', index)
+        self.assertIn('key:0101', index)
+
+class TestNodeScan(unittest.TestCase):
+    def setUp(self):
+        self.node = KVStoreNode('scan_node', 'localhost', 0, ordered_index=True)
+        for i in range(25):
+            self.node.set(f"user:{i:02d}", {'id': i}, sync_replicas=False)
+            self.node.set(f"product:{i:02d}", i, sync_replicas=False)
+
+    def test_prefix_pages_with_cursor(self):
+        keys = []
+        cursor = None
+        while True:
+            response = self.node._process_request({'operation': 'SCAN', 'prefix': 'user:', 'cursor': cursor, 'limit': 10})
+            self.assertTrue(response['success'])
+            keys.extend(entry['key'] for entry in response['entries'])
+            cursor = response['cursor']
+            if cursor is None:
+                break
+        self.assertEqual(keys, [f"user:{i:02d}" for i in range(25)])
+
+    def test_range_skips_deleted_and_expired_keys(self):
+        self.node.delete('user:03', sync_replicas=False)
+        self.node.set('user:04', 'short', sync_replicas=False, ttl=0.05)
+        time.sleep(0.1)
+        entries, cursor = self.node.scan(start='user:02', end='user:06')
+        self.assertEqual([entry['key'] for entry in entries], ['user:02', 'user:05'])
+        self.assertIsNone(cursor)
+
+    def test_disabled_index_reports_error(self):
+        node = KVStoreNode('plain_node', 'localhost', 0)
+        response = node._process_request({'operation': 'SCAN', 'prefix': 'user:'})
+        self.assertFalse(response['success'])
+
+    def test_index_rebuilt_from_snapshot(self):
+        data_dir = tempfile.mkdtemp()
+        try:
+            node = KVStoreNode('scan_durable', 'localhost', 0, data_dir=data_dir, ordered_index=True)
+            for i in range(5):
+                node.set(f"user:{i}", i, sync_replicas=False)
+            node.write_snapshot()
+            node.delete('user:1', sync_replicas=False)
+            node.wal.close()
+            restored = KVStoreNode('scan_durable', 'localhost', 0, data_dir=data_dir, ordered_index=True)
+            entries, _ = restored.scan(prefix='user:')
+            self.assertEqual([entry['key'] for entry in entries], ['user:0', 'user:2', 'user:3', 'user:4'])
+            restored.wal.close()
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+class TestCoordinatorScan(unittest.TestCase):
+    def test_merges_nodes_in_key_order(self):
+        coordinator = Coordinator('localhost', 5975)
+        threading.Thread(target=coordinator.start_server, daemon=True).start()
+        nodes = [KVStoreNode(f"scan_node_{i}", 'localhost', 7075 + i, ordered_index=True) for i in range(2)]
+        for node in nodes:
+            threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.5)
+        for node in nodes:
+            coordinator.register_node(node.node_id, node.host, node.port)
+        client = KVClient('localhost', 5975)
+
+        try:
+            users = {f"user:{i:03d}": i for i in range(120)}
+            client.mset(users)
+            client.mset({f"product:{i}": i for i in range(30)})
+            self.assertTrue(all(len(node.data) for node in nodes))
+            # The same key on two nodes, as after a replica copy, shows up once with the newer value.
+            nodes[0].set('user:000', 'old', sync_replicas=False)
+            nodes[1].set('user:000', 'old', sync_replicas=False)
+            nodes[1].set('user:000', 'newer', sync_replicas=False)
+            nodes[1].set('user:000', 'new', sync_replicas=False)
+
+            scanned = list(client.scan(prefix='user:', page_size=7))
+            self.assertEqual([key for key, _ in scanned], sorted(users))
+            self.assertEqual(scanned[0][1], 'new')
+            self.assertEqual(dict(scanned[1:]), {key: value for key, value in users.items() if key != 'user:000'})
+
+            page = client.scan_page(start='user:050', end='user:060', limit=4)
+            self.assertEqual([entry['key'] for entry in page['entries']], ['user:050', 'user:051', 'user:052', 'user:053'])
+            self.assertEqual(page['cursor'], 'user:053')
+            rest = client.scan_page(start='user:050', end='user:060', cursor=page['cursor'], limit=10)
+            self.assertEqual(len(rest['entries']), 6)
+            self.assertIsNone(rest['cursor'])
+        finally:
+            client.close()
+            coordinator.running = False
+            for node in nodes:
+                node.running = False
+
+if __name__ == "__main__":
+    unittest.main()
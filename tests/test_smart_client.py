@@ -0,0 +1,87 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from client import KVClient
+
+class TestSmartClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.coordinator = Coordinator('localhost', 5600)
+        threading.Thread(target=cls.coordinator.start_server, daemon=True).start()
+        time.sleep(0.5)
+        cls.nodes = []
+        for i in range(3):
+            node = KVStoreNode(f"smart_node_{i}", 'localhost', 6600 + i,
+                               coordinator_host='localhost', coordinator_port=5600)
+            threading.Thread(target=node.start_server, daemon=True).start()
+            cls.nodes.append(node)
+        time.sleep(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.coordinator.running = False
+        for node in cls.nodes:
+            node.running = False
+
+    def wait_until(self, predicate, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.05)
+        return predicate()
+
+    def test_routes_to_owner_and_refreshes_stale_epoch(self):
+        client = KVClient('localhost', 5600, smart=True)
+        try:
+            self.assertTrue(client.set('alpha', {'n': 1}, ttl=60))
+            self.assertEqual(client.get('alpha'), {'n': 1})
+            owner = self.coordinator.get_node_for_key('alpha')['node_id']
+            self.assertIn('alpha', next(node for node in self.nodes if node.node_id == owner).data)
+
+            items = {f"batch:{i}": i for i in range(30)}
+            self.assertTrue(all(client.mset(items).values()))
+            self.assertEqual(client.mget(list(items) + ['missing']), dict(items, missing=None))
+            self.assertTrue(all(client.mdelete(list(items)).values()))
+
+            epoch = client._topology.epoch
+            self.coordinator.register_node('smart_ghost', 'localhost', 6699)
+            self.assertTrue(self.wait_until(lambda: all(node.epoch > epoch for node in self.nodes)))
+            stale = self.nodes[0]._process_request({'operation': 'GET', 'key': 'alpha', 'epoch': epoch})
+            self.assertTrue(stale['stale_epoch'])
+
+            self.assertEqual(client.get('alpha'), {'n': 1})
+            self.assertGreater(client._topology.epoch, epoch)
+            self.assertIn('smart_ghost', client._topology.nodes)
+        finally:
+            self.coordinator.unregister_node('smart_ghost')
+            client.close()
+
+    def test_serves_without_coordinator_hop(self):
+        client = KVClient('localhost', 5600, smart=True)
+        try:
+            client.refresh_topology()
+            self.assertTrue(self.wait_until(lambda: all(node.epoch == self.coordinator.epoch for node in self.nodes)))
+            client.refresh_topology(client._topology.epoch)
+            routed = []
+            original = self.coordinator.route_request
+            self.coordinator.route_request = lambda *args, **kwargs: routed.append(args) or original(*args, **kwargs)
+            try:
+                for i in range(20):
+                    self.assertTrue(client.set(f"direct:{i}", i))
+                    self.assertEqual(client.get(f"direct:{i}"), i)
+            finally:
+                self.coordinator.route_request = original
+            self.assertEqual(routed, [])
+        finally:
+            client.close()
+
+if __name__ == "__main__":
+    unittest.main()
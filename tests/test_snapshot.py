@@ -0,0 +1,87 @@
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from snapshot import SnapshotReader, write_snapshot
+from codec import RawValue, load_value
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_reader_lookup(self):
+        path = os.path.join(self.data_dir, 'test.snapshot')
+        entries = [(f"key:{i}", str(i * i).encode(), i + 1, 1000.0 + i) for i in range(500)]
+        self.assertEqual(write_snapshot(path, reversed(entries), segment=7), 500)
+
+        reader = SnapshotReader(path)
+        self.assertEqual(len(reader), 500)
+        self.assertEqual(reader.segment, 7)
+        self.assertEqual(reader.get('key:12'), {'value': 144, 'timestamp': 1012.0, 'version': 13})
+        raw_value, version, _ = reader.get_raw('key:3')
+        self.assertIsInstance(raw_value, memoryview)
+        self.assertEqual(bytes(raw_value), b'9')
+        self.assertIsNone(reader.get('key:missing'))
+        self.assertEqual([key for key, *_ in reader.iter_raw()], sorted(key for key, *_ in entries))
+
+    def test_gets_from_snapshot_are_not_decoded(self):
+        node = KVStoreNode('snap_raw', 'localhost', 0, data_dir=self.data_dir, snapshot_promote_after=2)
+        node.set('doc', {'nested': [1, 2]})
+        node.set('none', None)
+        node.write_snapshot()
+        node.wal.close()
+
+        restarted = KVStoreNode('snap_raw', 'localhost', 0, data_dir=self.data_dir, snapshot_promote_after=3)
+        with patch('snapshot.json.loads', side_effect=AssertionError('value decoded')):
+            response = restarted._process_request({'operation': 'GET', 'key': 'doc'})
+            batch = restarted._process_request({'operation': 'MGET', 'keys': ['doc']})
+            self.assertFalse(restarted._process_request({'operation': 'GET', 'key': 'none'})['success'])
+        self.assertIsInstance(response['value'], RawValue)
+        self.assertEqual(load_value(response['value']), {'nested': [1, 2]})
+        self.assertEqual(load_value(batch['results']['doc']['value']), {'nested': [1, 2]})
+        # The third read promotes the key, decoded, into the in-memory store.
+        self.assertEqual(load_value(restarted._process_request({'operation': 'GET', 'key': 'doc'})['value']), {'nested': [1, 2]})
+        self.assertEqual(restarted.data['doc']['value'], {'nested': [1, 2]})
+        restarted.wal.close()
+
+    def test_warm_start_serves_from_snapshot(self):
+        node = KVStoreNode('snap_node', 'localhost', 0, data_dir=self.data_dir, snapshot_promote_after=2)
+        for i in range(200):
+            node.set(f"k{i}", {'i': i})
+        node.write_snapshot()
+        node.set('k1', 'after snapshot')
+        node.wal.close()
+
+        restarted = KVStoreNode('snap_node', 'localhost', 0, data_dir=self.data_dir, snapshot_promote_after=2)
+        self.assertEqual(len(restarted.snapshot), 200)
+        self.assertEqual(list(restarted.data), ['k1'])
+        self.assertEqual(restarted.get('k1'), 'after snapshot')
+
+        self.assertEqual(restarted.get('k7'), {'i': 7})
+        self.assertNotIn('k7', restarted.data)
+        self.assertEqual(restarted.get('k7'), {'i': 7})
+        self.assertIn('k7', restarted.data)
+
+        self.assertTrue(restarted.delete('k8'))
+        self.assertIsNone(restarted.get('k8'))
+        self.assertFalse(restarted.delete('k8'))
+        restarted.set('k9', 'new')
+        self.assertEqual(restarted._lookup('k9')[0]['version'], 2)
+
+        restarted.write_snapshot()
+        self.assertEqual(len(restarted.snapshot), 199)
+        self.assertNotIn('k8', restarted.tombstones)
+        self.assertIsNone(restarted.get('k8'))
+        restarted.wal.close()
+
+if __name__ == "__main__":
+    unittest.main()
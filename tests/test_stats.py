@@ -0,0 +1,76 @@
+import unittest
+import threading
+import time
+import random
+import socket
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from protocol import request
+from stats import Stats, LatencyHistogram, LOCK_WAITS
+from RWlock import ReadWriteLock
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        rng = random.Random(7)
+        samples = sorted(rng.expovariate(1 / 0.002) for _ in range(20000))
+        for sample in samples:
+            histogram.record(sample)
+        for quantile in (0.5, 0.99, 0.999):
+            exact = samples[int(quantile * len(samples)) - 1]
+            self.assertAlmostEqual(histogram.percentile(quantile), exact, delta=exact * 0.08 + 2e-6)
+        self.assertEqual(histogram.percentile(1.0), max(samples))
+
+    def test_stats_snapshot_and_prometheus(self):
+        stats = Stats()
+        stats.record('GET', 0.001)
+        stats.record('GET', 0.003, error=True)
+        stats.record_bytes('GET', 40, 60)
+        get = stats.snapshot()['operations']['GET']
+        self.assertEqual((get['count'], get['errors'], get['bytes_in'], get['bytes_out']), (2, 1, 40, 60))
+        text = stats.prometheus('kv_node', {'node': 'n1'})
+        self.assertIn('kv_node_requests_total{node="n1",op="GET"} 2', text)
+        self.assertIn('kv_node_latency_seconds_count{node="n1",op="GET"} 2', text)
+        self.assertIn('quantile="0.999"', text)
+
+    def test_contended_lock_waits_are_recorded(self):
+        lock = ReadWriteLock()
+        before = LOCK_WAITS.snapshot()['operations'].get('read', {}).get('count', 0)
+        lock.acquire_write()
+        reader = threading.Thread(target=lambda: (lock.acquire_read(), lock.release_read()))
+        reader.start()
+        time.sleep(0.05)
+        lock.release_write()
+        reader.join()
+        read = LOCK_WAITS.snapshot()['operations']['read']
+        self.assertEqual(read['count'], before + 1)
+        self.assertGreaterEqual(read['latency_ms']['max'], 40)
+
+class TestNodeStats(unittest.TestCase):
+    def test_stats_op_reports_served_requests(self):
+        node = KVStoreNode('stats_node', 'localhost', 7000)
+        threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.3)
+        try:
+            with socket.create_connection((node.host, node.port)) as sock:
+                for i in range(20):
+                    request(sock, {'operation': 'SET', 'key': f"k{i}", 'value': i})
+                    request(sock, {'operation': 'GET', 'key': f"k{i}"})
+                report = request(sock, {'operation': 'STATS'})
+                text = request(sock, {'operation': 'STATS', 'format': 'prometheus'})['text']
+
+            self.assertTrue(report['success'])
+            self.assertEqual(report['operations']['SET']['count'], 20)
+            self.assertEqual(report['operations']['GET']['errors'], 0)
+            self.assertGreater(report['operations']['GET']['bytes_out'], report['operations']['GET']['bytes_in'])
+            self.assertGreater(report['operations']['GET']['latency_ms']['p99'], 0)
+            self.assertIn('kv_node_requests_total{node="stats_node",op="SET"} 20', text)
+        finally:
+            node.running = False
+
+if __name__ == "__main__":
+    unittest.main()
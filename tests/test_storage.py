@@ -0,0 +1,78 @@
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from storage import STORAGE_ENGINES
+from codec import RawValue, load_value
+
+class TestStorageEngines(unittest.TestCase):
+    def test_engines_behave_alike(self):
+        for engine in STORAGE_ENGINES:
+            with self.subTest(engine=engine):
+                node = KVStoreNode(f"{engine}_node", 'localhost', 0, storage_engine=engine)
+                node.set('a', {'nested': [1, 2]})
+                node.set('a', 'second')
+                node.mset({'b': 2, 'c': 3})
+                self.assertEqual(node.get('a'), 'second')
+                self.assertEqual(node.data['a']['version'], 2)
+                self.assertEqual(node.mget(['a', 'b', 'missing']), {'a': 'second', 'b': 2})
+                self.assertTrue(node.delete('b'))
+                self.assertFalse(node.delete('b'))
+                self.assertEqual(node.mdelete(['c', 'zzz']), {'c': True, 'zzz': False})
+                node.set('d', None)
+                self.assertEqual(sorted(node.data), ['a', 'd'])
+                self.assertEqual(node.data.memory_report()['keys'], 2)
+
+    def test_columnar_reuses_slots_and_survives_restart(self):
+        data_dir = tempfile.mkdtemp()
+        try:
+            node = KVStoreNode('col_node', 'localhost', 0, storage_engine='columnar', data_dir=data_dir)
+            for i in range(100):
+                node.set(f"k{i}", i)
+            for i in range(50):
+                node.delete(f"k{i}")
+            for i in range(50):
+                node.set(f"n{i}", i)
+            self.assertEqual(len(node.data._values), 100)
+            node.write_snapshot()
+            node.wal.close()
+
+            restarted = KVStoreNode('col_node', 'localhost', 0, storage_engine='columnar', data_dir=data_dir)
+            self.assertEqual(restarted.get('k75'), 75)
+            self.assertIsNone(restarted.get('k5'))
+            self.assertEqual(restarted.get('n5'), 5)
+            restarted.wal.close()
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    def test_columnar_serves_reads_without_decoding(self):
+        node = KVStoreNode('raw_node', 'localhost', 0, storage_engine='columnar')
+        node.set('a', {'nested': [1, 2]})
+        node.set('n', None)
+        with patch('storage.decode_value', side_effect=AssertionError('value decoded')):
+            response = node._process_request({'operation': 'GET', 'key': 'a'})
+            self.assertFalse(node._process_request({'operation': 'GET', 'key': 'n'})['success'])
+            node.set('a', 'second')
+            batch = node._process_request({'operation': 'MGET', 'keys': ['a']})
+            self.assertTrue(node.delete('a'))
+        self.assertIsInstance(response['value'], RawValue)
+        self.assertEqual((load_value(response['value']), response['version']), ({'nested': [1, 2]}, 1))
+        self.assertEqual(load_value(batch['results']['a']['value']), 'second')
+
+    def test_compact_layouts_use_less_memory(self):
+        reports = {}
+        for engine in STORAGE_ENGINES:
+            node = KVStoreNode(f"mem_{engine}", 'localhost', 0, storage_engine=engine)
+            node.mset({f"key:{i}": i for i in range(2000)})
+            reports[engine] = node.data.memory_report()['bytes_per_key']
+        self.assertLess(reports['slots'], reports['dict'])
+        self.assertLess(reports['columnar'], reports['slots'])
+
+if __name__ == "__main__":
+    unittest.main()
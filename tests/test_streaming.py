@@ -0,0 +1,100 @@
+import unittest
+import threading
+import time
+import sys
+import os
+import io
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+from coordinator import Coordinator
+from client import KVClient
+from streaming import is_chunk_key
+
+class TestStreaming(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.coordinator = Coordinator('localhost', 5980)
+        threading.Thread(target=cls.coordinator.start_server, daemon=True).start()
+        cls.nodes = [KVStoreNode(f"stream_node_{i}", 'localhost', 7080 + i, ordered_index=True) for i in range(2)]
+        for node in cls.nodes:
+            threading.Thread(target=node.start_server, daemon=True).start()
+        time.sleep(0.5)
+        for node in cls.nodes:
+            cls.coordinator.register_node(node.node_id, node.host, node.port)
+        cls.client = KVClient('localhost', 5980)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+        cls.coordinator.running = False
+        for node in cls.nodes:
+            node.running = False
+
+    def chunk_count(self) -> int:
+        return sum(1 for node in self.nodes for key in list(node.data.keys()) if is_chunk_key(key))
+
+    def test_round_trip_in_chunks(self):
+        payload = os.urandom(3 * 1024 * 1024 + 123)
+        self.assertEqual(self.client.put_file('blob:big', io.BytesIO(payload), chunk_size=64 * 1024), len(payload))
+        self.assertGreater(self.chunk_count(), 40)
+
+        out = io.BytesIO()
+        self.assertEqual(self.client.get_file('blob:big', out), len(payload))
+        self.assertEqual(out.getvalue(), payload)
+
+        reader = self.client.open_reader('blob:big')
+        self.assertEqual(reader.read(10), payload[:10])
+        self.assertEqual(reader.read(100000), payload[10:100010])
+        reader.close()
+
+    def test_overwrite_and_delete_drop_old_chunks(self):
+        with self.client.open_writer('blob:doc', chunk_size=1024) as writer:
+            for _ in range(10):
+                writer.write(b'a' * 500)
+        before = self.chunk_count()
+        with self.client.open_writer('blob:doc', chunk_size=1024) as writer:
+            writer.write(b'b' * 2048)
+        self.assertEqual(self.chunk_count(), before - 5 + 2)
+        self.assertEqual(self.client.open_reader('blob:doc').read(), b'b' * 2048)
+
+        self.assertTrue(self.client.delete_blob('blob:doc'))
+        self.assertEqual(self.chunk_count(), before - 5)
+        self.assertIsNone(self.client.open_reader('blob:doc'))
+
+    def test_failed_write_publishes_nothing(self):
+        before = self.chunk_count()
+        with self.assertRaises(RuntimeError):
+            with self.client.open_writer('blob:partial', chunk_size=1024) as writer:
+                writer.write(b'x' * 4096)
+                raise RuntimeError("source went away")
+        self.assertIsNone(self.client.get('blob:partial'))
+        self.assertEqual(self.chunk_count(), before)
+
+    def test_plain_writes_cannot_orphan_chunks(self):
+        self.client.put_file('blob:kept', io.BytesIO(b'k' * 3000), chunk_size=1024)
+        before = self.chunk_count()
+        self.assertFalse(self.client.set('blob:kept', 'plain'))
+        self.assertFalse(self.client.delete('blob:kept'))
+        self.assertEqual(self.client.mset({'blob:kept': 1, 'blob:other': 2}), {'blob:kept': False, 'blob:other': True})
+        self.assertEqual(self.client.mdelete(['blob:kept', 'blob:other']), {'blob:kept': False, 'blob:other': True})
+        self.assertEqual(self.chunk_count(), before)
+        self.assertEqual(self.client.open_reader('blob:kept').read(), b'k' * 3000)
+        self.assertTrue(self.client.delete_blob('blob:kept'))
+        self.assertEqual(self.chunk_count(), before - 3)
+        self.assertTrue(self.client.set('blob:kept', 'plain'))
+
+    def test_chunk_namespace_is_reserved(self):
+        self.assertFalse(self.client.set('user\x00key', 1))
+        self.assertFalse(self.client.incr('user\x00count'))
+        self.assertEqual(self.client.mset({'user\x00key': 1}), {'user\x00key': False})
+        self.assertFalse(any('user\x00key' in node.data for node in self.nodes))
+
+    def test_chunks_hidden_from_scan(self):
+        self.client.put_file('scanned:blob', io.BytesIO(b'z' * 5000), chunk_size=1024)
+        self.client.set('scanned:plain', 1)
+        self.assertEqual([key for key, _ in self.client.scan(prefix='scanned:')], ['scanned:blob', 'scanned:plain'])
+
+if __name__ == "__main__":
+    unittest.main()
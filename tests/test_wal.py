@@ -0,0 +1,74 @@
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_node import KVStoreNode
+
+class TestWriteAheadLog(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def open_node(self):
+        return KVStoreNode('wal_node', 'localhost', 0, data_dir=self.data_dir)
+
+    def test_restart_replays_log(self):
+        node = self.open_node()
+        for i in range(50):
+            node.set(f"k{i}", {'i': i})
+        node.set('k1', 'updated')
+        node.delete('k2')
+        node.mset({'a': 1, 'b': 2})
+        node.mdelete(['a'])
+        node.wal.close()
+
+        restarted = self.open_node()
+        self.assertEqual(len(restarted.data), 50)
+        self.assertEqual(restarted.get('k1'), 'updated')
+        self.assertEqual(restarted.data['k1']['version'], 2)
+        self.assertIsNone(restarted.get('k2'))
+        self.assertIsNone(restarted.get('a'))
+        self.assertEqual(restarted.get('b'), 2)
+        restarted.wal.close()
+
+    def test_compaction_bounds_replay(self):
+        node = self.open_node()
+        for round_number in range(5):
+            for i in range(100):
+                node.set(f"k{i}", round_number)
+        node.wal.compact()
+        node.set('after', True)
+        node.delete('k0')
+        node.wal.close()
+
+        segments = [name for name in os.listdir(self.data_dir) if '.wal.' in name]
+        self.assertEqual(len(segments), 1)
+
+        restarted = self.open_node()
+        self.assertEqual(len(restarted.snapshot), 100)
+        self.assertEqual(restarted.get('k5'), 4)
+        self.assertEqual(restarted._lookup('k5')[0]['version'], 5)
+        self.assertIsNone(restarted.get('k0'))
+        self.assertTrue(restarted.get('after'))
+        restarted.wal.close()
+
+    def test_torn_tail_is_ignored(self):
+        node = self.open_node()
+        node.set('kept', 1)
+        node.wal.close()
+        segment = os.path.join(self.data_dir, sorted(n for n in os.listdir(self.data_dir) if '.wal.' in n)[-1])
+        with open(segment, 'ab') as f:
+            f.write(b'\x00\x00\x00\x40\x00\x00')
+
+        restarted = self.open_node()
+        self.assertEqual(restarted.get('kept'), 1)
+        restarted.wal.close()
+
+if __name__ == "__main__":
+    unittest.main()
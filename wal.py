@@ -0,0 +1,158 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Iterator, List
+
+RECORD_HEADER = struct.Struct('!II')
+
+def encode_record(record: dict) -> bytes:
+    payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+def read_records(path: str) -> Iterator[dict]:
+    with open(path, 'rb') as f:
+        data = f.read()
+    view = memoryview(data)
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        length, checksum = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = view[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            print(f"WAL {path}: torn record at offset {offset}, ignoring the tail")
+            return
+        yield json.loads(payload.tobytes())
+        offset = start + length
+
+class WriteAheadLog:
+    def __init__(self, directory: str, name: str, checkpoint: Callable[[int], None],
+                 fsync_interval: float = 0.005, batch_size: int = 256,
+                 compact_bytes: int = 64 * 1024 * 1024, compact_check_interval: float = 5):
+        self.directory = directory
+        self.name = name
+        self.checkpoint = checkpoint
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.compact_bytes = compact_bytes
+        self.compact_check_interval = compact_check_interval
+        self.closed = False
+        self._buffer = bytearray()
+        self._pending = 0
+        self._lsn = 0
+        self._durable_lsn = 0
+        self._segment_bytes = 0
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._segment = self._next_segment_number()
+        self._file = open(self._segment_path(self._segment), 'ab')
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        self._compactor = threading.Thread(target=self._compact_loop, daemon=True)
+        self._compactor.start()
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{self.name}.wal.{number:08d}")
+
+    def _segments(self) -> List[int]:
+        prefix = f"{self.name}.wal."
+        return sorted(int(entry[len(prefix):]) for entry in os.listdir(self.directory)
+                      if entry.startswith(prefix) and entry[len(prefix):].isdigit())
+
+    def _next_segment_number(self) -> int:
+        segments = self._segments()
+        return segments[-1] + 1 if segments else 1
+
+    def replay(self, start_segment: int = 0) -> Iterator[dict]:
+        for number in self._segments():
+            if start_segment <= number < self._segment:
+                yield from read_records(self._segment_path(number))
+
+    def append(self, record: dict) -> int:
+        frame = encode_record(record)
+        with self._cond:
+            self._buffer += frame
+            self._pending += 1
+            self._lsn += 1
+            if self._pending >= self.batch_size:
+                self._cond.notify_all()
+            return self._lsn
+
+    def wait_durable(self, lsn: int):
+        with self._cond:
+            while self._durable_lsn < lsn and not self.closed:
+                self._cond.wait()
+
+    def _take_buffer(self):
+        with self._cond:
+            buffer, lsn = self._buffer, self._lsn
+            self._buffer = bytearray()
+            self._pending = 0
+            return buffer, lsn
+
+    def _write(self, buffer: bytearray, lsn: int):
+        if buffer:
+            self._file.write(buffer)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._segment_bytes += len(buffer)
+        with self._cond:
+            self._durable_lsn = max(self._durable_lsn, lsn)
+            self._cond.notify_all()
+
+    def _flush_loop(self):
+        while not self.closed:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending >= self.batch_size or self.closed, self.fsync_interval)
+            with self._io_lock:
+                try:
+                    self._write(*self._take_buffer())
+                except Exception as e:
+                    print(f"WAL {self.name}: flush failed: {e}")
+
+    def flush(self):
+        with self._io_lock:
+            self._write(*self._take_buffer())
+
+    def _rotate(self) -> int:
+        with self._io_lock:
+            self._write(*self._take_buffer())
+            self._file.close()
+            self._segment += 1
+            self._segment_bytes = 0
+            self._file = open(self._segment_path(self._segment), 'ab')
+            return self._segment
+
+    def compact(self):
+        with self._compact_lock:
+            start = time.time()
+            # Every write appended before the rotation is already applied in memory, so a
+            # checkpoint taken afterwards covers all older segments; replay is idempotent for
+            # writes that land in both the checkpoint and the new segment.
+            segment = self._rotate()
+            self.checkpoint(segment)
+            for number in self._segments():
+                if number < segment:
+                    os.remove(self._segment_path(number))
+            print(f"WAL {self.name}: checkpointed at segment {segment} in {time.time() - start:.3f}s")
+
+    def _compact_loop(self):
+        while not self.closed:
+            time.sleep(self.compact_check_interval)
+            if self._segment_bytes >= self.compact_bytes and not self.closed:
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"WAL {self.name}: compaction failed: {e}")
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        with self._io_lock:
+            self._file.close()